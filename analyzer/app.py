@@ -1,4 +1,7 @@
 import os
+import socket
+
+from irrigation_common.logging_config import setup_logging
 
 from src.analyzer import Analyzer
 from src.config import Config
@@ -6,12 +9,80 @@ from src.config import Config
 MQTT_BROKER_URL = os.getenv('MQTT_BROKER_URL', 'mosquitto:1883')
 BACKEND_URL = os.getenv('BACKEND_URL', 'http://backend:5000')
 WEATHER_API_KEY = os.getenv('WEATHER_API_KEY', "")
+HYSTERESIS_BAND = float(os.getenv('HYSTERESIS_BAND', 0.0))
+HEARTBEAT_INTERVAL = float(os.getenv('HEARTBEAT_INTERVAL', 300))
+BATCH_ENGINE_ENABLED = os.getenv('BATCH_ENGINE_ENABLED', 'false').lower() == 'true'
+COALESCE_ENABLED = os.getenv('COALESCE_ENABLED', 'false').lower() == 'true'
+COALESCE_WINDOW = float(os.getenv('COALESCE_WINDOW', 2.0))
+WEATHER_TTL = float(os.getenv('WEATHER_TTL', 600))
+WEATHER_REFRESH_MARGIN = float(os.getenv('WEATHER_REFRESH_MARGIN', 60))
+WEATHER_MAX_STALE = float(os.getenv('WEATHER_MAX_STALE', 3600))
+WEATHER_TIMEOUT = float(os.getenv('WEATHER_TIMEOUT', 5.0))
+WEATHER_BREAKER_THRESHOLD = int(os.getenv('WEATHER_BREAKER_THRESHOLD', 3))
+WEATHER_BREAKER_RESET = float(os.getenv('WEATHER_BREAKER_RESET', 60))
+WEATHER_CACHE_PATH = os.getenv('WEATHER_CACHE_PATH', 'data/weather_cache.sqlite')
+WEATHER_GRID_SIZE = float(os.getenv('WEATHER_GRID_SIZE', 0.01))
+TOPOLOGY_RELOAD_INTERVAL = float(os.getenv('TOPOLOGY_RELOAD_INTERVAL', 30))
+SHARDING_ENABLED = os.getenv('SHARDING_ENABLED', 'false').lower() == 'true'
+INSTANCE_ID = os.getenv('INSTANCE_ID', socket.gethostname())
+REBALANCE_DELAY = float(os.getenv('REBALANCE_DELAY', 2.0))
+HISTORY_ENABLED = os.getenv('HISTORY_ENABLED', 'false').lower() == 'true'
+HISTORY_MEMORY_BUDGET_MB = float(os.getenv('HISTORY_MEMORY_BUDGET_MB', 64))
+HISTORY_RAW_SECONDS = int(os.getenv('HISTORY_RAW_SECONDS', 600))
+HISTORY_MINUTES = int(os.getenv('HISTORY_MINUTES', 1440))
+HISTORY_HOURS = int(os.getenv('HISTORY_HOURS', 168))
+SOIL_MOISTURE_HALF_LIFE = float(os.getenv('SOIL_MOISTURE_HALF_LIFE', 0))
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9100))
+METRICS_PUSH_INTERVAL = float(os.getenv('METRICS_PUSH_INTERVAL', 0))
+PAYLOAD_CODEC = os.getenv('PAYLOAD_CODEC', 'json')
+WORK_QUEUE_ENABLED = os.getenv('WORK_QUEUE_ENABLED', 'false').lower() == 'true'
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', 4))
+WORK_QUEUE_CAPACITY = int(os.getenv('WORK_QUEUE_CAPACITY', 10000))
+OUTLOOK_HOURS = int(os.getenv('OUTLOOK_HOURS', 0))
+OUTLOOK_TREND_WINDOW = float(os.getenv('OUTLOOK_TREND_WINDOW', 21600))
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_RATE_LIMIT = float(os.getenv('LOG_RATE_LIMIT', 10))
+LOG_BURST = int(os.getenv('LOG_BURST', 20))
+LOG_SAMPLE_EVERY = int(os.getenv('LOG_SAMPLE_EVERY', 1))
 
 def main():
+    setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_RATE_LIMIT, LOG_BURST, LOG_SAMPLE_EVERY)
     config = Config(
         MQTT_BROKER_URL=MQTT_BROKER_URL,
         BACKEND_URL=BACKEND_URL,
-        WEATHER_API_KEY=WEATHER_API_KEY
+        WEATHER_API_KEY=WEATHER_API_KEY,
+        HYSTERESIS_BAND=HYSTERESIS_BAND,
+        HEARTBEAT_INTERVAL=HEARTBEAT_INTERVAL,
+        BATCH_ENGINE_ENABLED=BATCH_ENGINE_ENABLED,
+        COALESCE_ENABLED=COALESCE_ENABLED,
+        COALESCE_WINDOW=COALESCE_WINDOW,
+        WEATHER_TTL=WEATHER_TTL,
+        WEATHER_REFRESH_MARGIN=WEATHER_REFRESH_MARGIN,
+        WEATHER_MAX_STALE=WEATHER_MAX_STALE,
+        WEATHER_TIMEOUT=WEATHER_TIMEOUT,
+        WEATHER_BREAKER_THRESHOLD=WEATHER_BREAKER_THRESHOLD,
+        WEATHER_BREAKER_RESET=WEATHER_BREAKER_RESET,
+        WEATHER_CACHE_PATH=WEATHER_CACHE_PATH,
+        WEATHER_GRID_SIZE=WEATHER_GRID_SIZE,
+        TOPOLOGY_RELOAD_INTERVAL=TOPOLOGY_RELOAD_INTERVAL,
+        SHARDING_ENABLED=SHARDING_ENABLED,
+        INSTANCE_ID=INSTANCE_ID,
+        REBALANCE_DELAY=REBALANCE_DELAY,
+        HISTORY_ENABLED=HISTORY_ENABLED,
+        HISTORY_MEMORY_BUDGET_MB=HISTORY_MEMORY_BUDGET_MB,
+        HISTORY_RAW_SECONDS=HISTORY_RAW_SECONDS,
+        HISTORY_MINUTES=HISTORY_MINUTES,
+        HISTORY_HOURS=HISTORY_HOURS,
+        SOIL_MOISTURE_HALF_LIFE=SOIL_MOISTURE_HALF_LIFE,
+        METRICS_PORT=METRICS_PORT,
+        METRICS_PUSH_INTERVAL=METRICS_PUSH_INTERVAL,
+        PAYLOAD_CODEC=PAYLOAD_CODEC,
+        WORK_QUEUE_ENABLED=WORK_QUEUE_ENABLED,
+        ANALYSIS_WORKERS=ANALYSIS_WORKERS,
+        WORK_QUEUE_CAPACITY=WORK_QUEUE_CAPACITY,
+        OUTLOOK_HOURS=OUTLOOK_HOURS,
+        OUTLOOK_TREND_WINDOW=OUTLOOK_TREND_WINDOW
     )
     
     analyzer = Analyzer(config)
@@ -0,0 +1,103 @@
+"""
+Compare the scalar per-field decision path with the vectorized
+BatchDecisionEngine over several ticks, checking that both produce exactly the
+same decisions and water needs.
+
+Run from the analyzer directory:
+
+    python -m benchmarks.batch_engine --fields 10000 50000
+"""
+import argparse
+import logging
+import random
+from time import perf_counter
+
+from src.analyzer import Analyzer
+from src.batch_engine import BatchDecisionEngine
+from src.config import Config
+from src.decision import DecisionTracker
+from src.field import Field
+
+SOIL_CAPACITY = Config.SOIL_CAPACITY
+HYSTERESIS_BAND = 1.0
+
+
+def build_fields(count: int, zones: int):
+    fields = []
+    for index in range(count):
+        field = Field(f'field_{index}', random.uniform(20, 40), random.uniform(10, 1000), random.uniform(0.1, 1.0))
+        fields.append((f'zone_{index % zones}', field))
+    return fields
+
+
+def scalar_tick(analyzer: Analyzer, tracker: DecisionTracker, fields, moisture, rain_by_zone):
+    results = {}
+    for (zone_id, field), value in zip(fields, moisture):
+        key = (zone_id, field.field_id)
+        threshold = tracker.effective_threshold(key, field.soil_moisture_threshold)
+        target = tracker.target_moisture(field.soil_moisture_threshold)
+        result = analyzer._determine_irrigation_action(threshold, value, rain_by_zone[zone_id], field, target)
+        tracker.should_publish(key, result['action'])
+        results[key] = result
+    return results
+
+
+def batch_tick(engine: BatchDecisionEngine, fields, moisture, rain_by_zone):
+    keys = []
+    for (zone_id, field), value in zip(fields, moisture):
+        key = (zone_id, field.field_id)
+        engine.update_moisture(key, value)
+        keys.append(key)
+    return dict(engine.evaluate(keys, rain_by_zone))
+
+
+def run(field_count: int, zones: int, ticks: int) -> dict:
+    fields = build_fields(field_count, zones)
+
+    analyzer = Analyzer.__new__(Analyzer)
+    analyzer.soil_capacity = SOIL_CAPACITY
+    tracker = DecisionTracker(HYSTERESIS_BAND, heartbeat_interval=0)
+    engine = BatchDecisionEngine(SOIL_CAPACITY, HYSTERESIS_BAND)
+    for zone_id, field in fields:
+        engine.add_field(zone_id, field)
+
+    scalar_seconds = batch_seconds = 0.0
+    for _ in range(ticks):
+        moisture = [random.uniform(15, 45) for _ in fields]
+        rain_by_zone = {f'zone_{index}': random.random() < 0.2 for index in range(zones)}
+
+        start = perf_counter()
+        expected = scalar_tick(analyzer, tracker, fields, moisture, rain_by_zone)
+        scalar_seconds += perf_counter() - start
+
+        start = perf_counter()
+        actual = batch_tick(engine, fields, moisture, rain_by_zone)
+        batch_seconds += perf_counter() - start
+
+        if actual != expected:
+            mismatches = [key for key in expected if actual.get(key) != expected[key]]
+            raise AssertionError(f"{len(mismatches)} fields differ, e.g. {mismatches[:3]}")
+
+    return {
+        'fields': field_count,
+        'scalar_ms': scalar_seconds / ticks * 1000,
+        'batch_ms': batch_seconds / ticks * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fields', type=int, nargs='+', default=[10_000, 50_000])
+    parser.add_argument('--zones', type=int, default=20)
+    parser.add_argument('--ticks', type=int, default=5)
+    args = parser.parse_args()
+    logging.getLogger('src.analyzer').setLevel(logging.WARNING)
+
+    print(f"{'fields':>8} {'scalar (ms/tick)':>18} {'batch (ms/tick)':>17}")
+    for count in args.fields:
+        result = run(count, args.zones, args.ticks)
+        print(f"{result['fields']:>8} {result['scalar_ms']:>18.2f} {result['batch_ms']:>17.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare the size and the encode + decode cost of the payloads exchanged along
+the pipeline with each available codec: a traced sensor reading, the
+Analyzer's decision and the Executor's command.
+
+Run from the analyzer directory:
+
+    python -m benchmarks.codec --messages 200000
+"""
+import argparse
+from time import perf_counter
+
+from irrigation_common.codec import CODECS
+from irrigation_common.tracing import new_trace
+
+PAYLOADS = {
+    'reading': {'value': 37.42, **new_trace()},
+    'decision': {
+        'action': 'trigger_irrigation',
+        'reason': 'Soil moisture below threshold',
+        'water_need': 1234.5678,
+        **new_trace()
+    },
+    'command': {'command': 'start_irrigation', 'water_need': 1234.5678, **new_trace()}
+}
+
+
+def run(codec, payload: dict, messages: int) -> dict:
+    encoded = codec.encode(payload)
+    if codec.decode(encoded) != payload:
+        raise AssertionError(f"{codec.name} does not round-trip {payload}")
+
+    start = perf_counter()
+    for _ in range(messages):
+        codec.encode(payload)
+    encode_seconds = perf_counter() - start
+
+    start = perf_counter()
+    for _ in range(messages):
+        codec.decode(encoded)
+    decode_seconds = perf_counter() - start
+
+    return {
+        'bytes': len(encoded),
+        'encode_us': encode_seconds / messages * 1e6,
+        'decode_us': decode_seconds / messages * 1e6
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"{'payload':>9} {'codec':>8} {'bytes':>6} {'encode (us)':>12} {'decode (us)':>12}")
+    for name, payload in PAYLOADS.items():
+        for codec in CODECS.values():
+            result = run(codec, payload, args.messages)
+            print(
+                f"{name:>9} {codec.name:>8} {result['bytes']:>6} "
+                f"{result['encode_us']:>12.3f} {result['decode_us']:>12.3f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
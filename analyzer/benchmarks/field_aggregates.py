@@ -0,0 +1,82 @@
+"""
+Cost of one sensor update followed by an average lookup, as the Analyzer does
+for every message, with the incremental aggregates and with a full rescan.
+
+Run from the analyzer directory:
+
+    python -m benchmarks.field_aggregates
+"""
+import argparse
+import random
+import timeit
+
+from src.field import Field
+from src.sensor import SensorFactory, SensorType
+
+SOIL_MOISTURE = SensorType.SOIL_MOISTURE.value
+
+
+def build_field(sensor_count: int) -> Field:
+    field = Field('bench', 30, 100, 0.3)
+    for index in range(sensor_count):
+        sensor = SensorFactory.create_sensor(
+            sensor_id=f'sensor_{index}',
+            type=SOIL_MOISTURE,
+            zone=None,
+            field=field,
+            min_value=0,
+            max_value=100,
+            value=random.uniform(0, 100)
+        )
+        field.add_sensor(sensor)
+    return field
+
+
+def rescan_average(field: Field, sensor_type: str):
+    sensors = field.sensors[sensor_type]
+    values = [sensor.value for sensor in sensors.values() if sensor.value is not None]
+    return sum(values) / len(values) if values else None
+
+
+def run(sensor_count: int, repeat: int) -> dict:
+    field = build_field(sensor_count)
+    sensors = list(field.sensors[SOIL_MOISTURE].values())
+    values = [random.uniform(0, 100) for _ in range(1024)]
+    state = {'index': 0}
+
+    def update():
+        index = state['index'] = state['index'] + 1
+        sensors[index % len(sensors)].set_value(values[index % len(values)])
+
+    def incremental():
+        update()
+        field.get_average_sensor_value(SOIL_MOISTURE)
+
+    def rescan():
+        update()
+        rescan_average(field, SOIL_MOISTURE)
+
+    number = max(1, min(10_000, 1_000_000 // sensor_count))
+    incremental_seconds = min(timeit.repeat(incremental, number=number, repeat=repeat)) / number
+    rescan_seconds = min(timeit.repeat(rescan, number=number, repeat=repeat)) / number
+    return {
+        'sensors': sensor_count,
+        'incremental_us': incremental_seconds * 1e6,
+        'rescan_us': rescan_seconds * 1e6
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'sensors':>10} {'incremental (us)':>18} {'rescan (us)':>14}")
+    for size in args.sizes:
+        result = run(size, args.repeat)
+        print(f"{result['sensors']:>10} {result['incremental_us']:>18.2f} {result['rescan_us']:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
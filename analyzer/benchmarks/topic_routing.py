@@ -0,0 +1,114 @@
+"""
+Compare the per-message cost of resolving a sensor topic by splitting it and
+walking zone -> field -> sensor, as the Analyzer used to, with a single lookup
+in the precomputed RoutingTable. Both paths also produce the output topic.
+
+Run from the analyzer directory:
+
+    python -m benchmarks.topic_routing --zones 10 --fields 100 --sensors 20
+"""
+import argparse
+import logging
+import random
+from time import perf_counter
+
+from src.config import Config
+from src.field import Field
+from src.routing import RoutingTable
+from src.sensor import SensorFactory, SensorType
+from src.zone import Zone
+
+OUTPUT_TOPIC_PREFIX = Config.ANALYZER_OUTPUT_TOPIC_PREFIX
+SENSOR_TYPES = [sensor_type.value for sensor_type in SensorType]
+
+
+def build_zones(zone_count: int, field_count: int, sensor_count: int):
+    zones = {}
+    for zone_index in range(zone_count):
+        zone = Zone(f'zone_{zone_index}', 0.0, 0.0)
+        for field_index in range(field_count):
+            field = Field(f'field_{field_index}', 30, 100, 0.3)
+            for sensor_index in range(sensor_count):
+                field.add_sensor(SensorFactory.create_sensor(
+                    sensor_id=f'sensor_{sensor_index}',
+                    type=SENSOR_TYPES[sensor_index % len(SENSOR_TYPES)],
+                    zone=zone,
+                    field=field,
+                    min_value=0,
+                    max_value=100
+                ))
+            zone.add_field(field)
+        zones[zone.zone_id] = zone
+    return zones
+
+
+def walk(zones, topic: str):
+    parts = topic.split("/")
+    zone_id = parts[1]
+    field_id = parts[3]
+    sensor_id = parts[5]
+    field = zones[zone_id].get_field(field_id)
+    sensor = field.get_sensor(sensor_id)
+    return sensor, f"{OUTPUT_TOPIC_PREFIX}/zone/{zone_id}/field/{field_id}"
+
+
+def route(routes: RoutingTable, topic: str):
+    entry = routes.get(topic)
+    return entry.sensor, entry.output_topic
+
+
+def run(zone_count: int, field_count: int, sensor_count: int, messages: int) -> dict:
+    zones = build_zones(zone_count, field_count, sensor_count)
+    routes = RoutingTable(OUTPUT_TOPIC_PREFIX)
+    start = perf_counter()
+    for zone in zones.values():
+        routes.index_zone(zone)
+    index_seconds = perf_counter() - start
+
+    topics = [
+        routes.sensor_topic(zone.zone_id, field.field_id, sensor)
+        for zone in zones.values()
+        for field in zone.fields.values()
+        for sensor in field.get_all_sensors()
+    ]
+    sample = [random.choice(topics) for _ in range(messages)]
+
+    start = perf_counter()
+    expected = [walk(zones, topic) for topic in sample]
+    walk_seconds = perf_counter() - start
+
+    start = perf_counter()
+    actual = [route(routes, topic) for topic in sample]
+    route_seconds = perf_counter() - start
+
+    if actual != expected:
+        raise AssertionError("Routing table and topology walk disagree")
+
+    return {
+        'routes': routes.route_count,
+        'index_ms': index_seconds * 1000,
+        'walk_us': walk_seconds / messages * 1e6,
+        'route_us': route_seconds / messages * 1e6
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--zones', type=int, default=10)
+    parser.add_argument('--fields', type=int, default=100)
+    parser.add_argument('--sensors', type=int, nargs='+', default=[4, 20, 100])
+    parser.add_argument('--messages', type=int, default=200_000)
+    args = parser.parse_args()
+    logging.getLogger('src.zone').setLevel(logging.WARNING)
+
+    print(f"{'routes':>8} {'index (ms)':>11} {'walk (us/msg)':>14} {'route (us/msg)':>15}")
+    for sensor_count in args.sensors:
+        result = run(args.zones, args.fields, sensor_count, args.messages)
+        print(
+            f"{result['routes']:>8} {result['index_ms']:>11.1f} "
+            f"{result['walk_us']:>14.3f} {result['route_us']:>15.3f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
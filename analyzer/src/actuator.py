@@ -5,7 +5,7 @@ import threading
 from abc import ABC, abstractmethod
 from enum import Enum
 from time import sleep
-from typing import Tuple
+from typing import Optional, Tuple
 
 import paho.mqtt.client as mqtt
 
@@ -185,6 +185,39 @@ class DripIrrigation(Actuator):
         except Exception as e:
             logger.error(f"Error processing message: {e}")
 
+class ActuatorRecord:
+    """
+    Plain description of an actuator, used when only the topology is needed.
+
+    Unlike `Actuator` it opens no MQTT connection and starts no threads.
+    Keys of the actuator document it does not know are ignored.
+    """
+
+    __slots__ = ('actuator_id', 'type', 'zone_id', 'field_id', 'consumption', 'measurement', 'max_value', 'min_value')
+
+    def __init__(
+        self, actuator_id: str, type: str, zone_id: str, field_id: str, consumption: Optional[float] = None,
+        measurement: Optional[str] = None, max_value=None, min_value=None, **kwargs
+    ):
+        self.actuator_id = actuator_id
+        self.type = type
+        self.zone_id = zone_id
+        self.field_id = field_id
+        self.consumption = consumption
+        self.measurement = measurement
+        self.max_value = max_value
+        self.min_value = min_value
+
+    def to_dict(self):
+        return {
+            'actuator_id': self.actuator_id,
+            'type': self.type,
+            'consumption': self.consumption,
+            'measurement': self.measurement,
+            'max_value': self.max_value,
+            'min_value': self.min_value
+        }
+
 class ActuatorFactory:
 
     ACTUATOR_MAP = {
@@ -1,14 +1,28 @@
-import json
 import logging
-from time import sleep
-from typing import Dict, Optional, Tuple
+from time import sleep, time
+from typing import Dict, List, Optional, Set, Tuple
 
 import paho.mqtt.client as mqtt
 
+from irrigation_common.codec import codec_for_topic, get_codec, topic_variants
+from irrigation_common.metrics import MetricsPusher, MetricsRegistry, MetricsServer, topic_family
+from irrigation_common.topology import TopologyReloader
+from irrigation_common.tracing import TraceRecorder, extract_trace, forward_trace
+
+from .batch_engine import BatchDecisionEngine
+from .coalescer import FieldCoalescer
 from .config import Config
+from .decision import (STOP_IRRIGATION, STOP_REASON, TRIGGER_IRRIGATION,
+                       TRIGGER_REASON, DecisionTracker)
 from .field import Field
+from .forecast_cache import ForecastCache
+from .history import HistoryStore
+from .locks import ReadWriteLock, StripedLock
+from .routing import Route, RoutingTable
 from .sensor import SensorFactory, SensorType
-from .weather import WeatherFetcher
+from .sharding import ShardMembership, rendezvous_owner
+from .weather import CircuitBreaker, WeatherFetcher, WeatherRefresher
+from .work_queue import FieldWorkQueue
 from .zone import Zone, ZoneService
 
 logging.basicConfig(
@@ -17,16 +31,118 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Time covered by one entry of the provider's forecast
+FORECAST_STEP = 3 * 3600
+
 class Analyzer:
     def __init__(self, config: Config):
         self.config = config
-        self.zone_service = ZoneService(config.BACKEND_URL)
+        self.zone_service = ZoneService(config.BACKEND_URL, model_only=True)
         self.zones: Dict[str, Zone] = {}
-        self.weather_fetcher = WeatherFetcher(config.WEATHER_API_KEY)
+        self.codec = get_codec(config.PAYLOAD_CODEC)
+        self.routes = RoutingTable(config.ANALYZER_OUTPUT_TOPIC_PREFIX, self.codec.suffix)
+        self.weather_fetcher = WeatherFetcher(
+            config.WEATHER_API_KEY,
+            timeout=config.WEATHER_TIMEOUT,
+            breaker=CircuitBreaker(config.WEATHER_BREAKER_THRESHOLD, config.WEATHER_BREAKER_RESET),
+            cache=ForecastCache(config.WEATHER_CACHE_PATH, config.WEATHER_GRID_SIZE),
+            ttl=config.WEATHER_TTL
+        )
+        self.weather_refresher = WeatherRefresher(
+            self.weather_fetcher,
+            ttl=config.WEATHER_TTL,
+            refresh_margin=config.WEATHER_REFRESH_MARGIN,
+            max_stale=config.WEATHER_MAX_STALE
+        )
         self.soil_capacity = config.SOIL_CAPACITY
-        self._load_zones()
+        self.decisions = DecisionTracker(config.HYSTERESIS_BAND, config.HEARTBEAT_INTERVAL)
+        self.history: Optional[HistoryStore] = None
+        if config.HISTORY_ENABLED:
+            self.history = HistoryStore(
+                int(config.HISTORY_MEMORY_BUDGET_MB * 2**20),
+                ((1, config.HISTORY_RAW_SECONDS), (60, config.HISTORY_MINUTES), (3600, config.HISTORY_HOURS))
+            )
+        self.batch_engine: Optional[BatchDecisionEngine] = None
+        if config.BATCH_ENGINE_ENABLED:
+            self.batch_engine = BatchDecisionEngine(self.soil_capacity, config.HYSTERESIS_BAND)
+        self.coalescer: Optional[FieldCoalescer] = None
+        if config.COALESCE_ENABLED:
+            self.coalescer = FieldCoalescer(config.COALESCE_WINDOW, self._evaluate_fields)
+        self.work_queue: Optional[FieldWorkQueue] = None
+        if config.WORK_QUEUE_ENABLED:
+            self.work_queue = FieldWorkQueue(self._handle_message, config.ANALYSIS_WORKERS, config.WORK_QUEUE_CAPACITY)
+        self._setup_metrics()
+        # Shared by message handling, taken exclusively by reloads and rebalances
+        self._topology_lock = ReadWriteLock()
+        self._field_locks = StripedLock()
+        self._zone_payloads: Dict[str, dict] = {}
+        self.topology_reloader: Optional[TopologyReloader] = None
+        if config.TOPOLOGY_RELOAD_INTERVAL > 0:
+            self.topology_reloader = TopologyReloader(
+                self.zone_service,
+                self._apply_topology,
+                config.TOPOLOGY_RELOAD_INTERVAL
+            )
+        self.membership: Optional[ShardMembership] = None
+        if config.SHARDING_ENABLED:
+            # Zones are loaded on rebalance, once the live members are known
+            self.membership = ShardMembership(
+                config.INSTANCE_ID,
+                config.MEMBERSHIP_TOPIC_PREFIX,
+                self._rebalance_zones,
+                config.REBALANCE_DELAY
+            )
+        else:
+            self._load_zones()
+
+    def _setup_metrics(self) -> None:
+        self.metrics = MetricsRegistry('analyzer', self.config.INSTANCE_ID)
+        self.messages_received = self.metrics.counter('mqtt_messages_received', 'MQTT messages received', ['family'])
+        self.messages_published = self.metrics.counter('mqtt_messages_published', 'MQTT messages published', ['family'])
+        self.message_latency = self.metrics.histogram('message_processing_seconds', 'Time spent handling one MQTT message')
+        self.mqtt_reconnects = self.metrics.counter('mqtt_reconnects', 'Reconnections to the MQTT broker')
+        self.decisions_made = self.metrics.counter('decisions', 'Irrigation decisions evaluated', ['action'])
+        cache = self.weather_fetcher.cache
+        self.metrics.gauge('weather_cache_hits', 'Forecasts served from the cache to message handling', function=lambda: cache.stats()['hits'])
+        self.metrics.gauge('weather_cache_misses', 'Forecasts requested by message handling but not cached', function=lambda: cache.stats()['misses'])
+        self.metrics.gauge('weather_cache_hit_ratio', 'Share of forecasts requested by message handling served from the cache', function=lambda: cache.stats()['hit_ratio'])
+        self.metrics.gauge('weather_refresh_retries', 'Forecast fetches repeated after a failed refresh', function=lambda: cache.stats()['retries'])
+        self.metrics.gauge(
+            'coalescer_pending_fields', 'Fields waiting for a coalesced evaluation',
+            function=lambda: self.coalescer.pending() if self.coalescer else 0
+        )
+        self.metrics.gauge(
+            'work_queue_depth', 'Messages waiting for an analysis worker',
+            function=lambda: self.work_queue.depth if self.work_queue else 0
+        )
+        self.work_queue_items = self.metrics.counter(
+            'work_queue_items', 'Messages handed to the analysis workers, by outcome', ['outcome']
+        )
+        self.trace_recorder = TraceRecorder(self.metrics, 'analyzer')
+        self._traces: Dict[Tuple[str, str], dict] = {}
+        self.metrics.gauge('zones', 'Zones handled by this instance', function=lambda: len(self.zones))
+        self.metrics_server: Optional[MetricsServer] = None
+        if self.config.METRICS_PORT > 0:
+            self.metrics_server = MetricsServer(self.metrics, self.config.METRICS_PORT)
+        self.metrics_pusher: Optional[MetricsPusher] = None
+        if self.config.METRICS_PUSH_INTERVAL > 0:
+            self.metrics_pusher = MetricsPusher(
+                self.metrics,
+                f"{self.config.METRICS_TOPIC_PREFIX}/analyzer",
+                self.config.METRICS_PUSH_INTERVAL
+            )
+        self._connected_once = False
 
     def run(self) -> None:
+        if self.metrics_server:
+            self.metrics_server.start()
+        self.weather_refresher.start()
+        if self.work_queue:
+            self.work_queue.start()
+        if self.coalescer:
+            self.coalescer.start()
+        if self.topology_reloader:
+            self.topology_reloader.start()
         self._setup_mqtt_client()
 
     def _setup_mqtt_client(self) -> None:
@@ -34,8 +150,12 @@ class Analyzer:
             self.mqtt_client = mqtt.Client()
             self.mqtt_client.on_connect = self._on_connect
             self.mqtt_client.on_message = self._on_message
+            if self.membership:
+                self.membership.set_will(self.mqtt_client)
             host, port = self._parse_mqtt_url(self.config.MQTT_BROKER_URL)
             self.mqtt_client.connect(host, port, self.config.MQTT_KEEPALIVE)
+            if self.metrics_pusher:
+                self.metrics_pusher.start(self.mqtt_client)
             self.mqtt_client.loop_forever()
         except Exception as e:
             logger.error(f"Failed to setup MQTT client: {e}")
@@ -49,18 +169,181 @@ class Analyzer:
 
     def _on_connect(self, client, userdata, flags, rc: int) -> None:
         logger.info(f"Connected to MQTT broker with result code {rc}")
-        client.subscribe("zone/+/field/+/sensor/+/+")
+        if self._connected_once:
+            self.mqtt_reconnects.inc()
+        self._connected_once = True
+        if self.membership:
+            for zone_id in list(self.zones):
+                self._subscribe_sensors(client, zone_id)
+            self.membership.announce(client)
+        else:
+            self._subscribe_sensors(client)
+
+    def _sensor_topics(self, zone_id: str = '+') -> List[str]:
+        topics = []
+        for topic in (
+            f"zone/{zone_id}/field/+/sensor/+/+",
+            f"zone/{zone_id}/field/+/sensors",
+            f"zone/{zone_id}/sensors"
+        ):
+            topics.extend(topic_variants(topic))
+        return topics
+
+    def _subscribe_sensors(self, client, zone_id: str = '+') -> None:
+        client.subscribe([(topic, 0) for topic in self._sensor_topics(zone_id)])
+
+    def _unsubscribe_sensors(self, client, zone_id: str) -> None:
+        client.unsubscribe(self._sensor_topics(zone_id))
 
     def _load_zones(self) -> None:
         try:
-            zones = self.zone_service.get_zones()
-            for zone in zones:
+            payload, etag = self.zone_service.fetch_zones()
+            for zone_data in payload or []:
+                zone = self.zone_service.parse_zone(zone_data)
                 self._process_zone(zone)
+                self._zone_payloads[zone.zone_id] = zone_data
+            if self.topology_reloader:
+                self.topology_reloader.etag = etag
         except Exception as e:
             logger.error(f"Failed to load zones: {e}")
 
     def _process_zone(self, zone: Zone) -> None:
         self.zones[zone.zone_id] = zone
+        self.weather_refresher.track(zone.latitude, zone.longitude)
+        for field in zone.fields.values():
+            self._register_field(zone.zone_id, field)
+        self.routes.index_zone(zone)
+
+    def _register_field(self, zone_id: str, field: Field) -> None:
+        if self.batch_engine:
+            self.batch_engine.add_field(zone_id, field, self._soil_moisture(zone_id, field))
+        if self.coalescer:
+            soil_sensors = field.sensors.get(SensorType.SOIL_MOISTURE.value, {})
+            self.coalescer.set_expected_sensors(zone_id, field.field_id, set(soil_sensors))
+
+    def _forget_field(self, zone_id: str, field_id: str) -> None:
+        self.decisions.forget((zone_id, field_id))
+        self._traces.pop((zone_id, field_id), None)
+        if self.history:
+            self.history.release_field(zone_id, field_id)
+        if self.batch_engine:
+            self.batch_engine.remove_field((zone_id, field_id))
+        if self.coalescer:
+            self.coalescer.forget_field(zone_id, field_id)
+
+    def _remove_zone(self, zone_id: str) -> None:
+        zone = self.zones.pop(zone_id, None)
+        self._zone_payloads.pop(zone_id, None)
+        self.routes.remove_zone(zone_id)
+        if not zone:
+            return
+        for field_id in zone.fields:
+            self._forget_field(zone_id, field_id)
+        self.weather_refresher.retain((zone.latitude, zone.longitude) for zone in list(self.zones.values()))
+
+    def _apply_topology(self, payload: List[dict]) -> None:
+        """
+        Apply a new topology payload as a diff against the loaded zones.
+
+        Zones whose payload is unchanged are skipped, and changed zones are
+        updated in place so existing sensors keep their latest readings.
+        """
+        with self._topology_lock.write():
+            zone_payloads = {zone_data['zone_id']: zone_data for zone_data in payload}
+            if self.membership:
+                members = self.membership.members_snapshot()
+                zone_payloads = {
+                    zone_id: zone_data for zone_id, zone_data in zone_payloads.items()
+                    if rendezvous_owner(zone_id, members) == self.config.INSTANCE_ID
+                }
+            removed = set(self.zones) - set(zone_payloads)
+            for zone_id in removed:
+                if self.membership:
+                    self._unsubscribe_sensors(self.mqtt_client, zone_id)
+                self._remove_zone(zone_id)
+            changed = 0
+            for zone_id, zone_data in zone_payloads.items():
+                zone = self.zones.get(zone_id)
+                if zone is not None and self._zone_payloads.get(zone_id) == zone_data:
+                    continue
+                changed += 1
+                if zone is None:
+                    self._process_zone(self.zone_service.parse_zone(zone_data))
+                    if self.membership:
+                        self._subscribe_sensors(self.mqtt_client, zone_id)
+                else:
+                    self._update_zone(zone, zone_data)
+                self._zone_payloads[zone_id] = zone_data
+            if changed or removed:
+                logger.info(f"Reloaded topology: {changed} zones added or updated, {len(removed)} removed")
+
+    def _update_zone(self, zone: Zone, zone_data: dict) -> None:
+        zone.latitude = zone_data['latitude']
+        zone.longitude = zone_data['longitude']
+        fields_data = {field_data['field_id']: field_data for field_data in zone_data.get('fields', [])}
+        for field_id in set(zone.fields) - set(fields_data):
+            del zone.fields[field_id]
+            self._forget_field(zone.zone_id, field_id)
+        for field_id, field_data in fields_data.items():
+            field = zone.get_field(field_id)
+            if field is None:
+                field = self.zone_service.parse_field(zone, field_data)
+                if field is None:
+                    continue
+                zone.add_field(field)
+            else:
+                try:
+                    self._update_field(zone, field, field_data)
+                except Exception as e:
+                    logger.error(f"Error updating field {field_id} in zone {zone.zone_id}: {e}")
+                    continue
+            self._register_field(zone.zone_id, field)
+        self.routes.index_zone(zone)
+        self.weather_refresher.track(zone.latitude, zone.longitude)
+        self.weather_refresher.retain((zone.latitude, zone.longitude) for zone in list(self.zones.values()))
+
+    def _update_field(self, zone: Zone, field: Field, field_data: dict) -> None:
+        field.soil_moisture_threshold = float(field_data['soil_moisture_threshold'])
+        field.area = float(field_data['area'])
+        field.soil_depth = float(field_data['soil_depth'])
+        sensors_data = {sensor_data['sensor_id']: sensor_data for sensor_data in field_data.get('sensors', [])}
+        for sensor in field.get_all_sensors():
+            sensor_data = sensors_data.get(sensor.sensor_id)
+            if sensor_data is None or sensor_data.get('type') != sensor.type:
+                field.remove_sensor(sensor.sensor_id)
+                if self.history:
+                    self.history.release((zone.zone_id, field.field_id, sensor.sensor_id))
+                continue
+            sensor.min_value = sensor_data.get('min_value', sensor.min_value)
+            sensor.max_value = sensor_data.get('max_value', sensor.max_value)
+        for sensor_id, sensor_data in sensors_data.items():
+            if field.get_sensor(sensor_id) is None:
+                sensor = self.zone_service.parse_sensor(zone, field, sensor_data)
+                if sensor:
+                    field.add_sensor(sensor)
+
+    def _rebalance_zones(self, members: Set[str]) -> None:
+        with self._topology_lock.write():
+            self._rebalance_owned_zones(members)
+
+    def _rebalance_owned_zones(self, members: Set[str]) -> None:
+        zone_ids = self.zone_service.get_zone_ids()
+        if zone_ids is None:
+            logger.error("Skipping rebalance, zone ids are unavailable")
+            return
+        owned = {
+            zone_id for zone_id in zone_ids
+            if rendezvous_owner(zone_id, members) == self.config.INSTANCE_ID
+        }
+        for zone_id in set(self.zones) - owned:
+            self._unsubscribe_sensors(self.mqtt_client, zone_id)
+            self._remove_zone(zone_id)
+        for zone_id in owned - set(self.zones):
+            zone = self.zone_service.get_zone(zone_id)
+            if zone:
+                self._process_zone(zone)
+                self._subscribe_sensors(self.mqtt_client, zone_id)
+        logger.info(f"Rebalanced across {len(members)} analyzers, owning zones: {sorted(self.zones)}")
 
     def _create_field(self, field_data: dict) -> Field:
         field = Field(
@@ -79,53 +362,258 @@ class Analyzer:
         field.add_sensor(sensor)
 
     def _on_message(self, client, userdata, msg) -> None:
-        try:
-            topic = msg.topic
-            payload = json.loads(msg.payload.decode())
-            self._process_message(topic, payload)
-        except json.JSONDecodeError:
-            logger.error(f"Invalid JSON payload received: {msg.payload}")
-        except Exception as e:
-            logger.error(f"Error processing message: {e}")
+        self.messages_received.labels(topic_family(msg.topic)).inc()
+        if self.work_queue:
+            # Only hand the message over, the network thread must stay free for keepalives
+            zone_id = msg.topic.split('/', 2)[1]
+            outcome = self.work_queue.put(zone_id, msg.topic, (msg.topic, msg.payload))
+            self.work_queue_items.labels(outcome).inc()
+            return
+        self._handle_message((msg.topic, msg.payload))
+
+    def _handle_message(self, message: Tuple[str, bytes]) -> None:
+        raw_topic, raw_payload = message
+        with self.message_latency.time():
+            try:
+                topic, codec = codec_for_topic(raw_topic)
+                payload = codec.decode(raw_payload)
+                self._process_message(topic, payload)
+            except ValueError as e:
+                logger.error(f"Invalid payload received on {raw_topic}: {e}")
+            except Exception as e:
+                logger.error(f"Error processing message: {e}")
 
     def _process_message(self, topic: str, payload: dict) -> None:
-        parts = topic.split("/")
+        # Shared against topology reloads and rebalances, which replace the
+        # fields, routes and batch engine slots read here. Results are
+        # published once it is released.
+        with self._topology_lock.read():
+            if topic.endswith('/sensors'):
+                field_keys = self._process_batch(topic, payload)
+            else:
+                field_keys = self._process_reading(topic, payload)
+            if not field_keys or self.coalescer:
+                return
+            results = self._analyze_fields(field_keys)
+        self._publish_analysis_results(results)
+
+    def _process_reading(self, topic: str, payload: dict) -> List[Tuple[str, str]]:
+        route = self.routes.get(topic)
+        if route is None:
+            logger.error("No sensor registered for topic %s", topic)
+            return []
+        sensor = route.sensor
+        trace = extract_trace(payload)
+        if trace:
+            self.trace_recorder.record(trace)
+            self._traces[route.key] = trace
+        logger.info("Received data for zone %s, field %s, sensor %s: %s", route.zone_id, route.field_id, sensor.sensor_id, payload)
+        self._apply_readings([(route, payload['value'])])
+        if self.coalescer:
+            self.coalescer.mark(route.zone_id, route.field_id, sensor.sensor_id)
+        return [route.key]
+
+    def _process_batch(self, topic: str, payload: dict) -> List[Tuple[str, str]]:
+        """
+        Apply a batch of readings published on `zone/<z>/field/<f>/sensors`,
+        or on `zone/<z>/sensors` with a `field_id` in every reading, and
+        return each field it touches once.
+        """
+        parts = topic.split('/')
         zone_id = parts[1]
-        field_id = parts[3]
-        sensor_id = parts[5]
-        field = self.zones[zone_id].get_field(field_id)
-        if not field:
-            logger.error(f"Field {field_id} not found in zone {zone_id}")
-            return
-        sensor = field.get_sensor(sensor_id)
-        if not sensor:
-            logger.error(f"Sensor {sensor_id} not found in field {field_id}")
-            return
-        logger.info(f"Received data for zone {zone_id}, field {field_id}, sensor {sensor_id}: {payload}")
-        sensor.set_value(payload['value'])
+        field_id = parts[3] if len(parts) == 5 else None
+        readings = payload.get('readings') or []
+        touched = {}
+        for reading in readings:
+            route = self.routes.sensor_route(zone_id, reading.get('field_id', field_id), reading.get('sensor_id'))
+            if route is None or reading.get('type', route.sensor.type) != route.sensor.type:
+                logger.error("No sensor registered for reading %s on topic %s", reading, topic)
+                continue
+            touched.setdefault(route.key, []).append((route, reading['value']))
+        logger.info("Received %s readings for %s fields on topic %s", len(readings), len(touched), topic)
+
+        trace = extract_trace(payload)
+        if trace:
+            self.trace_recorder.record(trace)
+            for key in touched:
+                self._traces[key] = trace
+        for field_readings in touched.values():
+            self._apply_readings(field_readings)
+        if self.coalescer:
+            for field_readings in touched.values():
+                for route, _ in field_readings:
+                    self.coalescer.mark(route.zone_id, route.field_id, route.sensor.sensor_id)
+        return list(touched)
+
+    def _apply_readings(self, field_readings: List[Tuple[Route, float]]) -> None:
+        """
+        Apply readings of a single field, under that field's lock, and refresh
+        its moisture in the batch engine when a soil moisture sensor reported.
+        """
+        route = field_readings[0][0]
+        with self._field_locks.for_key(route.key):
+            for reading_route, value in field_readings:
+                sensor = reading_route.sensor
+                sensor.set_value(value)
+                if self.history:
+                    self.history.record((reading_route.zone_id, reading_route.field_id, sensor.sensor_id), sensor.value)
+            if self.batch_engine and any(
+                reading_route.sensor.type == SensorType.SOIL_MOISTURE.value for reading_route, _ in field_readings
+            ):
+                self.batch_engine.update_moisture(route.key, self._soil_moisture(route.zone_id, route.field))
+
+    def _evaluate_fields(self, field_keys: List[Tuple[str, str]]) -> None:
+        # Also called from the coalescer thread
+        with self._topology_lock.read():
+            results = self._analyze_fields(field_keys)
+        self._publish_analysis_results(results)
+
+    def _analyze_fields(self, field_keys: List[Tuple[str, str]]) -> List[Tuple[str, dict]]:
+        """
+        Decide on `field_keys` and return the `(topic, message)` pairs to
+        publish, which are built while the topology cannot change.
+        """
+        if self.batch_engine:
+            decisions = self._evaluate_fields_batch(field_keys)
+        else:
+            decisions = []
+            for zone_id, field_id in field_keys:
+                analysis_result = self._evaluate_field(zone_id, field_id)
+                if analysis_result:
+                    decisions.append(((zone_id, field_id), analysis_result))
+        results = []
+        for (zone_id, field_id), analysis_result in decisions:
+            result = self._analysis_message(zone_id, field_id, analysis_result)
+            if result:
+                results.append(result)
+        return results
+
+    def _evaluate_fields_batch(self, field_keys: List[Tuple[str, str]]) -> List[Tuple[Tuple[str, str], dict]]:
+        rain_by_zone = {}
+        for zone_id in {zone_id for zone_id, _ in field_keys}:
+            zone = self.zones.get(zone_id)
+            if zone:
+                rain_by_zone[zone_id] = self._is_rain_predicted(zone.latitude, zone.longitude)
+        decisions = []
+        for (zone_id, field_id), analysis_result in self.batch_engine.evaluate(field_keys, rain_by_zone):
+            self.decisions_made.labels(analysis_result['action']).inc()
+            if self.decisions.should_publish((zone_id, field_id), analysis_result['action']):
+                decisions.append(((zone_id, field_id), analysis_result))
+        return decisions
+
+    def _evaluate_field(self, zone_id: str, field_id: str) -> Optional[dict]:
+        """
+        Decide on a single field and return the result if it is to be published.
+        """
         analysis_result = self.analyze_data(zone_id, field_id)
         if analysis_result:
-            self._publish_analysis_result(zone_id, field_id, analysis_result)
+            self.decisions_made.labels(analysis_result['action']).inc()
+        if analysis_result and self.decisions.should_publish((zone_id, field_id), analysis_result['action']):
+            return analysis_result
+        return None
 
     def analyze_data(self, zone_id: str, field_id: str) -> Optional[dict]:
         try:
             zone = self.zones[zone_id]
             field = zone.get_field(field_id)
-            soil_moisture_threshold_avg = field.get_average_sensor_value(SensorType.SOIL_MOISTURE.value)
+            soil_moisture_threshold_avg = self._soil_moisture(zone_id, field)
             
             if soil_moisture_threshold_avg is None:
                 return None
 
             rain_prediction = self._is_rain_predicted(zone.latitude, zone.longitude)
-            soil_moisture_threshold = field.soil_moisture_threshold
+            soil_moisture_threshold = self.decisions.effective_threshold(
+                (zone_id, field_id),
+                field.soil_moisture_threshold
+            )
+            target_moisture = self.decisions.target_moisture(field.soil_moisture_threshold)
 
-            return self._determine_irrigation_action(soil_moisture_threshold, soil_moisture_threshold_avg, rain_prediction, field)
+            return self._determine_irrigation_action(
+                soil_moisture_threshold,
+                soil_moisture_threshold_avg,
+                rain_prediction,
+                field,
+                target_moisture
+            )
         except Exception as e:
             logger.error(f"Error analyzing data for zone {zone_id}, field {field_id}: {e}")
             return None
     
+    def _soil_moisture(self, zone_id: str, field: Field) -> Optional[float]:
+        """
+        Soil moisture of `field` used for decisions: the mean of the per-sensor
+        EWMAs when smoothing is configured, the latest readings otherwise.
+        Sensors without history yet count with their latest reading.
+        """
+        half_life = self.config.SOIL_MOISTURE_HALF_LIFE
+        if not self.history or half_life <= 0:
+            return field.get_average_sensor_value(SensorType.SOIL_MOISTURE.value)
+        values = []
+        for sensor in field.sensors.get(SensorType.SOIL_MOISTURE.value, {}).values():
+            value = self.history.ewma((zone_id, field.field_id, sensor.sensor_id), half_life)
+            if value is None:
+                value = sensor.value
+            if value is not None:
+                values.append(value)
+        return sum(values) / len(values) if values else None
+
+    def _moisture_trend(self, zone_id: str, field: Field) -> Optional[float]:
+        """
+        Mean least-squares trend of the soil moisture sensors of `field` over
+        the outlook trend window, in moisture points per hour.
+        """
+        if not self.history:
+            return None
+        slopes = []
+        for sensor in field.sensors.get(SensorType.SOIL_MOISTURE.value, {}).values():
+            slope = self.history.slope((zone_id, field.field_id, sensor.sensor_id), self.config.OUTLOOK_TREND_WINDOW)
+            if slope is not None:
+                slopes.append(slope)
+        return sum(slopes) / len(slopes) * 3600 if slopes else None
+
+    def _rain_windows(self, lat: float, lon: float, horizon: float) -> List[List[float]]:
+        """
+        Periods of the next `horizon` seconds for which the cached forecast
+        predicts rain, as merged `[start, end]` wall-clock intervals.
+        """
+        weather_data = self.weather_refresher.get_weather(lat, lon)
+        if not weather_data:
+            return []
+        now = time()
+        windows: List[List[float]] = []
+        for entry in weather_data.get('list', []):
+            start = entry.get('dt')
+            if start is None or start >= now + horizon:
+                continue
+            end = start + FORECAST_STEP
+            if end <= now or 'rain' not in entry['weather'][0]['description'].lower():
+                continue
+            if windows and windows[-1][1] >= start:
+                windows[-1][1] = max(windows[-1][1], end)
+            else:
+                windows.append([start, end])
+        return windows
+
+    def _outlook(self, zone_id: str, field_id: str) -> dict:
+        """
+        What the planner needs to schedule the field ahead of time: current
+        moisture and its trend, thresholds, liters per moisture point and the
+        rain expected over the next OUTLOOK_HOURS.
+        """
+        zone = self.zones[zone_id]
+        field = zone.get_field(field_id)
+        return {
+            'soil_moisture': self._soil_moisture(zone_id, field),
+            'moisture_trend': self._moisture_trend(zone_id, field),
+            'soil_moisture_threshold': field.soil_moisture_threshold,
+            'target_moisture': self.decisions.target_moisture(field.soil_moisture_threshold),
+            'liters_per_point': self.calculate_water_required(0, 1, self.soil_capacity, field.soil_depth, field.area),
+            'rain_windows': self._rain_windows(zone.latitude, zone.longitude, self.config.OUTLOOK_HOURS * 3600),
+            'observed_at': time()
+        }
+
     def _is_rain_predicted(self, lat: float, lon: float) -> bool:
-        weather_data = self.weather_fetcher.get_weather(lat, lon)
+        weather_data = self.weather_refresher.get_weather(lat, lon)
         if not weather_data:
             return False
         try:
@@ -140,44 +628,55 @@ class Analyzer:
         soil_moisture_threshold: float,
         soil_moisture_threshold_avg: float, 
         rain_prediction: bool,
-        field: Field
+        field: Field,
+        target_moisture: Optional[float] = None
     ) -> Optional[dict]:
-        logger.info(f"Analyzing irrigation action: Smt: {soil_moisture_threshold}, Sml: {soil_moisture_threshold_avg}, Rp: {rain_prediction}")
+        logger.info(
+            "Analyzing irrigation action: Smt: %s, Sml: %s, Rp: %s",
+            soil_moisture_threshold, soil_moisture_threshold_avg, rain_prediction
+        )
         try:
             if soil_moisture_threshold_avg <= soil_moisture_threshold and not rain_prediction:
                 water_need = self.calculate_water_required(
                     soil_moisture_threshold_avg,
-                    soil_moisture_threshold,
+                    soil_moisture_threshold if target_moisture is None else target_moisture,
                     self.soil_capacity,
                     field.soil_depth,
                     field.area
                 )
                 return {
                     "water_need": water_need,
-                    "action": "trigger_irrigation",
-                    "reason": "(Sml ≤ Smt) ⋀ ⌐Rp"
+                    "action": TRIGGER_IRRIGATION,
+                    "reason": TRIGGER_REASON
                 }
             elif soil_moisture_threshold_avg > soil_moisture_threshold or rain_prediction:
                 return {
-                    "action": "stop_irrigation",
-                    "reason": "(Sml > Smt) ⋁ Rp"
+                    "action": STOP_IRRIGATION,
+                    "reason": STOP_REASON
                 }
             return None
         except Exception as e:
             logger.info(f"Error determining irrigation action {e}")
 
-    def _publish_analysis_result(
-        self,
-        zone_id: str,
-        field_id: str,
-        analysis_result: dict
-    ) -> None:
-        topic = f"{self.config.ANALYZER_OUTPUT_TOPIC_PREFIX}/zone/{zone_id}/field/{field_id}"
+    def _analysis_message(self, zone_id: str, field_id: str, analysis_result: dict) -> Optional[Tuple[str, dict]]:
         try:
-            self.mqtt_client.publish(topic, json.dumps(analysis_result))
-            logger.info(f"Analysis result for {zone_id}/{field_id}: {analysis_result}")
+            result = dict(analysis_result)
+            if self.config.OUTLOOK_HOURS > 0:
+                result['outlook'] = self._outlook(zone_id, field_id)
+            trace = self._traces.pop((zone_id, field_id), None)
+            return self.routes.output_topic(zone_id, field_id), forward_trace(trace, result)
         except Exception as e:
-            logger.error(f"Failed to publish analysis result: {e}")
+            logger.error(f"Failed to prepare analysis result for zone {zone_id}, field {field_id}: {e}")
+            return None
+
+    def _publish_analysis_results(self, results: List[Tuple[str, dict]]) -> None:
+        for topic, message in results:
+            try:
+                self.mqtt_client.publish(topic, self.codec.encode(message))
+                self.messages_published.labels(self.config.ANALYZER_OUTPUT_TOPIC_PREFIX).inc()
+                logger.info("Analysis result on %s: %s", topic, message)
+            except Exception as e:
+                logger.error(f"Failed to publish analysis result: {e}")
 
     def calculate_water_required(self, current_moisture, threshold_moisture, soil_capacity, root_depth, area):
         """
@@ -0,0 +1,160 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .decision import STOP_IRRIGATION, STOP_REASON, TRIGGER_IRRIGATION, TRIGGER_REASON
+from .field import Field
+
+FieldKey = Tuple[str, str]
+
+NO_DECISION = 0
+TRIGGERED = 1
+STOPPED = 2
+
+class BatchDecisionEngine:
+    """
+    Evaluates the irrigation decision of many fields in one vectorized pass.
+
+    Every field owns a slot in a set of parallel NumPy arrays holding its
+    aggregated soil moisture, threshold, soil depth, area, zone and last
+    decision. `evaluate` applies the same hysteresis and water requirement
+    formula as `Analyzer._determine_irrigation_action`, with the operations in
+    the same order, so the results match the scalar path exactly.
+    """
+
+    def __init__(self, soil_capacity: float, hysteresis_band: float = 0.0, initial_capacity: int = 1024):
+        self.soil_capacity = soil_capacity
+        self.hysteresis_band = hysteresis_band
+        self._slots: Dict[FieldKey, int] = {}
+        self._keys: List[Optional[FieldKey]] = []
+        self._free_slots: List[int] = []
+        self._zone_indexes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._allocate(initial_capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        self.moisture = np.full(capacity, np.nan)
+        self.threshold = np.full(capacity, np.nan)
+        self.soil_depth = np.zeros(capacity)
+        self.area = np.zeros(capacity)
+        self.zone_index = np.zeros(capacity, dtype=np.int64)
+        self.last_decision = np.zeros(capacity, dtype=np.int8)
+
+    def _grow(self) -> None:
+        old_capacity = len(self.moisture)
+        arrays = (self.moisture, self.threshold, self.soil_depth, self.area, self.zone_index, self.last_decision)
+        self._allocate(old_capacity * 2)
+        for new, old in zip(
+            (self.moisture, self.threshold, self.soil_depth, self.area, self.zone_index, self.last_decision),
+            arrays
+        ):
+            new[:old_capacity] = old
+
+    @property
+    def field_count(self) -> int:
+        return len(self._slots)
+
+    def slot(self, key: FieldKey) -> Optional[int]:
+        return self._slots.get(key)
+
+    def add_field(self, zone_id: str, field: Field, moisture: Optional[float] = None) -> int:
+        key = (zone_id, field.field_id)
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                if self._free_slots:
+                    slot = self._free_slots.pop()
+                    self._keys[slot] = key
+                else:
+                    slot = len(self._keys)
+                    if slot >= len(self.moisture):
+                        self._grow()
+                    self._keys.append(key)
+                self._slots[key] = slot
+                self.last_decision[slot] = NO_DECISION
+            self.zone_index[slot] = self._zone_indexes.setdefault(zone_id, len(self._zone_indexes))
+            self.threshold[slot] = field.soil_moisture_threshold
+            self.soil_depth[slot] = field.soil_depth
+            self.area[slot] = field.area
+            self.moisture[slot] = np.nan if moisture is None else moisture
+            return slot
+
+    def remove_field(self, key: FieldKey) -> None:
+        with self._lock:
+            slot = self._slots.pop(key, None)
+            if slot is None:
+                return
+            self._keys[slot] = None
+            self.moisture[slot] = np.nan
+            self.threshold[slot] = np.nan
+            self.last_decision[slot] = NO_DECISION
+            self._free_slots.append(slot)
+
+    def update_moisture(self, key: FieldKey, moisture: Optional[float]) -> None:
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is not None:
+                self.moisture[slot] = np.nan if moisture is None else moisture
+
+    def compute(self, slots: np.ndarray, rain: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Decide every slot in `slots` and record the decisions.
+
+        :param slots: Field slots to evaluate.
+        :param rain: Rain prediction for each slot in `slots`.
+        :return: Per-slot (valid, trigger, water_need) arrays.
+        """
+        threshold = self.threshold[slots]
+        moisture = self.moisture[slots]
+        last_decision = self.last_decision[slots]
+        effective_threshold = np.where(
+            last_decision == TRIGGERED,
+            threshold + self.hysteresis_band,
+            np.where(last_decision == STOPPED, threshold - self.hysteresis_band, threshold)
+        )
+        valid = ~np.isnan(moisture) & ~np.isnan(threshold)
+        trigger = valid & (moisture <= effective_threshold) & ~rain
+
+        target_moisture = threshold + self.hysteresis_band
+        water_deficit = target_moisture / 100 - moisture / 100
+        soil_volume = self.soil_depth[slots] * self.area[slots]
+        water_need = water_deficit * self.soil_capacity * soil_volume * 1000
+
+        self.last_decision[slots] = np.where(
+            valid,
+            np.where(trigger, TRIGGERED, STOPPED),
+            last_decision
+        ).astype(np.int8)
+        return valid, trigger, water_need
+
+    def evaluate(self, keys: Iterable[FieldKey], rain_by_zone: Dict[str, bool]) -> List[Tuple[FieldKey, dict]]:
+        with self._lock:
+            known = [key for key in keys if key in self._slots]
+            if not known:
+                return []
+            slots = np.fromiter((self._slots[key] for key in known), dtype=np.int64, count=len(known))
+            zone_rain = np.zeros(len(self._zone_indexes), dtype=bool)
+            for zone_id, rain in rain_by_zone.items():
+                index = self._zone_indexes.get(zone_id)
+                if index is not None:
+                    zone_rain[index] = rain
+            valid, trigger, water_need = self.compute(slots, zone_rain[self.zone_index[slots]])
+
+        trigger = trigger.tolist()
+        water_need = water_need.tolist()
+        results = []
+        for index in np.flatnonzero(valid).tolist():
+            if trigger[index]:
+                result = {
+                    "water_need": water_need[index],
+                    "action": TRIGGER_IRRIGATION,
+                    "reason": TRIGGER_REASON
+                }
+            else:
+                result = {
+                    "action": STOP_IRRIGATION,
+                    "reason": STOP_REASON
+                }
+            results.append((known[index], result))
+        return results
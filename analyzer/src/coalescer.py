@@ -0,0 +1,106 @@
+import logging
+import threading
+from time import monotonic
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+FieldKey = Tuple[str, str]
+
+class FieldCoalescer:
+    """
+    Collapses bursts of sensor readings into a single evaluation per field.
+
+    Readings mark their field as dirty; a dirty field is flushed once its window
+    elapses, or immediately once every expected soil moisture sensor has reported.
+    When a field's expected sensors are known, readings from other sensors only
+    update state and never dirty the field, since they cannot change the decision.
+    """
+
+    def __init__(self, window: float, on_flush: Callable[[List[FieldKey]], None]):
+        self.window = window
+        self.on_flush = on_flush
+        self._dirty: Dict[FieldKey, float] = {}
+        self._reported: Dict[FieldKey, Set[str]] = {}
+        self._expected: Dict[FieldKey, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_expected_sensors(self, zone_id: str, field_id: str, sensor_ids: Set[str]) -> None:
+        with self._lock:
+            self._expected[(zone_id, field_id)] = set(sensor_ids)
+
+    def forget_field(self, zone_id: str, field_id: str) -> None:
+        key = (zone_id, field_id)
+        with self._lock:
+            self._expected.pop(key, None)
+            self._dirty.pop(key, None)
+            self._reported.pop(key, None)
+
+    def mark(self, zone_id: str, field_id: str, sensor_id: Optional[str] = None) -> bool:
+        """
+        Mark a field as dirty.
+
+        :return: True when the field is complete and was flushed by this call.
+        """
+        key = (zone_id, field_id)
+        with self._lock:
+            expected = self._expected.get(key)
+            if expected is not None and sensor_id not in expected:
+                return False
+            self._dirty.setdefault(key, monotonic())
+            if not expected:
+                return False
+            reported = self._reported.setdefault(key, set())
+            reported.add(sensor_id)
+            if not expected.issubset(reported):
+                return False
+            del self._dirty[key]
+            del self._reported[key]
+        self._flush([key])
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._dirty)
+
+    def flush_due(self, now: Optional[float] = None) -> List[FieldKey]:
+        now = monotonic() if now is None else now
+        with self._lock:
+            due = [key for key, since in self._dirty.items() if now - since >= self.window]
+            for key in due:
+                del self._dirty[key]
+                self._reported.pop(key, None)
+        if due:
+            self._flush(due)
+        return due
+
+    def _flush(self, keys: List[FieldKey]) -> None:
+        try:
+            self.on_flush(keys)
+        except Exception as e:
+            logger.error(f"Error flushing coalesced fields: {e}")
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="field-coalescer", daemon=True)
+        self._thread.start()
+        logger.info(f"Started field coalescer with a {self.window}s window")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        # Poll at a fraction of the window so a field is never held much longer than it
+        tick = max(self.window / 4, 0.05)
+        while not self._stop_event.wait(tick):
+            self.flush_due()
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+import socket
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -9,4 +10,37 @@ class Config:
     ANALYZER_OUTPUT_TOPIC_PREFIX: str = 'analyzer'
     MQTT_KEEPALIVE: int = 60
     NEXT_HOURS: int = 1
+    HYSTERESIS_BAND: float = 0.0
+    HEARTBEAT_INTERVAL: float = 300
+    BATCH_ENGINE_ENABLED: bool = False
+    COALESCE_ENABLED: bool = False
+    COALESCE_WINDOW: float = 2.0
+    WEATHER_TTL: float = 600
+    WEATHER_REFRESH_MARGIN: float = 60
+    WEATHER_MAX_STALE: float = 3600
+    WEATHER_TIMEOUT: float = 5.0
+    WEATHER_BREAKER_THRESHOLD: int = 3
+    WEATHER_BREAKER_RESET: float = 60
+    WEATHER_CACHE_PATH: str = 'data/weather_cache.sqlite'
+    WEATHER_GRID_SIZE: float = 0.01
+    TOPOLOGY_RELOAD_INTERVAL: float = 30
+    SHARDING_ENABLED: bool = False
+    INSTANCE_ID: str = field(default_factory=socket.gethostname)
+    MEMBERSHIP_TOPIC_PREFIX: str = 'cluster/analyzer/members'
+    REBALANCE_DELAY: float = 2.0
+    HISTORY_ENABLED: bool = False
+    HISTORY_MEMORY_BUDGET_MB: float = 64
+    HISTORY_RAW_SECONDS: int = 600
+    HISTORY_MINUTES: int = 1440
+    HISTORY_HOURS: int = 168
+    SOIL_MOISTURE_HALF_LIFE: float = 0
+    METRICS_PORT: int = 9100
+    METRICS_PUSH_INTERVAL: float = 0
+    METRICS_TOPIC_PREFIX: str = 'metrics'
+    PAYLOAD_CODEC: str = 'json'
+    WORK_QUEUE_ENABLED: bool = False
+    ANALYSIS_WORKERS: int = 4
+    WORK_QUEUE_CAPACITY: int = 10000
+    OUTLOOK_HOURS: int = 0
+    OUTLOOK_TREND_WINDOW: float = 21600
     SOIL_CAPACITY = 0.25
\ No newline at end of file
@@ -0,0 +1,55 @@
+import threading
+from time import monotonic
+from typing import Dict, Optional, Tuple
+
+FieldKey = Tuple[str, str]
+
+TRIGGER_IRRIGATION = 'trigger_irrigation'
+STOP_IRRIGATION = 'stop_irrigation'
+TRIGGER_REASON = "(Sml ≤ Smt) ⋀ ⌐Rp"
+STOP_REASON = "(Sml > Smt) ⋁ Rp"
+
+class DecisionTracker:
+    """
+    Remembers the last irrigation decision per field.
+
+    The decision threshold is shifted by `hysteresis_band` away from the current
+    decision, so a field that is irrigating keeps irrigating until the moisture
+    rises above `threshold + band`, and a stopped field only triggers once it falls
+    to `threshold - band`. Results are only worth publishing when the decision
+    changes, or once every `heartbeat_interval` seconds as a keep-alive.
+    """
+
+    def __init__(self, hysteresis_band: float = 0.0, heartbeat_interval: float = 300):
+        self.hysteresis_band = hysteresis_band
+        self.heartbeat_interval = heartbeat_interval
+        self._last: Dict[FieldKey, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def last_action(self, key: FieldKey) -> Optional[str]:
+        entry = self._last.get(key)
+        return entry[0] if entry else None
+
+    def effective_threshold(self, key: FieldKey, threshold: float) -> float:
+        action = self.last_action(key)
+        if action == TRIGGER_IRRIGATION:
+            return threshold + self.hysteresis_band
+        if action == STOP_IRRIGATION:
+            return threshold - self.hysteresis_band
+        return threshold
+
+    def target_moisture(self, threshold: float) -> float:
+        return threshold + self.hysteresis_band
+
+    def should_publish(self, key: FieldKey, action: str, now: Optional[float] = None) -> bool:
+        now = monotonic() if now is None else now
+        with self._lock:
+            entry = self._last.get(key)
+            if entry and entry[0] == action and now - entry[1] < self.heartbeat_interval:
+                return False
+            self._last[key] = (action, now)
+            return True
+
+    def forget(self, key: FieldKey) -> None:
+        with self._lock:
+            self._last.pop(key, None)
@@ -1,13 +1,78 @@
+from typing import Optional
+
 from .actuator import Actuator
 from .sensor import Sensor, SensorType
 
 
+# Minimum number of updates between two rebuilds of an aggregate
+REBUILD_INTERVAL = 1024
+
+class SensorAggregate:
+    """
+    Running sum, count, min and max of the non-None values of one sensor type.
+
+    Sum and count are exact to update. Min and max are only recomputed when the
+    sensor holding the extreme moves away from it, and the sum is rebuilt from
+    scratch once every `max(len(sensors), REBUILD_INTERVAL)` updates to cancel
+    floating point drift. A rebuild costs `len(sensors)`, so every operation
+    stays amortised O(1). Each update adds at most one rounding error of
+    2**-53 times the largest magnitude involved, so between rebuilds the sum
+    drifts by at most `max(len(sensors), REBUILD_INTERVAL) * 2**-53 * M`,
+    where M bounds the values and the running sum: about 1e-8 for 1024
+    sensors reading up to 100.
+    """
+
+    __slots__ = ('sum', 'count', 'min', 'max', 'extremes_stale', 'updates')
+
+    def __init__(self):
+        self.sum = 0.0
+        self.count = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.extremes_stale = False
+        self.updates = 0
+
+    def add(self, value) -> None:
+        if value is None:
+            return
+        self.sum += value
+        self.count += 1
+        if not self.extremes_stale:
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def remove(self, value) -> None:
+        if value is None:
+            return
+        self.sum -= value
+        self.count -= 1
+        if self.count == 0:
+            self.sum = 0.0
+            self.min = None
+            self.max = None
+            self.extremes_stale = False
+        elif value == self.min or value == self.max:
+            self.extremes_stale = True
+
+    def rebuild(self, sensors) -> None:
+        values = [sensor.value for sensor in sensors if sensor.value is not None]
+        self.sum = float(sum(values))
+        self.count = len(values)
+        self.min = min(values) if values else None
+        self.max = max(values) if values else None
+        self.extremes_stale = False
+        self.updates = 0
+
+
 class Field:
 
     def __init__(self, field_id: str, soil_moisture_threshold: float, area: float,soil_depth: float ):
         self.field_id = field_id
         self.sensors: dict[str, dict[str, Sensor]]  = {}
         self.actuators: dict[str, dict[str, Actuator]] = {}
+        self._aggregates: dict[str, SensorAggregate] = {}
         self.soil_moisture_threshold = float(soil_moisture_threshold)
         self.area = float(area)
         self.soil_depth = float(soil_depth)
@@ -25,7 +90,31 @@ class Field:
     def add_sensor(self, sensor: Sensor):
         if sensor.type not in self.sensors:
             self.sensors[sensor.type] = {}
+            self._aggregates[sensor.type] = SensorAggregate()
+        aggregate = self._aggregates[sensor.type]
+        previous = self.sensors[sensor.type].get(sensor.sensor_id)
+        if previous is not None:
+            aggregate.remove(previous.value)
         self.sensors[sensor.type].update({sensor.sensor_id: sensor})
+        aggregate.add(sensor.value)
+
+    def remove_sensor(self, sensor_id: str) -> Optional[Sensor]:
+        for sensor_type, sensor_dict in self.sensors.items():
+            sensor = sensor_dict.pop(sensor_id, None)
+            if sensor is not None:
+                self._aggregates[sensor_type].remove(sensor.value)
+                return sensor
+        return None
+
+    def on_sensor_value_changed(self, sensor: Sensor, old_value) -> None:
+        if self.sensors.get(sensor.type, {}).get(sensor.sensor_id) is not sensor:
+            return
+        aggregate = self._aggregates[sensor.type]
+        aggregate.remove(old_value)
+        aggregate.add(sensor.value)
+        aggregate.updates += 1
+        if aggregate.updates >= max(len(self.sensors[sensor.type]), REBUILD_INTERVAL):
+            aggregate.rebuild(self.sensors[sensor.type].values())
     
     def add_actuator(self, actuator: Actuator):
         if actuator.type not in self.actuators:
@@ -33,11 +122,24 @@ class Field:
         self.actuators[actuator.type].update({actuator.actuator_id: actuator})
 
     def get_average_sensor_value(self, sensor_type: SensorType):
-        if sensor_type in self.sensors:
-            sensors = self.sensors[sensor_type]
-            values = [sensor.value for sensor in sensors.values() if sensor.value is not None]
-            return sum(values) / len(values) if values else None
-        return None
+        aggregate = self._aggregates.get(sensor_type)
+        if aggregate is None or aggregate.count == 0:
+            return None
+        return aggregate.sum / aggregate.count
+
+    def get_min_sensor_value(self, sensor_type: SensorType):
+        aggregate = self._get_fresh_aggregate(sensor_type)
+        return aggregate.min if aggregate else None
+
+    def get_max_sensor_value(self, sensor_type: SensorType):
+        aggregate = self._get_fresh_aggregate(sensor_type)
+        return aggregate.max if aggregate else None
+
+    def _get_fresh_aggregate(self, sensor_type: SensorType) -> Optional[SensorAggregate]:
+        aggregate = self._aggregates.get(sensor_type)
+        if aggregate is not None and aggregate.extremes_stale:
+            aggregate.rebuild(self.sensors[sensor_type].values())
+        return aggregate
     
     def get_sensor(self, sensor_id: str):
         for sensor_dict in self.sensors.values():
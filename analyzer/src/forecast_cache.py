@@ -0,0 +1,123 @@
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+from time import time
+from typing import Dict, Optional, Tuple
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+Cell = Tuple[int, int]
+
+class ForecastCache:
+    """
+    On-disk forecast store keyed on a lat/lon grid cell.
+
+    Zones that fall in the same cell share one forecast, and the sqlite file
+    survives restarts and can be shared by several analyzer processes on a host.
+    Timestamps are wall-clock seconds so entries stay meaningful across processes.
+
+    `hits` and `misses` count the forecasts requested by message handling, as
+    reported by `count`; `retries` counts the fetches repeated for a cell
+    whose previous refresh failed.
+    """
+
+    def __init__(self, path: str, cell_size: float = 0.01):
+        self.path = path
+        self.cell_size = cell_size
+        self.hits = 0
+        self.misses = 0
+        self.retries = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS forecasts (
+                cell_lat INTEGER NOT NULL,
+                cell_lon INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (cell_lat, cell_lon)
+            )
+            """
+        )
+        self._connection.commit()
+        logger.info(f"Opened forecast cache at {path} with a {cell_size}° grid")
+
+    def cell_for(self, lat: float, lon: float) -> Cell:
+        return math.floor(float(lat) / self.cell_size), math.floor(float(lon) / self.cell_size)
+
+    def cell_center(self, cell: Cell) -> Tuple[float, float]:
+        return (cell[0] + 0.5) * self.cell_size, (cell[1] + 0.5) * self.cell_size
+
+    def get(self, cell: Cell) -> Optional[Tuple[float, dict]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT fetched_at, data FROM forecasts WHERE cell_lat = ? AND cell_lon = ?",
+                cell
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return row[0], json.loads(row[1])
+        except ValueError as e:
+            logger.error(f"Corrupt forecast for cell {cell}: {e}")
+            return None
+
+    def lookup(self, cell: Cell, max_age: float) -> Optional[Tuple[float, dict]]:
+        """
+        Return the cached forecast for `cell` if it is younger than `max_age`,
+        otherwise None.
+        """
+        entry = self.get(cell)
+        if entry is not None and time() - entry[0] < max_age:
+            return entry
+        return None
+
+    def count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def count_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def put(self, cell: Cell, data: dict, fetched_at: Optional[float] = None) -> float:
+        fetched_at = time() if fetched_at is None else fetched_at
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO forecasts (cell_lat, cell_lon, fetched_at, data) VALUES (?, ?, ?, ?)",
+                (cell[0], cell[1], fetched_at, json.dumps(data))
+            )
+            self._connection.commit()
+            self.writes += 1
+        return fetched_at
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'retries': self.retries,
+                'writes': self.writes,
+                'hit_ratio': self.hits / lookups if lookups else 0.0
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,235 @@
+import logging
+import math
+import threading
+from time import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SensorKey = Tuple[str, str, str]
+
+# (resolution in seconds, number of buckets kept)
+DEFAULT_TIERS = ((1, 600), (60, 1440), (3600, 168))
+
+class HistoryTier:
+    """
+    One resolution of the history: a ring of `capacity` mean values per slot.
+
+    Bucket `b` (covering `[b * resolution, (b + 1) * resolution)`) lives in
+    column `b % capacity`, so no head pointer is needed and a gap in the
+    readings simply leaves NaN buckets behind.
+    """
+
+    __slots__ = ('resolution', 'capacity', 'values', 'last_bucket', 'sums', 'counts')
+
+    def __init__(self, resolution: float, capacity: int, slots: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.values = np.full((slots, capacity), np.nan, dtype=np.float32)
+        self.last_bucket = np.full(slots, -1, dtype=np.int64)
+        self.sums = np.zeros(slots)
+        self.counts = np.zeros(slots, dtype=np.int32)
+
+    @staticmethod
+    def bytes_per_slot(capacity: int) -> int:
+        return capacity * 4 + 8 + 8 + 4
+
+    @property
+    def span(self) -> float:
+        return self.resolution * self.capacity
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.last_bucket.nbytes + self.sums.nbytes + self.counts.nbytes
+
+    def grow(self, slots: int) -> None:
+        old_slots = len(self.last_bucket)
+        values = np.full((slots, self.capacity), np.nan, dtype=np.float32)
+        values[:old_slots] = self.values
+        last_bucket = np.full(slots, -1, dtype=np.int64)
+        last_bucket[:old_slots] = self.last_bucket
+        sums = np.zeros(slots)
+        sums[:old_slots] = self.sums
+        counts = np.zeros(slots, dtype=np.int32)
+        counts[:old_slots] = self.counts
+        self.values, self.last_bucket, self.sums, self.counts = values, last_bucket, sums, counts
+
+    def clear(self, slot: int) -> None:
+        self.values[slot] = np.nan
+        self.last_bucket[slot] = -1
+        self.sums[slot] = 0.0
+        self.counts[slot] = 0
+
+    def add(self, slot: int, value: float, now: float) -> None:
+        bucket = int(now // self.resolution)
+        last_bucket = int(self.last_bucket[slot])
+        if bucket < last_bucket:
+            return
+        if bucket > last_bucket:
+            if last_bucket >= 0:
+                gap = min(bucket - last_bucket - 1, self.capacity)
+                if gap > 0:
+                    self.values[slot, np.arange(last_bucket + 1, last_bucket + 1 + gap) % self.capacity] = np.nan
+            self.last_bucket[slot] = bucket
+            self.sums[slot] = 0.0
+            self.counts[slot] = 0
+        self.sums[slot] += value
+        self.counts[slot] += 1
+        self.values[slot, bucket % self.capacity] = self.sums[slot] / self.counts[slot]
+
+    def window(self, slot: int, seconds: float, now: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: The ages (seconds) and values of the non-empty buckets of the
+                 last `seconds`, oldest first.
+        """
+        last_bucket = int(self.last_bucket[slot])
+        if last_bucket < 0:
+            return np.empty(0), np.empty(0)
+        current_bucket = int(now // self.resolution)
+        count = min(self.capacity, max(1, math.ceil(seconds / self.resolution)))
+        first_bucket = max(current_bucket - count + 1, last_bucket - self.capacity + 1)
+        buckets = np.arange(first_bucket, last_bucket + 1)
+        values = self.values[slot, buckets % self.capacity].astype(np.float64)
+        present = ~np.isnan(values)
+        ages = np.maximum(now - (buckets[present] + 0.5) * self.resolution, 0.0)
+        return ages, values[present]
+
+class HistoryStore:
+    """
+    Fixed-memory, multi-resolution history of sensor readings.
+
+    Every tracked sensor gets a slot in each tier (by default 10 minutes of
+    1 s means, 24 hours of 1 min means and 7 days of 1 h means). Storage
+    grows on demand but never past `memory_budget` bytes; sensors beyond the
+    budget are simply not tracked. Queries read from the finest tier that
+    covers the requested window.
+    """
+
+    def __init__(
+        self,
+        memory_budget: int,
+        tiers: Sequence[Tuple[float, int]] = DEFAULT_TIERS,
+        initial_slots: int = 64
+    ):
+        bytes_per_slot = sum(HistoryTier.bytes_per_slot(capacity) for _, capacity in tiers)
+        self.max_slots = memory_budget // bytes_per_slot
+        if self.max_slots < 1:
+            raise ValueError(f"History memory budget of {memory_budget} bytes cannot hold a single sensor")
+        slots = min(initial_slots, self.max_slots)
+        self.tiers: List[HistoryTier] = [
+            HistoryTier(resolution, capacity, slots)
+            for resolution, capacity in sorted(tiers)
+        ]
+        self._slots: Dict[SensorKey, int] = {}
+        self._free_slots: List[int] = []
+        self._next_slot = 0
+        self._capacity = slots
+        self._budget_exhausted = False
+        self._lock = threading.Lock()
+        logger.info(f"History store can track up to {self.max_slots} sensors in {memory_budget / 2**20:.1f} MiB")
+
+    @property
+    def nbytes(self) -> int:
+        return sum(tier.nbytes for tier in self.tiers)
+
+    @property
+    def sensor_count(self) -> int:
+        return len(self._slots)
+
+    def _allocate(self, key: SensorKey) -> Optional[int]:
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        elif self._next_slot < self._capacity:
+            slot = self._next_slot
+            self._next_slot += 1
+        elif self._capacity < self.max_slots:
+            self._capacity = min(self._capacity * 2, self.max_slots)
+            for tier in self.tiers:
+                tier.grow(self._capacity)
+            slot = self._next_slot
+            self._next_slot += 1
+        else:
+            if not self._budget_exhausted:
+                logger.warning(f"History memory budget exhausted, not tracking sensors beyond {self.max_slots}")
+                self._budget_exhausted = True
+            return None
+        self._slots[key] = slot
+        return slot
+
+    def record(self, key: SensorKey, value: Optional[float], now: Optional[float] = None) -> None:
+        if value is None:
+            return
+        now = time() if now is None else now
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._allocate(key)
+                if slot is None:
+                    return
+            for tier in self.tiers:
+                tier.add(slot, value, now)
+
+    def release(self, key: SensorKey) -> None:
+        with self._lock:
+            slot = self._slots.pop(key, None)
+            if slot is None:
+                return
+            for tier in self.tiers:
+                tier.clear(slot)
+            self._free_slots.append(slot)
+            self._budget_exhausted = False
+
+    def release_field(self, zone_id: str, field_id: str) -> None:
+        for key in [key for key in list(self._slots) if key[0] == zone_id and key[1] == field_id]:
+            self.release(key)
+
+    def window(self, key: SensorKey, seconds: float, now: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ages and values of the readings of the last `seconds`, oldest first.
+        """
+        now = time() if now is None else now
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                return np.empty(0), np.empty(0)
+            tier = next((tier for tier in self.tiers if tier.span >= seconds), self.tiers[-1])
+            return tier.window(slot, seconds, now)
+
+    def ewma(self, key: SensorKey, half_life: float, window: Optional[float] = None, now: Optional[float] = None) -> Optional[float]:
+        """
+        Exponentially weighted mean, weighting each bucket by its age.
+
+        :param half_life: Age (seconds) at which a reading weighs half as much as a fresh one.
+        :param window: How far back to look, five half-lives by default.
+        """
+        ages, values = self.window(key, window or 5 * half_life, now)
+        if not len(values):
+            return None
+        weights = np.exp2(-ages / half_life)
+        return float(np.dot(weights, values) / weights.sum())
+
+    def slope(self, key: SensorKey, window: float, now: Optional[float] = None) -> Optional[float]:
+        """
+        Least-squares trend of the readings over `window`, in units per second.
+        """
+        ages, values = self.window(key, window, now)
+        if len(values) < 2:
+            return None
+        times = -ages
+        times = times - times.mean()
+        variance = np.dot(times, times)
+        if variance == 0:
+            return None
+        return float(np.dot(times, values - values.mean()) / variance)
+
+    def percentile(self, key: SensorKey, q: float, window: float, now: Optional[float] = None) -> Optional[float]:
+        _, values = self.window(key, window, now)
+        if not len(values):
+            return None
+        return float(np.percentile(values, q))
@@ -0,0 +1,61 @@
+import threading
+from contextlib import contextmanager
+from typing import Hashable, Iterator, List
+
+
+class ReadWriteLock:
+    """
+    Lock held either by any number of readers or by a single writer.
+
+    Waiting writers are let in before new readers, so a topology reload is
+    not starved by steady message traffic. It is not reentrant: a thread
+    must not take it again, in either mode, while it holds it.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            while self._writing or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+class StripedLock:
+    """
+    Fixed set of locks, one picked per key, so that updates to different
+    keys rarely contend without keeping a lock per key.
+    """
+
+    def __init__(self, stripes: int = 64):
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(stripes)]
+
+    def for_key(self, key: Hashable) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
@@ -0,0 +1,98 @@
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+from .field import Field
+from .sensor import Sensor
+from .zone import Zone
+
+FieldKey = Tuple[str, str]
+
+class Route:
+    """
+    Everything the hot path needs to handle a message on one sensor topic.
+    """
+
+    __slots__ = ('zone_id', 'field_id', 'key', 'field', 'sensor', 'output_topic')
+
+    def __init__(self, zone_id: str, field: Field, sensor: Sensor, output_topic: str):
+        self.zone_id = zone_id
+        self.field_id = field.field_id
+        self.key = (zone_id, field.field_id)
+        self.field = field
+        self.sensor = sensor
+        self.output_topic = output_topic
+
+class RoutingTable:
+    """
+    Maps full inbound sensor topics straight to their `Route`, and the sensors
+    of each field to theirs for batched telemetry.
+
+    Built from the zone topology, one zone at a time, so a reload only has to
+    re-index the zones that changed. Output topics, including the codec
+    suffix, are rendered once per field and shared by all of its routes.
+    """
+
+    def __init__(self, output_topic_prefix: str, output_topic_suffix: str = ''):
+        self.output_topic_prefix = output_topic_prefix
+        self.output_topic_suffix = output_topic_suffix
+        self._routes: Dict[str, Route] = {}
+        self._field_routes: Dict[FieldKey, Dict[str, Route]] = {}
+        self._zone_topics: Dict[str, Set[str]] = {}
+        self._output_topics: Dict[FieldKey, str] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def route_count(self) -> int:
+        return len(self._routes)
+
+    def get(self, topic: str) -> Optional[Route]:
+        return self._routes.get(topic)
+
+    def sensor_route(self, zone_id: str, field_id: str, sensor_id: str) -> Optional[Route]:
+        routes = self._field_routes.get((zone_id, field_id))
+        return routes.get(sensor_id) if routes else None
+
+    def output_topic(self, zone_id: str, field_id: str) -> str:
+        topic = self._output_topics.get((zone_id, field_id))
+        if topic is None:
+            topic = self._render_output_topic(zone_id, field_id)
+        return topic
+
+    def sensor_topic(self, zone_id: str, field_id: str, sensor: Sensor) -> str:
+        return f"zone/{zone_id}/field/{field_id}/sensor/{sensor.sensor_id}/{sensor.type}"
+
+    def _render_output_topic(self, zone_id: str, field_id: str) -> str:
+        return f"{self.output_topic_prefix}/zone/{zone_id}/field/{field_id}{self.output_topic_suffix}"
+
+    def index_zone(self, zone: Zone) -> None:
+        """
+        (Re)build the routes of `zone`, dropping those of removed fields and sensors.
+        """
+        routes = {}
+        field_routes = {}
+        output_topics = {}
+        for field in zone.fields.values():
+            key = (zone.zone_id, field.field_id)
+            output_topic = self._render_output_topic(zone.zone_id, field.field_id)
+            output_topics[key] = output_topic
+            sensor_routes = field_routes[key] = {}
+            for sensor in field.get_all_sensors():
+                topic = self.sensor_topic(zone.zone_id, field.field_id, sensor)
+                routes[topic] = sensor_routes[sensor.sensor_id] = Route(zone.zone_id, field, sensor, output_topic)
+        with self._lock:
+            self._drop_zone(zone.zone_id)
+            self._routes.update(routes)
+            self._field_routes.update(field_routes)
+            self._output_topics.update(output_topics)
+            self._zone_topics[zone.zone_id] = set(routes)
+
+    def remove_zone(self, zone_id: str) -> None:
+        with self._lock:
+            self._drop_zone(zone_id)
+
+    def _drop_zone(self, zone_id: str) -> None:
+        for topic in self._zone_topics.pop(zone_id, ()):
+            self._routes.pop(topic, None)
+        for key in [key for key in self._output_topics if key[0] == zone_id]:
+            del self._output_topics[key]
+            self._field_routes.pop(key, None)
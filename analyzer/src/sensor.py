@@ -58,7 +58,10 @@ class Sensor(ABC):
         pass
 
     def set_value(self, value):
-        self.value = max(self.min_value, min(self.max_value, value))
+        old_value = self.value
+        self.value = None if value is None else max(self.min_value, min(self.max_value, value))
+        if self.field is not None:
+            self.field.on_sensor_value_changed(self, old_value)
 
     def to_dict(self):
         return {
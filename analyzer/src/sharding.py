@@ -0,0 +1,106 @@
+import hashlib
+import json
+import logging
+import threading
+from typing import Callable, Iterable, Optional, Set
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def rendezvous_owner(key: str, members: Iterable[str]) -> Optional[str]:
+    """
+    Pick the owner of `key` with rendezvous (highest random weight) hashing.
+
+    Every instance computes the same owner from the same member set, and when a
+    member joins or leaves only the keys it wins or loses change hands.
+    """
+    best_member, best_weight = None, None
+    for member in members:
+        weight = hashlib.sha1(f"{member}:{key}".encode()).digest()
+        if best_weight is None or weight > best_weight:
+            best_member, best_weight = member, weight
+    return best_member
+
+class ShardMembership:
+    """
+    Tracks live analyzer instances through retained presence messages.
+
+    Each instance publishes a retained message on `<prefix>/<instance_id>` and
+    registers an empty retained last will on the same topic, so the broker
+    clears its presence when it disconnects. Membership changes are debounced
+    by `rebalance_delay` seconds before `on_rebalance` is called with the new
+    member set, off the MQTT network thread.
+    """
+
+    def __init__(
+        self,
+        instance_id: str,
+        topic_prefix: str,
+        on_rebalance: Callable[[Set[str]], None],
+        rebalance_delay: float = 2.0
+    ):
+        self.instance_id = instance_id
+        self.topic_prefix = topic_prefix.rstrip('/')
+        self.on_rebalance = on_rebalance
+        self.rebalance_delay = rebalance_delay
+        self.members: Set[str] = {instance_id}
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    @property
+    def presence_topic(self) -> str:
+        return f"{self.topic_prefix}/{self.instance_id}"
+
+    @property
+    def subscription(self) -> str:
+        return f"{self.topic_prefix}/+"
+
+    def members_snapshot(self) -> Set[str]:
+        with self._lock:
+            return set(self.members)
+
+    def owns(self, key: str) -> bool:
+        return rendezvous_owner(key, self.members_snapshot()) == self.instance_id
+
+    def set_will(self, client) -> None:
+        client.will_set(self.presence_topic, payload=b'', qos=1, retain=True)
+
+    def announce(self, client) -> None:
+        client.message_callback_add(self.subscription, self._on_member_message)
+        client.subscribe(self.subscription, qos=1)
+        client.publish(self.presence_topic, json.dumps({'instance_id': self.instance_id}), qos=1, retain=True)
+        self._schedule_rebalance()
+
+    def leave(self, client) -> None:
+        client.publish(self.presence_topic, b'', qos=1, retain=True)
+
+    def _on_member_message(self, client, userdata, msg) -> None:
+        member = msg.topic.rsplit('/', 1)[-1]
+        with self._lock:
+            if msg.payload:
+                changed = member not in self.members
+                self.members.add(member)
+            else:
+                changed = member in self.members and member != self.instance_id
+                self.members.discard(member)
+                self.members.add(self.instance_id)
+        if changed:
+            logger.info(f"Analyzer membership changed, members: {sorted(self.members)}")
+            self._schedule_rebalance()
+
+    def _schedule_rebalance(self) -> None:
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.rebalance_delay, self._rebalance)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _rebalance(self) -> None:
+        try:
+            self.on_rebalance(self.members_snapshot())
+        except Exception as e:
+            logger.error(f"Error rebalancing zones: {e}")
@@ -1,30 +1,237 @@
+import logging
+import threading
+from time import monotonic, time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
 import requests
-from cachetools import TTLCache, cached
+from requests.exceptions import RequestException
+
+from .forecast_cache import Cell, ForecastCache
 
 BASE_URL = "http://api.openweathermap.org/data/2.5/forecast"
 
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    Stops calling a failing provider for `reset_timeout` seconds after
+    `failure_threshold` consecutive failures, then lets a single trial call through.
+    Other callers are turned away until the trial call succeeds or fails.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.in_trial = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+            if self.in_trial:
+                return False
+            self.in_trial = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.in_trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self.in_trial = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Weather provider circuit opened after {self.failures} failures")
+                self.state = self.OPEN
+                self.opened_at = monotonic()
+
 class WeatherFetcher:
-    
-    def __init__(self, api_key: str):
+
+    def __init__(
+        self,
+        api_key: str,
+        timeout: float = 5.0,
+        breaker: Optional[CircuitBreaker] = None,
+        cache: Optional[ForecastCache] = None,
+        ttl: float = 600
+    ):
         self.api_key = api_key
         self.base_url = BASE_URL
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.cache = cache or ForecastCache(':memory:')
+        self.ttl = ttl
 
     def fetch_weather(self, lat, lon):
+        if not self.breaker.allow():
+            return None
         params = {
             'lat': lat,
             'lon': lon,
             'appid': self.api_key,
             'units': 'metric'
         }
-        response = requests.get(self.base_url, params=params)
+        try:
+            response = requests.get(self.base_url, params=params, timeout=self.timeout)
+        except RequestException as e:
+            logger.error(f"Failed to fetch weather data: {e}")
+            self.breaker.record_failure()
+            return None
         if response.status_code == 200:
+            self.breaker.record_success()
             data = response.json()
             return data
         else:
-            print(f"Failed to fetch weather data: {response.status_code}")
+            logger.error(f"Failed to fetch weather data: {response.status_code}")
+            self.breaker.record_failure()
             return None
-        
-    # Cache the weather data for 10 minutes
-    @cached(cache=TTLCache(maxsize=1024, ttl=600))
+
     def get_weather(self, lat, lon):
-        return self.fetch_weather(lat, lon)
\ No newline at end of file
+        cell = self.cache.cell_for(lat, lon)
+        entry = self.cache.lookup(cell, self.ttl)
+        self.cache.count(entry is not None)
+        if entry is not None:
+            return entry[1]
+        data = self.fetch_weather(*self.cache.cell_center(cell))
+        if data is not None:
+            self.cache.put(cell, data)
+        return data
+
+class WeatherRefresher:
+    """
+    Keeps forecasts for every tracked location warm from a background thread.
+
+    `get_weather` only reads the local store, so callers on the MQTT thread never
+    wait on the provider. Entries are refreshed `refresh_margin` seconds before
+    their TTL expires and are served stale for up to `max_stale` seconds while
+    the provider is unavailable. Locations are grouped by forecast cache cell,
+    and a forecast another process already stored for a cell is reused as is.
+    """
+
+    def __init__(
+        self,
+        fetcher: WeatherFetcher,
+        ttl: float = 600,
+        refresh_margin: float = 60,
+        max_stale: float = 3600
+    ):
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.max_stale = max_stale
+        self.cache = fetcher.cache
+        self._cells: Dict[Cell, Optional[Tuple[float, dict]]] = {}
+        # Cells whose last fetch failed
+        self._failed: Set[Cell] = set()
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def track(self, lat: float, lon: float) -> None:
+        with self._lock:
+            self._cells.setdefault(self.cache.cell_for(lat, lon), None)
+        self._wake_event.set()
+
+    def retain(self, locations: Iterable[Tuple[float, float]]) -> None:
+        cells = {self.cache.cell_for(lat, lon) for lat, lon in locations}
+        with self._lock:
+            for cell in set(self._cells) - cells:
+                del self._cells[cell]
+                self._failed.discard(cell)
+
+    def get_weather(self, lat: float, lon: float) -> Optional[dict]:
+        cell = self.cache.cell_for(lat, lon)
+        with self._lock:
+            entry = self._cells.get(cell)
+            if cell not in self._cells:
+                self._cells[cell] = None
+                self._wake_event.set()
+        if entry is not None and time() - entry[0] >= self.max_stale:
+            entry = None
+        self.cache.count(entry is not None)
+        return entry[1] if entry is not None else None
+
+    def refresh_due(self) -> int:
+        refresh_age = self.ttl - self.refresh_margin
+        now = time()
+        with self._lock:
+            due = [
+                cell for cell, entry in self._cells.items()
+                if entry is None or now - entry[0] >= refresh_age
+            ]
+        refreshed = 0
+        for cell in due:
+            if self._stop_event.is_set():
+                break
+            entry = self.cache.lookup(cell, refresh_age)
+            if entry is None:
+                if cell in self._failed:
+                    self.cache.count_retry()
+                data = self.fetcher.fetch_weather(*self.cache.cell_center(cell))
+                if data is not None:
+                    self._failed.discard(cell)
+                    entry = (self.cache.put(cell, data), data)
+                else:
+                    self._failed.add(cell)
+                    entry = self.cache.get(cell)
+            if entry is None:
+                continue
+            with self._lock:
+                if cell not in self._cells:
+                    continue
+                current = self._cells[cell]
+                if current is None or current[0] < entry[0]:
+                    self._cells[cell] = entry
+                    refreshed += 1
+        if refreshed:
+            stats = self.cache.stats()
+            logger.info(
+                f"Refreshed {refreshed} forecast cells, cache hits={stats['hits']}, "
+                f"misses={stats['misses']}, hit_ratio={stats['hit_ratio']:.2f}, retries={stats['retries']}"
+            )
+        return refreshed
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="weather-refresher", daemon=True)
+        self._thread.start()
+        logger.info("Started weather refresher")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        interval = max(min(self.refresh_margin, self.ttl) / 2, 1.0)
+        while not self._stop_event.is_set():
+            try:
+                self.refresh_due()
+            except Exception as e:
+                logger.error(f"Error refreshing weather forecasts: {e}")
+            self._wake_event.wait(interval)
+            self._wake_event.clear()
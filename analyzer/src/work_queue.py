@@ -0,0 +1,106 @@
+import logging
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+SUPERSEDED = 'superseded'
+DROPPED = 'dropped'
+
+class _Shard:
+    __slots__ = ('pending', 'condition', 'thread')
+
+    def __init__(self):
+        self.pending: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self.condition = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+
+class FieldWorkQueue:
+    """
+    Bounded hand-off between the MQTT network thread and a pool of workers.
+
+    Items are sharded over the workers by a stable hash of their shard key
+    (the zone), so the items of a zone, and therefore of each of its fields,
+    are handled in arrival order and never concurrently. While an item waits,
+    a newer one with the same item key (the topic) replaces it in place:
+    only the latest reading of a sensor is worth analysing. When a shard is
+    full the oldest waiting item is dropped, so a burst costs stale readings
+    instead of an ever growing latency.
+    """
+
+    def __init__(self, handler: Callable[[Any], None], workers: int = 4, capacity: int = 10000):
+        self.handler = handler
+        self.shards = [_Shard() for _ in range(max(workers, 1))]
+        self.shard_capacity = max(capacity // len(self.shards), 1)
+        self._running = False
+
+    @property
+    def depth(self) -> int:
+        return sum(len(shard.pending) for shard in self.shards)
+
+    def _shard(self, shard_key: str) -> _Shard:
+        return self.shards[zlib.crc32(shard_key.encode()) % len(self.shards)]
+
+    def put(self, shard_key: str, item_key: Hashable, item: Any) -> str:
+        """
+        Queue `item`, replacing the waiting item with the same `item_key`.
+
+        :return: QUEUED, SUPERSEDED when a waiting item was replaced, or
+            DROPPED when the oldest waiting item was evicted to make room.
+        """
+        shard = self._shard(shard_key)
+        with shard.condition:
+            pending = shard.pending
+            if item_key in pending:
+                pending[item_key] = item
+                return SUPERSEDED
+            outcome = QUEUED
+            if len(pending) >= self.shard_capacity:
+                pending.popitem(last=False)
+                outcome = DROPPED
+            pending[item_key] = item
+            shard.condition.notify()
+        return outcome
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        for index, shard in enumerate(self.shards):
+            shard.thread = threading.Thread(
+                target=self._run, args=(shard,), name=f"analysis-worker-{index}", daemon=True
+            )
+            shard.thread.start()
+        logger.info(f"Started {len(self.shards)} analysis workers, {self.shard_capacity} queued items each")
+
+    def stop(self) -> None:
+        self._running = False
+        for shard in self.shards:
+            with shard.condition:
+                shard.condition.notify_all()
+        for shard in self.shards:
+            if shard.thread:
+                shard.thread.join()
+
+    def _run(self, shard: _Shard) -> None:
+        while True:
+            with shard.condition:
+                while self._running and not shard.pending:
+                    shard.condition.wait()
+                if not shard.pending:
+                    return
+                _, item = shard.pending.popitem(last=False)
+            self._handle(item)
+
+    def _handle(self, item: Any) -> None:
+        try:
+            self.handler(item)
+        except Exception as e:
+            logger.error(f"Error handling queued item: {e}")
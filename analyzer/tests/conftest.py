@@ -0,0 +1,38 @@
+import copy
+import sys
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+SERVICE = Path(__file__).resolve().parent.parent
+# The service is imported as `src`, the shared modules as `irrigation_common`
+sys.path[:0] = [str(SERVICE), str(SERVICE.parent / 'common')]
+
+from src import analyzer as analyzer_module  # noqa: E402
+from src.config import Config  # noqa: E402
+from src.zone import ZoneService  # noqa: E402
+from support import CLEAR, zone  # noqa: E402
+
+
+@pytest.fixture
+def make_analyzer(tmp_path):
+    """
+    Build an Analyzer on the given zones payload, without a broker, a backend
+    or a weather provider. Publications are recorded on `mqtt_client`.
+    """
+    def make(zones=None, forecast=CLEAR, **options):
+        options.setdefault('TOPOLOGY_RELOAD_INTERVAL', 0)
+        options.setdefault('METRICS_PORT', 0)
+        config = Config(
+            MQTT_BROKER_URL='broker:1883', BACKEND_URL='http://backend', WEATHER_API_KEY='',
+            WEATHER_CACHE_PATH=str(tmp_path / 'weather.sqlite'), **options
+        )
+        payload = copy.deepcopy(zones if zones is not None else [zone('z1')])
+        with mock.patch.object(ZoneService, 'fetch_zones', return_value=(payload, '"v1"')):
+            analyzer = analyzer_module.Analyzer(config)
+        analyzer.mqtt_client = mock.MagicMock()
+        analyzer.weather_fetcher.fetch_weather = lambda lat, lon: forecast
+        analyzer.weather_refresher.refresh_due()
+        return analyzer
+    return make
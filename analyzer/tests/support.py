@@ -0,0 +1,68 @@
+"""
+Topology payloads, fakes and MQTT helpers shared by the analyzer tests.
+"""
+import json
+
+from src.forecast_cache import ForecastCache
+from src.weather import WeatherFetcher
+
+CLEAR = {'list': [{'weather': [{'description': 'clear sky'}]}] * 4}
+RAIN = {'list': [{'weather': [{'description': 'light rain'}]}] * 4}
+
+
+class FakeFetcher(WeatherFetcher):
+    def __init__(self, cache: ForecastCache, forecast=CLEAR):
+        super().__init__('', cache=cache)
+        self.forecast = forecast
+        self.calls = []
+
+    def fetch_weather(self, lat, lon):
+        self.calls.append((lat, lon))
+        return self.forecast
+
+
+def soil_sensor(sensor_id: str, value: float = 40) -> dict:
+    return {'sensor_id': sensor_id, 'type': 'soil_moisture', 'value': value, 'min_value': 0, 'max_value': 100}
+
+
+def actuator(actuator_id: str, actuator_type: str, consumption: float) -> dict:
+    return {
+        'actuator_id': actuator_id, 'type': actuator_type, 'consumption': consumption,
+        'measurement': 'l', 'min_value': 0, 'max_value': 100
+    }
+
+
+def field(field_id: str, sensors=None, threshold: float = 30) -> dict:
+    return {
+        'field_id': field_id, 'soil_moisture_threshold': threshold, 'area': 100, 'soil_depth': 0.3,
+        'sensors': sensors if sensors is not None else [soil_sensor(f'{field_id}_s{index}') for index in range(3)],
+        'actuators': [actuator(f'{field_id}_a1', 'sprinkler', 10)]
+    }
+
+
+def zone(zone_id: str, fields=None, latitude: float = 42.35, longitude: float = 13.4) -> dict:
+    return {
+        'zone_id': zone_id, 'latitude': latitude, 'longitude': longitude,
+        'fields': fields if fields is not None else [field('f1')]
+    }
+
+
+class Message:
+    def __init__(self, topic: str, payload):
+        self.topic = topic
+        self.payload = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+
+
+def published(analyzer, prefix: str = 'analyzer/') -> list:
+    """
+    Decoded payloads the analyzer published, as `(topic, payload)` pairs.
+    """
+    return [
+        (call.args[0], json.loads(call.args[1]))
+        for call in analyzer.mqtt_client.publish.call_args_list
+        if call.args[0].startswith(prefix)
+    ]
+
+
+def send(analyzer, topic: str, payload) -> None:
+    analyzer._on_message(None, None, Message(topic, payload))
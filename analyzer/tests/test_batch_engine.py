@@ -0,0 +1,44 @@
+import random
+
+
+from src.batch_engine import BatchDecisionEngine
+from src.decision import TRIGGER_IRRIGATION
+from src.field import Field
+from support import field, send, soil_sensor, zone
+
+
+def test_batch_decisions_match_the_scalar_path(make_analyzer):
+    random.seed(3)
+    zones = [
+        zone(f'z{zone_index}', [
+            field(f'f{field_index}', [soil_sensor('s0', random.uniform(10, 50))], threshold=random.uniform(20, 40))
+            for field_index in range(10)
+        ], latitude=zone_index)
+        for zone_index in range(5)
+    ]
+    scalar = make_analyzer(zones, HYSTERESIS_BAND=1.0)
+    batch = make_analyzer(zones, HYSTERESIS_BAND=1.0, BATCH_ENGINE_ENABLED=True)
+    keys = [(zone_data['zone_id'], field_data['field_id']) for zone_data in zones for field_data in zone_data['fields']]
+
+    for _ in range(3):
+        for zone_id, field_id in keys:
+            value = random.uniform(10, 50)
+            for analyzer in (scalar, batch):
+                send(analyzer, f'zone/{zone_id}/field/{field_id}/sensor/s0/soil_moisture', {'value': value})
+        expected = {}
+        for key in keys:
+            result = scalar.analyze_data(*key)
+            scalar.decisions.should_publish(key, result['action'])
+            expected[key] = result
+        assert dict(batch.batch_engine.evaluate(keys, {})) == expected
+
+
+def test_slots_survive_growing_the_arrays():
+    engine = BatchDecisionEngine(0.25, initial_capacity=2)
+    for index in range(5):
+        engine.add_field('z1', Field(f'f{index}', 30, 100, 0.3), moisture=20)
+    engine.update_moisture(('z1', 'f0'), 40)
+    results = dict(engine.evaluate([('z1', f'f{index}') for index in range(5)], {}))
+    assert len(engine.moisture) == 8
+    assert results[('z1', 'f0')]['action'] != TRIGGER_IRRIGATION
+    assert all(results[('z1', f'f{index}')]['action'] == TRIGGER_IRRIGATION for index in range(1, 5))
@@ -0,0 +1,30 @@
+from unittest import mock
+
+import pytest
+
+from support import field, published, send, soil_sensor, zone
+
+
+def test_field_batch_is_evaluated_once(make_analyzer):
+    analyzer = make_analyzer([zone('z1', [field('f1', [soil_sensor('s0'), soil_sensor('s1')])])])
+    with mock.patch.object(analyzer, '_evaluate_field', wraps=analyzer._evaluate_field) as evaluate:
+        send(analyzer, 'zone/z1/field/f1/sensors', {'readings': [
+            {'sensor_id': 's0', 'value': 20}, {'sensor_id': 's1', 'value': 24}
+        ]})
+    evaluate.assert_called_once_with('z1', 'f1')
+    assert analyzer.zones['z1'].get_field('f1').get_sensor('s1').value == 24
+    [(topic, result)] = published(analyzer)
+    assert topic == 'analyzer/zone/z1/field/f1'
+    # Both readings count: 8 points below the threshold
+    assert result['water_need'] == pytest.approx(600)
+
+
+def test_zone_batch_skips_unknown_sensors(make_analyzer):
+    analyzer = make_analyzer([zone('z1', [field('f1', [soil_sensor('s0')]), field('f2', [soil_sensor('s0')])])])
+    send(analyzer, 'zone/z1/sensors', {'readings': [
+        {'field_id': 'f1', 'sensor_id': 's0', 'value': 20},
+        {'field_id': 'f2', 'sensor_id': 's0', 'value': 50},
+        {'field_id': 'f2', 'sensor_id': 'missing', 'value': 10}
+    ]})
+    assert sorted(topic for topic, _ in published(analyzer)) == ['analyzer/zone/z1/field/f1', 'analyzer/zone/z1/field/f2']
+    assert analyzer.zones['z1'].get_field('f2').get_sensor('s0').value == 50
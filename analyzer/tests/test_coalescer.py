@@ -0,0 +1,47 @@
+from src.coalescer import FieldCoalescer
+from support import published, send
+
+
+def test_field_is_flushed_once_every_expected_sensor_reported():
+    flushed = []
+    coalescer = FieldCoalescer(60, flushed.extend)
+    coalescer.set_expected_sensors('z1', 'f1', {'s0', 's1'})
+
+    assert not coalescer.mark('z1', 'f1', 's0')
+    assert not coalescer.mark('z1', 'f1', 's0')
+    assert coalescer.mark('z1', 'f1', 's1')
+    assert flushed == [('z1', 'f1')]
+    assert coalescer.pending() == 0
+
+
+def test_partial_burst_is_flushed_when_its_window_elapses():
+    flushed = []
+    coalescer = FieldCoalescer(2.0, flushed.extend)
+    coalescer.set_expected_sensors('z1', 'f1', {'s0', 's1'})
+    coalescer.mark('z1', 'f1', 's0')
+
+    assert coalescer.flush_due() == []
+    assert coalescer.flush_due(now=float('inf')) == [('z1', 'f1')]
+    assert flushed == [('z1', 'f1')]
+
+
+def test_unexpected_sensor_does_not_dirty_the_field():
+    coalescer = FieldCoalescer(2.0, lambda keys: None)
+    coalescer.set_expected_sensors('z1', 'f1', {'s0'})
+
+    assert not coalescer.mark('z1', 'f1', 'temperature')
+    assert coalescer.pending() == 0
+
+
+def test_analyzer_evaluates_a_burst_once(make_analyzer):
+    analyzer = make_analyzer(COALESCE_ENABLED=True, COALESCE_WINDOW=60)
+
+    for index, value in enumerate((20, 21)):
+        send(analyzer, f'zone/z1/field/f1/sensor/f1_s{index}/soil_moisture', {'value': value})
+    assert published(analyzer) == []
+
+    send(analyzer, 'zone/z1/field/f1/sensor/f1_s2/soil_moisture', {'value': 22})
+    results = published(analyzer)
+    assert len(results) == 1
+    assert results[0][0] == 'analyzer/zone/z1/field/f1'
+    assert results[0][1]['action'] == 'trigger_irrigation'
@@ -0,0 +1,42 @@
+import pytest
+
+from src.decision import STOP_IRRIGATION, TRIGGER_IRRIGATION, DecisionTracker
+from support import field, published, send, soil_sensor, zone
+
+TOPIC = 'zone/z1/field/f1/sensor/s0/soil_moisture'
+
+
+def test_unchanged_decision_waits_for_the_heartbeat():
+    tracker = DecisionTracker(heartbeat_interval=300)
+    key = ('z1', 'f1')
+    assert tracker.should_publish(key, TRIGGER_IRRIGATION, now=0)
+    assert not tracker.should_publish(key, TRIGGER_IRRIGATION, now=100)
+    assert tracker.should_publish(key, STOP_IRRIGATION, now=101)
+    assert tracker.should_publish(key, STOP_IRRIGATION, now=401)
+
+
+def test_band_moves_the_threshold_away_from_the_last_decision():
+    tracker = DecisionTracker(hysteresis_band=2)
+    key = ('z1', 'f1')
+    assert tracker.effective_threshold(key, 30) == 30
+    tracker.should_publish(key, TRIGGER_IRRIGATION)
+    assert tracker.effective_threshold(key, 30) == 32
+    tracker.should_publish(key, STOP_IRRIGATION)
+    assert tracker.effective_threshold(key, 30) == 28
+
+
+def test_analyzer_publishes_only_decision_changes(make_analyzer):
+    analyzer = make_analyzer([zone('z1', [field('f1', [soil_sensor('s0')])])])
+    for value in (25, 24, 23, 35, 36):
+        send(analyzer, TOPIC, {'value': value})
+    assert [result['action'] for _, result in published(analyzer)] == [TRIGGER_IRRIGATION, STOP_IRRIGATION]
+
+
+def test_default_decisions_match_the_plain_threshold(make_analyzer):
+    analyzer = make_analyzer([zone('z1', [field('f1', [soil_sensor('s0')])])])
+    send(analyzer, TOPIC, {'value': 30})
+    send(analyzer, TOPIC, {'value': 30.5})
+    triggered, stopped = [result for _, result in published(analyzer)]
+    assert triggered['action'] == TRIGGER_IRRIGATION
+    assert triggered['water_need'] == pytest.approx(0)
+    assert stopped['action'] == STOP_IRRIGATION
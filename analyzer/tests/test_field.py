@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from src import field as field_module
+from src.field import Field
+from src.sensor import SensorFactory
+
+SOIL = 'soil_moisture'
+
+
+def soil_field(values):
+    field = Field('f1', 30, 100, 0.3)
+    for index, value in enumerate(values):
+        field.add_sensor(SensorFactory.create_sensor(
+            sensor_id=f's{index}', type=SOIL, zone=None, field=field, min_value=0, max_value=100, value=value
+        ))
+    return field
+
+
+def test_aggregates_follow_every_update():
+    random.seed(7)
+    field = soil_field([random.uniform(0, 100) for _ in range(20)])
+    sensors = list(field.sensors[SOIL].values())
+    for _ in range(2000):
+        random.choice(sensors).set_value(random.choice([None, random.uniform(0, 100)]))
+        values = [sensor.value for sensor in sensors if sensor.value is not None]
+        if values:
+            assert field.get_average_sensor_value(SOIL) == pytest.approx(sum(values) / len(values))
+            assert field.get_min_sensor_value(SOIL) == min(values)
+            assert field.get_max_sensor_value(SOIL) == max(values)
+        else:
+            assert field.get_average_sensor_value(SOIL) is None
+
+
+def test_removed_sensor_leaves_the_aggregate():
+    field = soil_field([10, 50, 90])
+    field.remove_sensor('s2')
+    assert field.get_average_sensor_value(SOIL) == 30
+    assert field.get_max_sensor_value(SOIL) == 50
+
+
+def test_sum_is_rebuilt_after_the_rebuild_interval(monkeypatch):
+    monkeypatch.setattr(field_module, 'REBUILD_INTERVAL', 4)
+    field = soil_field([0.1, 0.2])
+    sensor = field.sensors[SOIL]['s0']
+    for value in (0.3, 0.7, 0.1, 0.3):
+        sensor.set_value(value)
+    aggregate = field._aggregates[SOIL]
+    assert aggregate.updates == 0
+    assert aggregate.sum == 0.3 + 0.2
@@ -0,0 +1,48 @@
+from src.forecast_cache import ForecastCache
+from src.weather import WeatherRefresher
+from support import CLEAR, FakeFetcher
+
+
+def test_zones_in_the_same_cell_share_one_forecast(tmp_path):
+    fetcher = FakeFetcher(ForecastCache(str(tmp_path / 'weather.sqlite'), cell_size=0.1))
+    refresher = WeatherRefresher(fetcher)
+    refresher.track(42.351, 13.401)
+    refresher.track(42.359, 13.409)
+
+    refresher.refresh_due()
+    assert len(fetcher.calls) == 1
+    assert refresher.get_weather(42.359, 13.409) == CLEAR
+
+
+def test_forecast_survives_a_restart(tmp_path):
+    path = str(tmp_path / 'weather.sqlite')
+    first = FakeFetcher(ForecastCache(path))
+    refresher = WeatherRefresher(first)
+    refresher.track(42.35, 13.4)
+    refresher.refresh_due()
+    first.cache.close()
+
+    second = FakeFetcher(ForecastCache(path))
+    restarted = WeatherRefresher(second)
+    restarted.track(42.35, 13.4)
+    restarted.refresh_due()
+    assert second.calls == []
+    assert restarted.get_weather(42.35, 13.4) == CLEAR
+    assert second.cache.stats()['hits'] == 1
+
+
+def test_message_lookups_and_refresh_retries_are_counted_apart(tmp_path):
+    fetcher = FakeFetcher(ForecastCache(str(tmp_path / 'weather.sqlite')), forecast=None)
+    refresher = WeatherRefresher(fetcher)
+    refresher.track(42.35, 13.4)
+    for _ in range(3):
+        refresher.refresh_due()
+    assert refresher.get_weather(42.35, 13.4) is None
+
+    fetcher.forecast = CLEAR
+    refresher.refresh_due()
+    refresher.get_weather(42.35, 13.4)
+    refresher.get_weather(42.35, 13.4)
+    stats = fetcher.cache.stats()
+    assert (stats['hits'], stats['misses'], stats['retries']) == (2, 1, 3)
+    assert stats['hit_ratio'] == 2 / 3
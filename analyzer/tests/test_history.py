@@ -0,0 +1,38 @@
+import pytest
+
+from src.history import HistoryStore, HistoryTier
+
+TIERS = ((1, 60), (60, 60))
+KEY = ('z1', 'f1', 's0')
+
+
+def test_storage_never_grows_past_the_budget():
+    bytes_per_slot = sum(HistoryTier.bytes_per_slot(capacity) for _, capacity in TIERS)
+    history = HistoryStore(10 * bytes_per_slot, TIERS, initial_slots=2)
+    for index in range(25):
+        history.record(('z1', 'f1', f's{index}'), 1.0, now=0)
+    assert history.sensor_count == 10
+    assert history.nbytes <= 10 * bytes_per_slot
+
+    history.release(('z1', 'f1', 's0'))
+    history.record(('z1', 'f1', 's99'), 1.0, now=0)
+    assert history.sensor_count == 10
+
+
+def test_slope_and_ewma_over_readings():
+    history = HistoryStore(2**20, TIERS)
+    for second in range(30):
+        history.record(KEY, 50 - 0.1 * second, now=second)
+    assert history.slope(KEY, 20, now=29.5) == pytest.approx(-0.1)
+    assert history.ewma(KEY, half_life=1000, window=10, now=29.5) == pytest.approx(47.55, abs=0.05)
+    assert history.percentile(KEY, 50, 60, now=29.5) == pytest.approx(48.55, abs=0.05)
+
+
+def test_long_windows_read_the_coarser_tier():
+    history = HistoryStore(2**20, TIERS)
+    for minute in range(10):
+        for second in range(0, 60, 10):
+            history.record(KEY, minute, now=minute * 60 + second)
+    ages, values = history.window(KEY, 600, now=599)
+    assert list(values) == list(range(10))
+    assert history.slope(KEY, 600, now=599) == pytest.approx(1 / 60)
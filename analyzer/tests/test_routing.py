@@ -0,0 +1,22 @@
+from src.routing import RoutingTable
+from src.zone import ZoneService
+from support import field, soil_sensor, zone
+
+
+def test_routes_follow_the_indexed_zones():
+    zone_service = ZoneService('http://backend', model_only=True)
+    routes = RoutingTable('analyzer', '/msgpack')
+    routes.index_zone(zone_service.parse_zone(zone('z1', [field('f1', [soil_sensor('s0'), soil_sensor('s1')])])))
+    routes.index_zone(zone_service.parse_zone(zone('z2')))
+
+    route = routes.get('zone/z1/field/f1/sensor/s1/soil_moisture')
+    assert (route.key, route.sensor.sensor_id) == (('z1', 'f1'), 's1')
+    assert route.output_topic == 'analyzer/zone/z1/field/f1/msgpack'
+    assert routes.sensor_route('z1', 'f1', 's0').output_topic is route.output_topic
+    assert routes.route_count == 5
+
+    routes.index_zone(zone_service.parse_zone(zone('z1', [field('f1', [soil_sensor('s0')])])))
+    assert routes.get('zone/z1/field/f1/sensor/s1/soil_moisture') is None
+    routes.remove_zone('z2')
+    assert routes.route_count == 1
+    assert routes.sensor_route('z2', 'f1', 'f1_s0') is None
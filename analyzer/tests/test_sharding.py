@@ -0,0 +1,40 @@
+from unittest import mock
+
+from src.sharding import ShardMembership, rendezvous_owner
+from src.zone import ZoneService
+from support import Message, zone
+
+ZONE_IDS = [f'z{index}' for index in range(200)]
+
+
+def test_only_the_zones_of_a_leaving_member_move():
+    before = {zone_id: rendezvous_owner(zone_id, ['a', 'b', 'c']) for zone_id in ZONE_IDS}
+    after = {zone_id: rendezvous_owner(zone_id, ['a', 'b']) for zone_id in ZONE_IDS}
+    assert set(before.values()) == {'a', 'b', 'c'}
+    for zone_id in ZONE_IDS:
+        if before[zone_id] != 'c':
+            assert after[zone_id] == before[zone_id]
+
+
+def test_membership_follows_presence_messages():
+    membership = ShardMembership('a', 'cluster/analyzer/members', lambda members: None)
+    with mock.patch.object(membership, '_schedule_rebalance') as schedule:
+        membership._on_member_message(None, None, Message('cluster/analyzer/members/b', {'instance_id': 'b'}))
+        assert membership.members_snapshot() == {'a', 'b'}
+        membership._on_member_message(None, None, Message('cluster/analyzer/members/b', b''))
+        assert membership.members_snapshot() == {'a'}
+        assert schedule.call_count == 2
+
+
+def test_rebalance_loads_only_the_owned_zones(make_analyzer):
+    analyzer = make_analyzer([], SHARDING_ENABLED=True, INSTANCE_ID='a')
+    zone_ids = [f'z{index}' for index in range(20)]
+    zones = {zone_id: ZoneService('http://backend', model_only=True).parse_zone(zone(zone_id)) for zone_id in zone_ids}
+    with mock.patch.object(ZoneService, 'get_zone_ids', return_value=zone_ids), \
+            mock.patch.object(ZoneService, 'get_zone', side_effect=zones.get):
+        analyzer._rebalance_zones({'a', 'b'})
+        owned = {zone_id for zone_id in zone_ids if rendezvous_owner(zone_id, ['a', 'b']) == 'a'}
+        assert set(analyzer.zones) == owned
+
+        analyzer._rebalance_zones({'a'})
+        assert set(analyzer.zones) == set(zone_ids)
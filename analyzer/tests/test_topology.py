@@ -0,0 +1,68 @@
+import copy
+from unittest import mock
+
+from irrigation_common.topology import TopologyReloader
+from src.decision import STOP_IRRIGATION, TRIGGER_IRRIGATION
+from support import field, published, send, soil_sensor, zone
+
+TOPIC = 'zone/z1/field/f1/sensor/s0/soil_moisture'
+
+
+def test_threshold_update_keeps_sensor_readings(make_analyzer):
+    payload = [zone('z1', [field('f1', [soil_sensor('s0')], threshold=30)])]
+    analyzer = make_analyzer(payload)
+    sensor = analyzer.zones['z1'].get_field('f1').get_sensor('s0')
+    send(analyzer, TOPIC, {'value': 35})
+
+    payload = copy.deepcopy(payload)
+    payload[0]['fields'][0]['soil_moisture_threshold'] = 40
+    analyzer._apply_topology(payload)
+
+    assert analyzer.zones['z1'].get_field('f1').get_sensor('s0') is sensor
+    assert sensor.value == 35
+    send(analyzer, TOPIC, {'value': 35})
+    assert [result['action'] for _, result in published(analyzer)] == [STOP_IRRIGATION, TRIGGER_IRRIGATION]
+
+
+def test_added_and_removed_sensors_are_routed(make_analyzer):
+    payload = [zone('z1', [field('f1', [soil_sensor('s0')])])]
+    analyzer = make_analyzer(payload)
+
+    payload = copy.deepcopy(payload)
+    payload[0]['fields'][0]['sensors'] = [soil_sensor('s1')]
+    payload[0]['fields'].append(field('f2', [soil_sensor('s2')]))
+    analyzer._apply_topology(payload)
+
+    assert analyzer.routes.get(TOPIC) is None
+    assert analyzer.routes.get('zone/z1/field/f1/sensor/s1/soil_moisture').sensor.sensor_id == 's1'
+    send(analyzer, 'zone/z1/field/f2/sensor/s2/soil_moisture', {'value': 20})
+    assert published(analyzer)[-1][0] == 'analyzer/zone/z1/field/f2'
+
+
+def test_only_changed_zones_are_updated(make_analyzer):
+    payload = [zone('z1'), zone('z2')]
+    analyzer = make_analyzer(payload)
+    payload = copy.deepcopy(payload)
+    payload[1]['fields'][0]['soil_moisture_threshold'] = 45
+    del payload[0]
+    with mock.patch.object(analyzer, '_update_zone', wraps=analyzer._update_zone) as update_zone:
+        analyzer._apply_topology(copy.deepcopy(payload))
+        analyzer._apply_topology(copy.deepcopy(payload))
+    assert [call.args[0].zone_id for call in update_zone.call_args_list] == ['z2']
+    assert set(analyzer.zones) == {'z2'}
+    assert analyzer.routes.get('zone/z1/field/f1/sensor/f1_s0/soil_moisture') is None
+
+
+def test_reloader_applies_only_new_revisions():
+    zone_service = mock.Mock()
+    changes = []
+    reloader = TopologyReloader(zone_service, changes.append, etag='"v1"')
+
+    zone_service.fetch_zones.return_value = (None, '"v1"')
+    assert not reloader.poll()
+    zone_service.fetch_zones.return_value = ([zone('z1')], '"v2"')
+    assert reloader.poll()
+
+    assert [call.args for call in zone_service.fetch_zones.call_args_list] == [('"v1"',), ('"v1"',)]
+    assert reloader.etag == '"v2"'
+    assert changes == [[zone('z1')]]
@@ -0,0 +1,48 @@
+from src.forecast_cache import ForecastCache
+from src.weather import CircuitBreaker, WeatherRefresher
+from support import CLEAR, FakeFetcher
+
+
+def test_get_weather_never_calls_the_provider(tmp_path):
+    fetcher = FakeFetcher(ForecastCache(str(tmp_path / 'weather.sqlite')))
+    refresher = WeatherRefresher(fetcher)
+
+    assert refresher.get_weather(42.35, 13.4) is None
+    assert fetcher.calls == []
+
+    assert refresher.refresh_due() == 1
+    assert refresher.get_weather(42.35, 13.4) == CLEAR
+    assert len(fetcher.calls) == 1
+
+
+def test_stale_forecast_is_served_while_the_provider_fails(tmp_path):
+    fetcher = FakeFetcher(ForecastCache(str(tmp_path / 'weather.sqlite')))
+    refresher = WeatherRefresher(fetcher, ttl=0, refresh_margin=0, max_stale=3600)
+    refresher.track(42.35, 13.4)
+    refresher.refresh_due()
+
+    fetcher.forecast = None
+    refresher.refresh_due()
+    assert len(fetcher.calls) == 2
+    assert refresher.get_weather(42.35, 13.4) == CLEAR
+
+
+def test_circuit_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_half_open_circuit_lets_a_single_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
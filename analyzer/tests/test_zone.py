@@ -0,0 +1,31 @@
+import threading
+from unittest import mock
+
+from src.actuator import ActuatorRecord
+from src.zone import ZoneService
+from support import field, zone
+
+
+def test_model_only_parse_opens_no_connections():
+    payload = zone('z1', [field(f'f{index}') for index in range(5)])
+    threads = threading.active_count()
+    with mock.patch('paho.mqtt.client.Client') as client:
+        parsed = ZoneService('http://backend', model_only=True).parse_zone(payload)
+    client.assert_not_called()
+    assert threading.active_count() == threads
+
+    actuators = [
+        actuator for field in parsed.fields.values()
+        for by_id in field.actuators.values() for actuator in by_id.values()
+    ]
+    assert len(actuators) == 5
+    assert all(isinstance(actuator, ActuatorRecord) for actuator in actuators)
+    assert (actuators[0].zone_id, actuators[0].field_id, actuators[0].consumption) == ('z1', 'f0', 10)
+
+
+def test_unknown_actuator_keys_are_ignored():
+    payload = zone('z1', [field('f1')])
+    payload['fields'][0]['actuators'][0]['installed_at'] = '2024-05-01'
+    parsed = ZoneService('http://backend', model_only=True).parse_zone(payload)
+    [actuator] = parsed.get_field('f1').actuators['sprinkler'].values()
+    assert actuator.actuator_id == 'f1_a1'
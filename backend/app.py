@@ -28,6 +28,16 @@ preferences_collection = db[PREFERENCES_COLLECTION_NAME]
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def conditional_json(data):
+    """
+    JSON response tagged with an ETag of its body, answered with 304 Not Modified
+    when the client already holds the same version, so pollers can detect
+    topology changes without downloading it again.
+    """
+    response = jsonify(data)
+    response.add_etag()
+    return response.make_conditional(request)
+
 
 # Routes
 
@@ -39,11 +49,31 @@ def health():
 def get_zones():
     try:
         zones = list(zones_collection.find({}, {'_id': 0}))
-        return jsonify(zones)
+        return conditional_json(zones)
     except Exception as e:
         logger.error(f"Error fetching zones: {e}")
         return jsonify({"error": "Internal Server Error"}), 500
 
+@app.route('/zones/ids', methods=['GET'])
+def get_zone_ids():
+    try:
+        zone_ids = zones_collection.distinct('zone_id')
+        return conditional_json(zone_ids)
+    except Exception as e:
+        logger.error(f"Error fetching zone ids: {e}")
+        return jsonify({"error": "Internal Server Error"}), 500
+
+@app.route('/zones/<zone_id>', methods=['GET'])
+def get_zone(zone_id):
+    try:
+        zone = zones_collection.find_one({'zone_id': zone_id}, {'_id': 0})
+        if zone:
+            return conditional_json(zone)
+        return jsonify({}), 404
+    except Exception as e:
+        logger.error(f"Error fetching zone: {e}")
+        return jsonify({"error": "Internal Server Error"}), 500
+
 @app.route('/zones', methods=['POST'])
 def create_zone():
     try:
@@ -0,0 +1,449 @@
+"""
+Throughput benchmark of the Analyzer -> Planner -> Executor pipeline.
+
+All three services run in one process against an in-memory MQTT broker, with
+the backend and the weather provider stubbed out. Synthetic sensor readings
+are injected at a fixed rate (or as fast as possible with --rate 0), and for
+each topology size the sustained message rate, the p50/p99 latency from the
+scheduled injection time to the end of its downstream processing, and the
+peak RSS are reported. Every scenario runs in a fresh interpreter, so RSS is
+not carried over from smaller topologies.
+
+Run from the repository root:
+
+    python -m benchmarks.pipeline --sensors 10 1000 100000 --output benchmarks/pipeline_baseline.json
+    python -m benchmarks.pipeline --compare benchmarks/pipeline_baseline.json
+
+With --compare the run exits with status 1 when throughput dropped or p99
+latency grew by more than --tolerance against the baseline.
+"""
+import argparse
+import copy
+import importlib
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+from collections import deque
+from pathlib import Path
+from time import perf_counter, sleep
+from typing import Dict, List, Optional
+from unittest import mock
+
+from paho.mqtt.client import topic_matches_sub
+
+ROOT = Path(__file__).resolve().parent.parent
+# The services import the shared modules as `irrigation_common`
+sys.path.insert(0, str(ROOT / 'common'))
+SENSORS_PER_FIELD = 10
+SOIL_SENSORS_PER_FIELD = 5
+FIELDS_PER_ZONE = 100
+FORECAST = {'list': [{'weather': [{'description': 'clear sky'}]}] * 4}
+
+
+def load_service(name: str) -> str:
+    """
+    Import `<name>/src` as a package called `<name>_src`, so that the `src`
+    packages of several services can live in the same interpreter.
+    """
+    package = f"{name.replace('-', '_')}_src"
+    if package not in sys.modules:
+        path = ROOT / name / 'src'
+        spec = importlib.util.spec_from_file_location(
+            package, path / '__init__.py', submodule_search_locations=[str(path)]
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[package] = module
+        spec.loader.exec_module(module)
+    return package
+
+
+class FakeMessage:
+    __slots__ = ('topic', 'payload', 'qos', 'retain')
+
+    def __init__(self, topic: str, payload: bytes, qos: int = 0, retain: bool = False):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+
+
+class FakeBroker:
+    """
+    Queues published messages and delivers them to matching subscribers when
+    pumped, so a message published from a callback is handled after it returns,
+    as with a real broker.
+    """
+
+    def __init__(self):
+        self.clients: List['FakeClient'] = []
+        self.queue = deque()
+        self.published: Dict[str, int] = {}
+        self._subscribers: Dict[str, list] = {}
+
+    def invalidate(self) -> None:
+        self._subscribers.clear()
+
+    def subscribers(self, topic: str) -> list:
+        subscribers = self._subscribers.get(topic)
+        if subscribers is None:
+            subscribers = []
+            for client in self.clients:
+                callback = next(
+                    (callback for pattern, callback in client.callbacks.items() if topic_matches_sub(pattern, topic)),
+                    None
+                )
+                if callback is None and any(topic_matches_sub(pattern, topic) for pattern in client.subscriptions):
+                    callback = client.on_message
+                if callback is not None:
+                    subscribers.append((client, callback))
+            self._subscribers[topic] = subscribers
+        return subscribers
+
+    def publish(self, topic: str, payload) -> None:
+        if isinstance(payload, str):
+            payload = payload.encode()
+        family = topic.split('/', 1)[0]
+        self.published[family] = self.published.get(family, 0) + 1
+        self.queue.append(FakeMessage(topic, payload))
+
+    def pump(self) -> int:
+        delivered = 0
+        while self.queue:
+            message = self.queue.popleft()
+            for client, callback in self.subscribers(message.topic):
+                callback(client, None, message)
+                delivered += 1
+        return delivered
+
+
+class FakeClient:
+    """
+    The subset of `paho.mqtt.client.Client` used by the services.
+    """
+
+    broker: FakeBroker = None
+
+    def __init__(self, *args, **kwargs):
+        self.on_connect = None
+        self.on_message = None
+        self.on_disconnect = None
+        self.subscriptions = set()
+        self.callbacks = {}
+        self.broker.clients.append(self)
+
+    def connect(self, host, port=1883, keepalive=60):
+        if self.on_connect:
+            self.on_connect(self, None, {}, 0)
+        return 0
+
+    def subscribe(self, topic, qos=0):
+        topics = [entry[0] for entry in topic] if isinstance(topic, list) else [topic]
+        self.subscriptions.update(topics)
+        self.broker.invalidate()
+        return 0, 0
+
+    def unsubscribe(self, topic):
+        topics = topic if isinstance(topic, list) else [topic]
+        self.subscriptions.difference_update(topics)
+        self.broker.invalidate()
+        return 0, 0
+
+    def message_callback_add(self, pattern, callback):
+        self.callbacks[pattern] = callback
+        self.broker.invalidate()
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.broker.publish(topic, payload if payload is not None else b'')
+
+    def will_set(self, *args, **kwargs):
+        pass
+
+    def loop_forever(self, *args, **kwargs):
+        pass
+
+    def loop_start(self):
+        pass
+
+    def loop_stop(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+
+def build_topology(sensor_count: int) -> List[dict]:
+    zones = []
+    field_count = max(1, sensor_count // SENSORS_PER_FIELD)
+    for field_index in range(field_count):
+        zone_index = field_index // FIELDS_PER_ZONE
+        if zone_index == len(zones):
+            zones.append({
+                'zone_id': f'zone_{zone_index}',
+                'latitude': 42.0 + zone_index * 0.05,
+                'longitude': 13.0,
+                'fields': []
+            })
+        sensors = []
+        for sensor_index in range(min(SENSORS_PER_FIELD, sensor_count)):
+            sensor_type = 'soil_moisture' if sensor_index < SOIL_SENSORS_PER_FIELD else 'temperature'
+            sensors.append({
+                'sensor_id': f'sensor_{sensor_index}',
+                'type': sensor_type,
+                'value': 40,
+                'min_value': 0,
+                'max_value': 100
+            })
+        zones[zone_index]['fields'].append({
+            'field_id': f'field_{field_index}',
+            'soil_moisture_threshold': 30,
+            'area': 100,
+            'soil_depth': 0.3,
+            'sensors': sensors,
+            'actuators': [{
+                'actuator_id': 'actuator_0',
+                'type': 'sprinkler',
+                'consumption': 300,
+                'measurement': 'lpm',
+                'min_value': 0,
+                'max_value': 100
+            }]
+        })
+    return zones
+
+
+def parse_overrides(options: List[str]) -> dict:
+    overrides = {}
+    for option in options:
+        key, value = option.split('=', 1)
+        if value.lower() in ('true', 'false'):
+            overrides[key] = value.lower() == 'true'
+        else:
+            try:
+                overrides[key] = int(value)
+            except ValueError:
+                try:
+                    overrides[key] = float(value)
+                except ValueError:
+                    overrides[key] = value
+    return overrides
+
+
+def build_pipeline(topology: List[dict], analyzer_options: dict, workdir: str, codec: str = 'json'):
+    analyzer_package = load_service('analyzer')
+    planner_package = load_service('planner')
+    executor_package = load_service('executor')
+    analyzer_module = importlib.import_module(f'{analyzer_package}.analyzer')
+    analyzer_config = importlib.import_module(f'{analyzer_package}.config')
+    analyzer_zone = importlib.import_module(f'{analyzer_package}.zone')
+    planner_module = importlib.import_module(f'{planner_package}.planner')
+    planner_config = importlib.import_module(f'{planner_package}.config')
+    executor_module = importlib.import_module(f'{executor_package}.executor')
+    executor_config = importlib.import_module(f'{executor_package}.config')
+    executor_zone = importlib.import_module(f'{executor_package}.zone')
+
+    broker = FakeBroker()
+    FakeClient.broker = broker
+    options = {
+        'WEATHER_CACHE_PATH': os.path.join(workdir, 'weather_cache.sqlite'),
+        'TOPOLOGY_RELOAD_INTERVAL': 0,
+        'METRICS_PORT': 0,
+        'COALESCE_ENABLED': False,
+        'PAYLOAD_CODEC': codec,
+        **analyzer_options
+    }
+    with mock.patch('paho.mqtt.client.Client', FakeClient), \
+            mock.patch.object(analyzer_zone.ZoneService, 'fetch_zones', lambda self, etag=None: (copy.deepcopy(topology), '"bench"')), \
+            mock.patch.object(executor_zone.ZoneService, 'fetch_zones', lambda self, etag=None: (copy.deepcopy(topology), '"bench"')):
+        analyzer = analyzer_module.Analyzer(analyzer_config.Config(
+            MQTT_BROKER_URL='broker:1883', BACKEND_URL='http://backend', WEATHER_API_KEY='', **options
+        ))
+        analyzer.weather_fetcher.fetch_weather = lambda lat, lon: FORECAST
+        analyzer.weather_refresher.refresh_due()
+        analyzer._setup_mqtt_client()
+        planner = planner_module.Planner(planner_config.Config(
+            MQTT_BROKER_URL='broker:1883', METRICS_PORT=0, PAYLOAD_CODEC=codec,
+            SNAPSHOT_PATH=os.path.join(workdir, 'planner_state.sqlite')
+        ))
+        planner.run()
+        executor = executor_module.Executor(executor_config.Config(
+            MQTT_BROKER_URL='broker:1883', BACKEND_URL='http://backend', METRICS_PORT=0, PAYLOAD_CODEC=codec,
+            SNAPSHOT_PATH=os.path.join(workdir, 'executor_state.sqlite'), TOPOLOGY_RELOAD_INTERVAL=0
+        ))
+        executor.run()
+    return broker, (analyzer, planner, executor)
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def run_scenario(
+    sensor_count: int, messages: int, rate: float, analyzer_options: dict, log_level: str, codec: str = 'json',
+    telemetry: str = 'sensor'
+) -> dict:
+    logging.disable(getattr(logging, log_level.upper()))
+    random.seed(sensor_count)
+    topology = build_topology(sensor_count)
+    with tempfile.TemporaryDirectory() as workdir:
+        start = perf_counter()
+        broker, services = build_pipeline(topology, analyzer_options, workdir, codec)
+        startup_seconds = perf_counter() - start
+        # Readings are encoded like the simulator would with the same codec
+        reading_codec = services[0].codec
+        if telemetry == 'field':
+            # One message carries the readings of every sensor of a field
+            topics = [
+                f"zone/{zone['zone_id']}/field/{field['field_id']}/sensors{reading_codec.suffix}"
+                for zone in topology for field in zone['fields']
+            ]
+            sensors = topology[0]['fields'][0]['sensors']
+            payloads = [
+                reading_codec.encode({'readings': [
+                    {'sensor_id': sensor['sensor_id'], 'type': sensor['type'], 'value': round(random.uniform(10, 60), 2)}
+                    for sensor in sensors
+                ]})
+                for _ in range(1024)
+            ]
+            readings_per_message = len(sensors)
+        else:
+            topics = [
+                f"zone/{zone['zone_id']}/field/{field['field_id']}/sensor/{sensor['sensor_id']}/{sensor['type']}"
+                f"{reading_codec.suffix}"
+                for zone in topology for field in zone['fields'] for sensor in field['sensors']
+            ]
+            payloads = [
+                reading_codec.encode({'value': round(random.uniform(10, 60), 2)})
+                for _ in range(1024)
+            ]
+            readings_per_message = 1
+
+        latencies = []
+        delivered = 0
+        interval = 1 / rate if rate > 0 else 0.0
+        start = perf_counter()
+        for index in range(messages):
+            now = perf_counter()
+            # Unthrottled runs measure each message from its own injection
+            scheduled = start + index * interval if interval else now
+            if now < scheduled:
+                sleep(scheduled - now)
+            broker.publish(random.choice(topics), payloads[index % len(payloads)])
+            delivered += broker.pump()
+            latencies.append(perf_counter() - scheduled)
+        elapsed = perf_counter() - start
+
+    latencies.sort()
+    return {
+        'sensors': sum(len(field['sensors']) for zone in topology for field in zone['fields']),
+        'messages': messages,
+        'target_rate': rate,
+        'codec': codec,
+        'telemetry': telemetry,
+        'startup_ms': startup_seconds * 1000,
+        'messages_per_second': messages / elapsed,
+        'readings_per_second': messages * readings_per_message / elapsed,
+        'deliveries_per_second': delivered / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'published': dict(broker.published)
+    }
+
+
+def run_isolated(*args) -> dict:
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(run_scenario, args)
+
+
+def compare(results: List[dict], baseline_path: str, tolerance: float) -> List[str]:
+    with open(baseline_path) as file:
+        baseline = {entry['sensors']: entry for entry in json.load(file)['results']}
+    regressions = []
+    for result in results:
+        expected = baseline.get(result['sensors'])
+        if expected is None:
+            continue
+        if result['messages_per_second'] < expected['messages_per_second'] * (1 - tolerance):
+            regressions.append(
+                f"{result['sensors']} sensors: {result['messages_per_second']:.0f} msg/s, "
+                f"baseline {expected['messages_per_second']:.0f} msg/s"
+            )
+        if result['p99_ms'] > expected['p99_ms'] * (1 + tolerance):
+            regressions.append(
+                f"{result['sensors']} sensors: p99 {result['p99_ms']:.3f} ms, baseline {expected['p99_ms']:.3f} ms"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sensors', type=int, nargs='+', default=[10, 1_000, 100_000])
+    parser.add_argument('--messages', type=int, default=20_000)
+    parser.add_argument('--rate', type=float, default=0, help="Injected messages per second, 0 for as fast as possible")
+    parser.add_argument(
+        '--analyzer-option', action='append', default=[], metavar='KEY=VALUE',
+        help="Analyzer Config override, e.g. BATCH_ENGINE_ENABLED=true"
+    )
+    parser.add_argument('--codec', default='json', help="Payload codec used by every service (json, msgpack)")
+    parser.add_argument(
+        '--telemetry', choices=['sensor', 'field'], default='sensor',
+        help="Inject one message per sensor reading, or one batch per field"
+    )
+    parser.add_argument('--log-level', default='info', help="Disable service logging up to this level")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--compare', help="Baseline JSON file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+    analyzer_options = parse_overrides(args.analyzer_option)
+
+    results = []
+    print(f"{'sensors':>8} {'startup (ms)':>13} {'msg/s':>9} {'readings/s':>11} {'p50 (ms)':>9} {'p99 (ms)':>9} {'rss (MB)':>9}")
+    for sensor_count in args.sensors:
+        result = run_isolated(
+            sensor_count, args.messages, args.rate, analyzer_options, args.log_level, args.codec, args.telemetry
+        )
+        results.append(result)
+        print(
+            f"{result['sensors']:>8} {result['startup_ms']:>13.1f} {result['messages_per_second']:>9.0f} "
+            f"{result['readings_per_second']:>11.0f} "
+            f"{result['p50_ms']:>9.3f} {result['p99_ms']:>9.3f} {result['max_rss_mb']:>9.1f}"
+        )
+
+    if args.output:
+        report = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'messages': args.messages,
+            'rate': args.rate,
+            'codec': args.codec,
+            'telemetry': args.telemetry,
+            'analyzer_options': analyzer_options,
+            'results': results
+        }
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+            file.write('\n')
+        print(f"Wrote {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,15 @@
+import logging
+import sys
+from pathlib import Path
+
+import pytest
+
+# The benchmarks are run as `benchmarks.<name>` from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+
+
+@pytest.fixture(autouse=True)
+def restore_logging():
+    # run_scenario disables logging process wide
+    yield
+    logging.disable(logging.NOTSET)
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from benchmarks.pipeline import compare, parse_overrides, run_scenario
+
+
+def test_readings_flow_through_every_service():
+    result = run_scenario(50, 300, 0, {}, 'WARNING')
+    published = result['published']
+    assert result['messages'] == 300
+    assert published['zone'] == 300
+    assert published['analyzer'] > 0
+    assert 0 < published['executor'] <= published['planner'] <= published['analyzer']
+
+
+def test_field_batches_with_msgpack():
+    pytest.importorskip('msgpack')
+    result = run_scenario(50, 20, 0, parse_overrides(['BATCH_ENGINE_ENABLED=true']), 'WARNING', 'msgpack', 'field')
+    assert result['readings_per_second'] == pytest.approx(result['messages_per_second'] * 10)
+    assert result['published']['analyzer'] > 0
+
+
+def test_compare_flags_only_regressions_past_the_tolerance(tmp_path):
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps({'results': [{'sensors': 10, 'messages_per_second': 1000, 'p99_ms': 1.0}]}))
+    results = [
+        {'sensors': 10, 'messages_per_second': 850, 'p99_ms': 1.5},
+        {'sensors': 1000, 'messages_per_second': 1, 'p99_ms': 100}
+    ]
+    [regression] = compare(results, str(baseline), 0.2)
+    assert regression.startswith('10 sensors: p99')
@@ -0,0 +1,66 @@
+import json
+from typing import Any, Dict, List, Tuple
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = 'json'
+MSGPACK = 'msgpack'
+
+class JsonCodec:
+    name = JSON
+    suffix = ''
+
+    def encode(self, data: Any) -> bytes:
+        return json.dumps(data).encode()
+
+    def decode(self, payload: bytes) -> Any:
+        return json.loads(payload)
+
+class MsgpackCodec:
+    name = MSGPACK
+    suffix = f'/{MSGPACK}'
+
+    def encode(self, data: Any) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+    def decode(self, payload: bytes) -> Any:
+        return msgpack.unpackb(payload, raw=False)
+
+CODECS: Dict[str, Any] = {JSON: JsonCodec()}
+if msgpack is not None:
+    CODECS[MSGPACK] = MsgpackCodec()
+
+def get_codec(name: str):
+    """
+    Codec used to publish, by name. MessagePack needs the `msgpack` package.
+    """
+    codec = CODECS.get(name.lower())
+    if codec is None:
+        raise ValueError(f"Unsupported payload codec {name}, available: {sorted(CODECS)}")
+    return codec
+
+def codec_for_topic(topic: str) -> Tuple[str, Any]:
+    """
+    Split the codec suffix off `topic`.
+
+    Payloads are JSON unless the topic ends in `/msgpack`, so existing JSON
+    publishers and subscribers keep working unchanged.
+
+    :return: The topic without its suffix and the codec to decode it with.
+    """
+    if topic.endswith(MsgpackCodec.suffix):
+        if msgpack is None:
+            raise ValueError(f"Received a MessagePack payload on {topic} but msgpack is not installed")
+        return topic[:-len(MsgpackCodec.suffix)], CODECS[MSGPACK]
+    return topic, CODECS[JSON]
+
+def topic_variants(topic: str) -> List[str]:
+    """
+    Subscriptions needed to receive `topic` in any codec.
+    """
+    if topic.endswith('#'):
+        return [topic]
+    return [topic, topic + MsgpackCodec.suffix]
@@ -0,0 +1,159 @@
+import atexit
+import json
+import logging
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from time import monotonic
+from typing import Dict, Optional, Tuple
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+class LazyQueueHandler(QueueHandler):
+    """
+    Queues records with only their message rendered, leaving the rest of the
+    formatting to the listener thread.
+
+    The stock QueueHandler fully formats every record on the calling thread
+    so it can be pickled; the queue here never leaves the process, so the
+    timestamp, exception text and JSON encoding can move off the MQTT
+    thread. The `%` arguments are still merged on the calling thread, as
+    they may be mutable objects that change before the listener gets to
+    them. When the queue is full the record is dropped and counted instead
+    of blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if self.dropped:
+            record.dropped = self.dropped
+            self.dropped = 0
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per call site sampling and rate limiting.
+
+    Records below WARNING are sampled, keeping one in `sample_every` per
+    call site, then go through a token bucket per call site refilled at
+    `rate` records per second up to `burst`. Warnings and errors are never
+    dropped. The number of records suppressed since the last one that got
+    through is attached to it as `suppressed`.
+    """
+
+    def __init__(self, rate: float = 0, burst: int = 20, sample_every: int = 1):
+        super().__init__()
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.sample_every = max(sample_every, 1)
+        self._sites: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.pathname, record.lineno)
+        now = monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None:
+                # tokens, last refill, records seen, records suppressed
+                site = self._sites[key] = [float(self.burst), now, 0, 0]
+            site[2] += 1
+            if record.levelno < logging.WARNING:
+                if (site[2] - 1) % self.sample_every:
+                    site[3] += 1
+                    return False
+                if self.rate > 0:
+                    site[0] = min(self.burst, site[0] + (now - site[1]) * self.rate)
+                    site[1] = now
+                    if site[0] < 1:
+                        site[3] += 1
+                        return False
+                    site[0] -= 1
+            if site[3]:
+                record.suppressed = site[3]
+                site[3] = 0
+        return True
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        notes = []
+        if getattr(record, 'suppressed', 0):
+            notes.append(f"{record.suppressed} similar suppressed")
+        if getattr(record, 'dropped', 0):
+            notes.append(f"{record.dropped} records dropped")
+        return f"{message} [{', '.join(notes)}]" if notes else message
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+            'site': f"{record.module}:{record.lineno}"
+        }
+        if getattr(record, 'suppressed', 0):
+            entry['suppressed'] = record.suppressed
+        if getattr(record, 'dropped', 0):
+            entry['dropped'] = record.dropped
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+_listener: Optional[QueueListener] = None
+
+def stop_logging() -> None:
+    """
+    Flush the queued records and stop the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(stop_logging)
+
+def setup_logging(
+    level: str = 'INFO',
+    log_format: str = 'text',
+    rate: float = 0,
+    burst: int = 20,
+    sample_every: int = 1,
+    queue_size: int = 10000
+) -> None:
+    """
+    Route all logging through a bounded queue drained by a background thread.
+
+    Replaces the handlers installed by the modules' `basicConfig` calls, so
+    it must run once at startup, after the service modules are imported.
+    """
+    global _listener
+    stop_logging()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter() if log_format.lower() == 'json' else TextFormatter(TEXT_FORMAT))
+    log_queue = queue.Queue(queue_size)
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(rate, burst, sample_every))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
@@ -0,0 +1,336 @@
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic, time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+def topic_family(topic: str) -> str:
+    """
+    Coarse family of an MQTT topic, used as a metric label so that the number
+    of series does not grow with the number of zones, fields or devices.
+
+    `zone/<z>/field/<f>/sensor/...` maps to `sensor`, `zone/.../actuator/...`
+    to `actuator`, and anything else to its first segment (`analyzer`, ...).
+    """
+    parts = topic.split('/', 5)
+    if parts[0] == 'zone' and len(parts) > 4:
+        return parts[4]
+    return parts[0]
+
+class Metric(ABC):
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        pass
+
+    def _label_text(self, key: Tuple[str, ...], extra: str = '') -> str:
+        pairs = [f'{name}="{value}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def _field_name(self, key: Tuple[str, ...], suffix: str = '') -> str:
+        return '_'.join((self.name,) + key) + suffix
+
+class _Value:
+    __slots__ = ('value', 'lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self.lock:
+            self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+class Counter(Metric):
+    type = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        return [
+            (self.name + '_total', self._label_text(key), child.value)
+            for key, child in list(self._children.items())
+        ]
+
+    def fields(self) -> Dict[str, float]:
+        return {self._field_name(key, '_total'): child.value for key, child in list(self._children.items())}
+
+class Gauge(Metric):
+    """
+    A value that goes up and down, either set directly or read from
+    `function` on every scrape.
+    """
+    type = 'gauge'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), function: Optional[Callable[[], float]] = None):
+        super().__init__(name, help, labelnames)
+        self.function = function
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def _values(self) -> List[Tuple[Tuple[str, ...], float]]:
+        if self.function is not None:
+            try:
+                return [((), float(self.function()))]
+            except Exception as e:
+                logger.error(f"Error reading gauge {self.name}: {e}")
+                return []
+        return [(key, child.value) for key, child in list(self._children.items())]
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        return [(self.name, self._label_text(key), value) for key, value in self._values()]
+
+    def fields(self) -> Dict[str, float]:
+        return {self._field_name(key): value for key, value in self._values()}
+
+class _HistogramValue:
+    __slots__ = ('buckets', 'counts', 'sum', 'count', 'lock')
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self.lock:
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[index] += 1
+                    break
+            self.sum += value
+            self.count += 1
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return _Timer(self.labels())
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        samples = []
+        for key, child in list(self._children.items()):
+            with child.lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append((self.name + '_bucket', self._label_text(key, f'le="{bound}"'), cumulative))
+            samples.append((self.name + '_bucket', self._label_text(key, 'le="+Inf"'), count))
+            samples.append((self.name + '_sum', self._label_text(key), total))
+            samples.append((self.name + '_count', self._label_text(key), count))
+        return samples
+
+    def fields(self) -> Dict[str, float]:
+        fields = {}
+        for key, child in list(self._children.items()):
+            fields[self._field_name(key, '_sum')] = child.sum
+            fields[self._field_name(key, '_count')] = child.count
+        return fields
+
+class _Timer:
+    __slots__ = ('child', 'start')
+
+    def __init__(self, child: _HistogramValue):
+        self.child = child
+
+    def __enter__(self):
+        self.start = monotonic()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.child.observe(monotonic() - self.start)
+        return False
+
+class MetricsRegistry:
+    """
+    In-process metrics for one service, rendered in the Prometheus text
+    format for scraping or flattened into a JSON object for MQTT push.
+    """
+
+    def __init__(self, service: str, instance: str = ''):
+        self.service = service
+        self.instance = instance
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        """
+        Add `metric`, or return the one already registered under its name,
+        which must have the same type and label names.
+        """
+        with self._lock:
+            existing = self._metrics.setdefault(metric.name, metric)
+        if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+            raise ValueError(
+                f"Metric {metric.name} is already registered as a {existing.type} "
+                f"with labels {list(existing.labelnames)}"
+            )
+        return existing
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = (), function: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._register(Gauge(name, help, labelnames, function))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> dict:
+        snapshot = {'service': self.service, 'instance': self.instance, 'timestamp': time()}
+        for metric in list(self._metrics.values()):
+            snapshot.update(metric.fields())
+        return snapshot
+
+class MetricsServer:
+    """
+    Serves the registry on `http://<host>:<port>/metrics` from a daemon thread.
+    """
+
+    def __init__(self, registry: MetricsRegistry, port: int, host: str = '0.0.0.0'):
+        self.registry = registry
+        self.port = port
+        self.host = host
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+            self._server.daemon_threads = True
+        except Exception as e:
+            logger.error(f"Failed to start metrics server on port {self.port}: {e}")
+            return
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Serving metrics on port {self.port}")
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+class MetricsPusher:
+    """
+    Periodically publishes a JSON snapshot of the registry on `topic`, for
+    Telegraf to forward to InfluxDB. Counters are also reported as
+    `<name>_per_second` rates over the last interval.
+    """
+
+    def __init__(self, registry: MetricsRegistry, topic: str, interval: float = 10):
+        self.registry = registry
+        self.topic = topic
+        self.interval = interval
+        self.client = None
+        self._previous: Optional[Tuple[float, dict]] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, client) -> None:
+        self.client = client
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-pusher", daemon=True)
+        self._thread.start()
+        logger.info(f"Pushing metrics to {self.topic} every {self.interval}s")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def push(self) -> None:
+        now = monotonic()
+        snapshot = self.registry.snapshot()
+        payload = dict(snapshot)
+        if self._previous:
+            elapsed = now - self._previous[0]
+            previous = self._previous[1]
+            for name, value in snapshot.items():
+                if name.endswith('_total') and name in previous and elapsed > 0:
+                    payload[name[:-len('_total')] + '_per_second'] = (value - previous[name]) / elapsed
+        self._previous = (now, snapshot)
+        self.client.publish(self.topic, json.dumps(payload))
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.push()
+            except Exception as e:
+                logger.error(f"Error pushing metrics: {e}")
@@ -0,0 +1,123 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from time import time
+from typing import Callable, Optional, Tuple
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class SnapshotStore:
+    """
+    Append-only log of service state snapshots in a local sqlite file.
+
+    Every snapshot is the whole state as one row written in one transaction,
+    so a crash at any point leaves the previous snapshot or the new one,
+    never a mix of both. Only the latest `retain` snapshots are kept.
+    Timestamps are wall-clock seconds so they stay meaningful across restarts.
+    """
+
+    def __init__(self, path: str, retain: int = 3):
+        self.path = path
+        self.retain = max(retain, 1)
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                taken_at REAL NOT NULL,
+                data TEXT NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+        logger.info(f"Opened state snapshots at {path}")
+
+    def append(self, data: str, taken_at: Optional[float] = None) -> float:
+        """
+        Write a serialized snapshot and drop the ones older than the last `retain`.
+        """
+        taken_at = time() if taken_at is None else taken_at
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO snapshots (taken_at, data) VALUES (?, ?)", (taken_at, data)
+            )
+            self._connection.execute("DELETE FROM snapshots WHERE id <= ?", (cursor.lastrowid - self.retain,))
+        return taken_at
+
+    def latest(self) -> Optional[Tuple[float, dict]]:
+        """
+        :return: The time and content of the newest readable snapshot, if any.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT taken_at, data FROM snapshots ORDER BY id DESC"
+            ).fetchall()
+        for taken_at, data in rows:
+            try:
+                return taken_at, json.loads(data)
+            except ValueError as e:
+                logger.error(f"Skipping corrupt snapshot taken at {taken_at}: {e}")
+        return None
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+class Snapshotter:
+    """
+    Calls `capture` every `interval` seconds from a daemon thread and appends
+    the result to the store, unless it is unchanged since the last snapshot.
+    `stop` takes a final snapshot so a clean shutdown loses nothing.
+    """
+
+    def __init__(self, store: SnapshotStore, capture: Callable[[], dict], interval: float = 5):
+        self.store = store
+        self.capture = capture
+        self.interval = interval
+        self._last: Optional[str] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def snapshot(self) -> bool:
+        data = json.dumps(self.capture(), separators=(',', ':'))
+        if data == self._last:
+            return False
+        self.store.append(data)
+        self._last = data
+        return True
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="snapshotter", daemon=True)
+        self._thread.start()
+        logger.info(f"Started state snapshots to {self.store.path} every {self.interval}s")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+        try:
+            self.snapshot()
+        except Exception as e:
+            logger.error(f"Error taking the final state snapshot: {e}")
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.snapshot()
+            except Exception as e:
+                logger.error(f"Error taking a state snapshot: {e}")
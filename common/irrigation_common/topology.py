@@ -0,0 +1,63 @@
+import logging
+import threading
+from typing import Any, Callable, List, Optional
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class TopologyReloader:
+    """
+    Polls the backend for zone topology changes using ETag revalidation.
+
+    An unchanged topology costs a single 304 response; only when the ETag
+    changes is the payload downloaded and handed to `on_change`. A failed
+    request keeps the previous ETag, so the next poll tries again.
+
+    :param zone_service: The service's ZoneService, or anything else with a
+        `fetch_zones(etag)` returning the payload and its ETag.
+    """
+
+    def __init__(
+        self,
+        zone_service: Any,
+        on_change: Callable[[List[dict]], None],
+        interval: float = 30,
+        etag: Optional[str] = None
+    ):
+        self.zone_service = zone_service
+        self.on_change = on_change
+        self.interval = interval
+        self.etag = etag
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self) -> bool:
+        payload, etag = self.zone_service.fetch_zones(self.etag)
+        if payload is None:
+            return False
+        self.etag = etag
+        self.on_change(payload)
+        return True
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="topology-reloader", daemon=True)
+        self._thread.start()
+        logger.info(f"Started topology reloader polling every {self.interval}s")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Error reloading topology: {e}")
@@ -0,0 +1,66 @@
+import uuid
+from time import time
+from typing import Optional
+
+from .metrics import MetricsRegistry
+
+# Latencies between services include coalescing windows and broker queueing,
+# so the buckets reach well past the in-process LATENCY_BUCKETS.
+TRACE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def new_trace() -> dict:
+    """
+    Trace context for a fresh reading: a random id and its origin timestamp.
+
+    `sent_ts` is restamped by every hop that forwards the trace, so the next
+    hop can tell its own latency apart from the total since `origin_ts`.
+    Timestamps are wall clock seconds, as they are compared across services.
+    """
+    now = time()
+    return {'trace_id': uuid.uuid4().hex, 'origin_ts': now, 'sent_ts': now}
+
+def extract_trace(payload: dict) -> Optional[dict]:
+    if not isinstance(payload, dict) or 'trace_id' not in payload:
+        return None
+    origin_ts = payload.get('origin_ts')
+    return {
+        'trace_id': payload['trace_id'],
+        'origin_ts': origin_ts,
+        'sent_ts': payload.get('sent_ts', origin_ts)
+    }
+
+def forward_trace(trace: Optional[dict], payload: dict) -> dict:
+    """
+    Copy `trace` into an outgoing `payload`, stamping the time it is sent.
+    """
+    if trace:
+        payload['trace_id'] = trace['trace_id']
+        payload['origin_ts'] = trace['origin_ts']
+        payload['sent_ts'] = time()
+    return payload
+
+class TraceRecorder:
+    """
+    Records, for every traced message a stage receives, the latency of the hop
+    that delivered it and the total latency since the reading was taken.
+    """
+
+    def __init__(self, registry: MetricsRegistry, stage: str):
+        self.stage = stage
+        hop = registry.histogram(
+            'trace_hop_seconds', 'Latency of the hop that delivered a traced message', ['stage'], TRACE_BUCKETS
+        )
+        total = registry.histogram(
+            'trace_total_seconds', 'Latency since the traced sensor reading', ['stage'], TRACE_BUCKETS
+        )
+        self._hop = hop.labels(stage)
+        self._total = total.labels(stage)
+
+    def record(self, trace: Optional[dict], now: Optional[float] = None) -> None:
+        if not trace:
+            return
+        now = time() if now is None else now
+        if trace.get('sent_ts') is not None:
+            self._hop.observe(max(now - trace['sent_ts'], 0.0))
+        if trace.get('origin_ts') is not None:
+            self._total.observe(max(now - trace['origin_ts'], 0.0))
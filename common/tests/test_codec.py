@@ -0,0 +1,26 @@
+import pytest
+
+from irrigation_common.codec import JSON, MSGPACK, codec_for_topic, get_codec, topic_variants
+
+PLAN = {'action': 'start_irrigation', 'water_need': 125.5, 'trace_id': 'a1'}
+
+
+def test_json_stays_the_default():
+    topic, codec = codec_for_topic('planner/zone/z1/field/f1')
+    assert (topic, codec.name) == ('planner/zone/z1/field/f1', JSON)
+    assert codec.decode(get_codec('JSON').encode(PLAN)) == PLAN
+    assert topic_variants('planner/zone/+/field/+') == ['planner/zone/+/field/+', 'planner/zone/+/field/+/msgpack']
+    assert topic_variants('zone/#') == ['zone/#']
+
+
+def test_msgpack_round_trip_by_topic_suffix():
+    pytest.importorskip('msgpack')
+    codec = get_codec(MSGPACK)
+    topic, decoder = codec_for_topic('planner/zone/z1/field/f1' + codec.suffix)
+    assert (topic, decoder.name) == ('planner/zone/z1/field/f1', MSGPACK)
+    assert decoder.decode(codec.encode(PLAN)) == PLAN
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        get_codec('protobuf')
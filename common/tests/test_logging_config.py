@@ -0,0 +1,38 @@
+import json
+import logging
+import queue
+
+from irrigation_common.logging_config import JsonFormatter, LazyQueueHandler, RateLimitFilter
+
+
+def make_record(level=logging.INFO, msg='reading %s', args=(1,), lineno=10):
+    return logging.LogRecord('src.analyzer', level, 'analyzer.py', lineno, msg, args, None)
+
+
+def test_rate_limit_keeps_warnings_and_errors():
+    limiter = RateLimitFilter(rate=0.001, burst=2)
+    passed = [limiter.filter(make_record()) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert all(limiter.filter(make_record(level)) for level in (logging.WARNING, logging.ERROR) for _ in range(5))
+
+
+def test_sampling_reports_the_suppressed_records():
+    limiter = RateLimitFilter(sample_every=3)
+    passed = [record for record in (make_record() for _ in range(7)) if limiter.filter(record)]
+    assert len(passed) == 3
+    assert [getattr(record, 'suppressed', 0) for record in passed] == [0, 2, 2]
+
+
+def test_queued_message_is_frozen_when_logged():
+    log_queue = queue.Queue(1)
+    handler = LazyQueueHandler(log_queue)
+    payload = {'value': 25}
+    handler.handle(make_record(msg='payload %s', args=(payload,)))
+    payload['value'] = 99
+    handler.handle(make_record())
+    record = log_queue.get_nowait()
+    assert record.getMessage() == "payload {'value': 25}"
+    assert handler.dropped == 1
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert (entry['level'], entry['message'], entry['site']) == ('INFO', "payload {'value': 25}", 'analyzer:10')
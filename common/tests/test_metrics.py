@@ -0,0 +1,65 @@
+import json
+from unittest import mock
+
+import pytest
+
+from irrigation_common.metrics import MetricsPusher, MetricsRegistry, topic_family
+
+
+def test_topic_families_do_not_grow_with_devices():
+    assert topic_family('zone/z1/field/f1/sensor/s0/soil_moisture') == 'sensor'
+    assert topic_family('zone/z7/field/f2/actuator/a1') == 'actuator'
+    assert topic_family('analyzer/zone/z1/field/f1') == 'analyzer'
+
+
+def test_render_in_prometheus_text_format():
+    registry = MetricsRegistry('analyzer')
+    received = registry.counter('mqtt_messages_received', 'MQTT messages received', ['family'])
+    received.labels('sensor').inc(3)
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1))
+    latency.observe(0.05)
+    latency.observe(0.5)
+    registry.gauge('depth', 'Queue depth', function=lambda: 7)
+    assert registry.render().splitlines() == [
+        '# HELP mqtt_messages_received MQTT messages received',
+        '# TYPE mqtt_messages_received counter',
+        'mqtt_messages_received_total{family="sensor"} 3.0',
+        '# HELP latency_seconds Latency',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 2',
+        'latency_seconds_bucket{le="+Inf"} 2',
+        'latency_seconds_sum 0.55',
+        'latency_seconds_count 2',
+        '# HELP depth Queue depth',
+        '# TYPE depth gauge',
+        'depth 7.0'
+    ]
+
+
+def test_pushed_snapshots_carry_counter_rates():
+    registry = MetricsRegistry('planner', 'planner-1')
+    published = registry.counter('published', 'Plans published')
+    pusher = MetricsPusher(registry, 'metrics/planner')
+    pusher.client = mock.Mock()
+    with mock.patch('irrigation_common.metrics.monotonic', side_effect=[0.0, 10.0]):
+        published.inc(10)
+        pusher.push()
+        published.inc(50)
+        pusher.push()
+    first, second = [json.loads(call.args[1]) for call in pusher.client.publish.call_args_list]
+    assert (first['service'], first['instance'], first['published_total']) == ('planner', 'planner-1', 10)
+    assert 'published_per_second' not in first
+    assert second['published_per_second'] == 5
+
+
+def test_name_is_bound_to_one_type_and_label_set():
+    registry = MetricsRegistry('executor')
+    actions = registry.counter('actions', 'Actuator commands issued', ['action'])
+    assert registry.counter('actions', 'Actuator commands issued', ['action']) is actions
+    for register in (
+        lambda: registry.gauge('actions', 'Actuator commands issued'),
+        lambda: registry.counter('actions', 'Actuator commands issued', ['field'])
+    ):
+        with pytest.raises(ValueError):
+            register()
@@ -0,0 +1,32 @@
+import sqlite3
+
+from irrigation_common.snapshot import SnapshotStore, Snapshotter
+
+
+def test_only_the_latest_snapshots_are_kept(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'state.sqlite'), retain=2)
+    for index in range(5):
+        store.append(f'{{"index": {index}}}', taken_at=index)
+    assert store.latest() == (4, {'index': 4})
+    count, = store._connection.execute("SELECT COUNT(*) FROM snapshots").fetchone()
+    assert count == 2
+
+
+def test_corrupt_snapshot_falls_back_to_the_previous_one(tmp_path):
+    path = str(tmp_path / 'state.sqlite')
+    store = SnapshotStore(path)
+    store.append('{"index": 1}', taken_at=1)
+    with sqlite3.connect(path) as connection:
+        connection.execute("INSERT INTO snapshots (taken_at, data) VALUES (2, '{\"index\": ')")
+    assert store.latest() == (1, {'index': 1})
+
+
+def test_unchanged_state_is_not_written_again(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'state.sqlite'))
+    state = {'fields': []}
+    snapshotter = Snapshotter(store, lambda: state)
+    assert snapshotter.snapshot()
+    assert not snapshotter.snapshot()
+    state['fields'].append(['z1', 'f1'])
+    snapshotter.stop()
+    assert store.latest()[1] == {'fields': [['z1', 'f1']]}
@@ -0,0 +1,26 @@
+from unittest import mock
+
+import pytest
+
+from irrigation_common.metrics import MetricsRegistry
+from irrigation_common.tracing import TraceRecorder, extract_trace, forward_trace, new_trace
+
+
+def test_trace_survives_each_hop():
+    with mock.patch('irrigation_common.tracing.time', return_value=100.0):
+        reading = dict(new_trace(), value=25)
+    with mock.patch('irrigation_common.tracing.time', return_value=101.5):
+        result = forward_trace(extract_trace(reading), {'action': 'trigger_irrigation'})
+    assert result['trace_id'] == reading['trace_id']
+    assert (result['origin_ts'], result['sent_ts']) == (100.0, 101.5)
+    assert extract_trace({'value': 25}) is None
+    assert forward_trace(None, {'action': 'stop_irrigation'}) == {'action': 'stop_irrigation'}
+
+
+def test_recorder_splits_hop_and_total_latency():
+    registry = MetricsRegistry('planner')
+    recorder = TraceRecorder(registry, 'planner')
+    recorder.record({'trace_id': 'a', 'origin_ts': 100.0, 'sent_ts': 101.5}, now=102.0)
+    fields = registry.snapshot()
+    assert fields['trace_hop_seconds_planner_sum'] == pytest.approx(0.5)
+    assert fields['trace_total_seconds_planner_sum'] == pytest.approx(2.0)
@@ -1,13 +1,41 @@
 import os
 
+from irrigation_common.logging_config import setup_logging
+
 from src.config import Config
 from src.executor import Executor
 
 MQTT_BROKER_URL = os.getenv('MQTT_BROKER_URL', 'mosquitto:1883')
+BACKEND_URL = os.getenv('BACKEND_URL', 'http://backend:5000')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9100))
+METRICS_PUSH_INTERVAL = float(os.getenv('METRICS_PUSH_INTERVAL', 0))
+PAYLOAD_CODEC = os.getenv('PAYLOAD_CODEC', 'json')
+COMMAND_REPEAT_INTERVAL = float(os.getenv('COMMAND_REPEAT_INTERVAL', 60))
+ACTUATOR_COMMANDS_ENABLED = os.getenv('ACTUATOR_COMMANDS_ENABLED', 'true').lower() == 'true'
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', 'data/executor_state.sqlite')
+SNAPSHOT_INTERVAL = float(os.getenv('SNAPSHOT_INTERVAL', 5))
+SCHEDULE_TICK_INTERVAL = float(os.getenv('SCHEDULE_TICK_INTERVAL', 1.0))
+TOPOLOGY_RELOAD_INTERVAL = float(os.getenv('TOPOLOGY_RELOAD_INTERVAL', 30))
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_RATE_LIMIT = float(os.getenv('LOG_RATE_LIMIT', 10))
+LOG_BURST = int(os.getenv('LOG_BURST', 20))
+LOG_SAMPLE_EVERY = int(os.getenv('LOG_SAMPLE_EVERY', 1))
 
 def main():
+    setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_RATE_LIMIT, LOG_BURST, LOG_SAMPLE_EVERY)
     config = Config(
-        MQTT_BROKER_URL=MQTT_BROKER_URL
+        MQTT_BROKER_URL=MQTT_BROKER_URL,
+        BACKEND_URL=BACKEND_URL,
+        METRICS_PORT=METRICS_PORT,
+        METRICS_PUSH_INTERVAL=METRICS_PUSH_INTERVAL,
+        PAYLOAD_CODEC=PAYLOAD_CODEC,
+        COMMAND_REPEAT_INTERVAL=COMMAND_REPEAT_INTERVAL,
+        ACTUATOR_COMMANDS_ENABLED=ACTUATOR_COMMANDS_ENABLED,
+        SNAPSHOT_PATH=SNAPSHOT_PATH,
+        SNAPSHOT_INTERVAL=SNAPSHOT_INTERVAL,
+        SCHEDULE_TICK_INTERVAL=SCHEDULE_TICK_INTERVAL,
+        TOPOLOGY_RELOAD_INTERVAL=TOPOLOGY_RELOAD_INTERVAL
     )
     
     executor = Executor(config)
@@ -1,9 +1,22 @@
-from dataclasses import dataclass
+import socket
+from dataclasses import dataclass, field
 
 
 @dataclass
 class Config:
     MQTT_BROKER_URL: str
+    BACKEND_URL: str
     MQTT_KEEPALIVE: int = 60
     PLANNER_TOPIC_PREFIX: str = 'planner'
-    EXECUTOR_TOPIC_PREFIX: str = 'executor'
\ No newline at end of file
+    EXECUTOR_TOPIC_PREFIX: str = 'executor'
+    INSTANCE_ID: str = field(default_factory=socket.gethostname)
+    METRICS_PORT: int = 9100
+    METRICS_PUSH_INTERVAL: float = 0
+    METRICS_TOPIC_PREFIX: str = 'metrics'
+    PAYLOAD_CODEC: str = 'json'
+    COMMAND_REPEAT_INTERVAL: float = 60
+    ACTUATOR_COMMANDS_ENABLED: bool = True
+    SNAPSHOT_PATH: str = 'data/executor_state.sqlite'
+    SNAPSHOT_INTERVAL: float = 5
+    SCHEDULE_TICK_INTERVAL: float = 1.0
+    TOPOLOGY_RELOAD_INTERVAL: float = 30
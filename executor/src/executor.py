@@ -1,10 +1,20 @@
-import json
 import logging
-from typing import Dict, Optional, Tuple
+from time import perf_counter, time
+from typing import Dict, List, Optional, Tuple
 
 from paho.mqtt import client as mqtt
 
+from irrigation_common.codec import codec_for_topic, get_codec
+from irrigation_common.metrics import MetricsPusher, MetricsRegistry, MetricsServer, topic_family
+from irrigation_common.snapshot import SnapshotStore, Snapshotter
+from irrigation_common.topology import TopologyReloader
+from irrigation_common.tracing import TraceRecorder, extract_trace, forward_trace
+
+from .actuator import ActuatorRecord
 from .config import Config
+from .field import Field
+from .schedule import ScheduleBook, ScheduleTicker
+from .zone import Zone, ZoneService
 
 logging.basicConfig(
     level=logging.INFO,
@@ -12,11 +22,140 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+SCHEDULED_REASON = 'day-ahead schedule'
+
 class Executor:
     def __init__(self, config: Config):
         self.config = config
+        self.codec = get_codec(config.PAYLOAD_CODEC)
+        self._setup_metrics()
+        self.zone_service = ZoneService(config.BACKEND_URL, model_only=True)
+        self.zones: Dict[str, Zone] = {}
+        # Actuators of each field with their share of its water need
+        self.actuator_shares: Dict[Tuple[str, str], List[Tuple[ActuatorRecord, float]]] = {}
+        # Last command issued per field: command, water need and wall-clock time
+        self.commands: Dict[Tuple[str, str], Tuple[str, float, float]] = {}
+        # Commands restored from the snapshot, checked against the plans replayed
+        # right after a restart until `_restored_until`
+        self._restored_commands: Dict[Tuple[str, str], Tuple[str, float, float]] = {}
+        self._restored_until = 0.0
+        self.schedules = ScheduleBook()
+        self.schedule_ticker = ScheduleTicker(self._follow_schedules, config.SCHEDULE_TICK_INTERVAL)
+        self.snapshotter: Optional[Snapshotter] = None
+        if config.SNAPSHOT_PATH:
+            self.snapshotter = Snapshotter(SnapshotStore(config.SNAPSHOT_PATH), self._capture_state, config.SNAPSHOT_INTERVAL)
+        # Also retries the inventory until the backend serves it
+        self.topology_reloader: Optional[TopologyReloader] = None
+        if config.TOPOLOGY_RELOAD_INTERVAL > 0:
+            self.topology_reloader = TopologyReloader(
+                self.zone_service,
+                self._apply_topology,
+                config.TOPOLOGY_RELOAD_INTERVAL
+            )
+        self._load_zones()
+        self._restore_state()
         self._setup_mqtt_client()
 
+    def _setup_metrics(self) -> None:
+        self.metrics = MetricsRegistry('executor', self.config.INSTANCE_ID)
+        self.messages_received = self.metrics.counter('mqtt_messages_received', 'MQTT messages received', ['family'])
+        self.messages_published = self.metrics.counter('mqtt_messages_published', 'MQTT messages published', ['family'])
+        self.message_latency = self.metrics.histogram('message_processing_seconds', 'Time spent handling one MQTT message')
+        self.mqtt_reconnects = self.metrics.counter('mqtt_reconnects', 'Reconnections to the MQTT broker')
+        self.actions_made = self.metrics.counter('actions', 'Actuator commands issued', ['action'])
+        self.actions_repeated = self.metrics.counter(
+            'actions_repeated', 'Plans dropped after a restart because they repeat the restored command', ['action']
+        )
+        self.metrics.gauge(
+            'scheduled_irrigations', 'Irrigation starts left in the day-ahead schedules',
+            function=lambda: self.schedules.pending_count()
+        )
+        self.trace_recorder = TraceRecorder(self.metrics, 'executor')
+        self.metrics_server: Optional[MetricsServer] = None
+        if self.config.METRICS_PORT > 0:
+            self.metrics_server = MetricsServer(self.metrics, self.config.METRICS_PORT)
+        self.metrics_pusher: Optional[MetricsPusher] = None
+        if self.config.METRICS_PUSH_INTERVAL > 0:
+            self.metrics_pusher = MetricsPusher(
+                self.metrics,
+                f"{self.config.METRICS_TOPIC_PREFIX}/executor",
+                self.config.METRICS_PUSH_INTERVAL
+            )
+        self._connected_once = False
+
+    def _load_zones(self) -> None:
+        try:
+            payload, etag = self.zone_service.fetch_zones()
+            if payload is not None:
+                self._apply_topology(payload)
+            if self.topology_reloader:
+                self.topology_reloader.etag = etag
+        except Exception as e:
+            logger.error(f"Failed to load zones: {e}")
+
+    def _apply_topology(self, payload: List[dict]) -> None:
+        """
+        Replace the actuator inventory with the one in a zones payload. The
+        zones and shares are built aside and swapped in whole, so commands
+        in flight see either the old inventory or the new one.
+        """
+        zones = {}
+        for zone_data in payload:
+            zone = self.zone_service.parse_zone(zone_data)
+            zones[zone.zone_id] = zone
+        actuator_shares = {
+            (zone.zone_id, field.field_id): self._capacity_shares(field)
+            for zone in zones.values()
+            for field in zone.fields.values()
+        }
+        self.zones, self.actuator_shares = zones, actuator_shares
+        logger.info(
+            f"Loaded {len(zones)} zones with "
+            f"{sum(len(shares) for shares in actuator_shares.values())} actuators"
+        )
+
+    @staticmethod
+    def _capacity_shares(field: Field) -> List[Tuple[ActuatorRecord, float]]:
+        """
+        Split of the field's water need across its actuators, proportional
+        to their consumption, or even when no consumption is known.
+        """
+        actuators = [actuator for by_id in field.actuators.values() for actuator in by_id.values()]
+        capacities = [max(float(actuator.consumption or 0), 0.0) for actuator in actuators]
+        total = sum(capacities)
+        if total <= 0:
+            return [(actuator, 1 / len(actuators)) for actuator in actuators]
+        return [(actuator, capacity / total) for actuator, capacity in zip(actuators, capacities)]
+
+    def _capture_state(self) -> Dict:
+        return {
+            'commands': [
+                [zone_id, field_id, command, water_need, issued_at]
+                for (zone_id, field_id), (command, water_need, issued_at) in list(self.commands.items())
+            ]
+        }
+
+    def _restore_state(self) -> None:
+        if not self.snapshotter:
+            return
+        try:
+            start = perf_counter()
+            snapshot = self.snapshotter.store.latest()
+            if snapshot is None:
+                logger.info("No state snapshot found, starting from scratch")
+                return
+            taken_at, state = snapshot
+            for zone_id, field_id, command, water_need, issued_at in state.get('commands', []):
+                self.commands[(zone_id, field_id)] = (command, water_need, issued_at)
+            self._restored_commands = dict(self.commands)
+            self._restored_until = time() + self.config.COMMAND_REPEAT_INTERVAL
+            logger.info(
+                f"Restored {len(self.commands)} field commands from the snapshot taken at {taken_at:.0f} "
+                f"in {(perf_counter() - start) * 1000:.1f}ms"
+            )
+        except Exception as e:
+            logger.error(f"Failed to restore the state snapshot, starting from scratch: {e}")
+
     def _setup_mqtt_client(self) -> None:
         try:
             self.mqtt_client = mqtt.Client()
@@ -43,6 +182,9 @@ class Executor:
     def _on_connect(self, client, userdata, flags, rc: int) -> None:
         if rc == 0:
             logger.info("Connected to MQTT broker successfully")
+            if self._connected_once:
+                self.mqtt_reconnects.inc()
+            self._connected_once = True
             topic = f"{self.config.PLANNER_TOPIC_PREFIX}/#"
             client.subscribe(topic)
             logger.info(f"Subscribed to topic: {topic}")
@@ -50,10 +192,18 @@ class Executor:
             logger.error(f"Failed to connect to MQTT broker with result code: {rc}")
 
     def _on_message(self, client, userdata, msg) -> None:
+        self.messages_received.labels(topic_family(msg.topic)).inc()
+        with self.message_latency.time():
+            self._process_message(client, msg)
+
+    def _process_message(self, client, msg) -> None:
         try:
-            topic = msg.topic
             try:
-                payload = self._parse_payload(msg.payload)
+                topic, codec = codec_for_topic(msg.topic)
+                if topic.startswith(f"{self.config.PLANNER_TOPIC_PREFIX}/schedule/"):
+                    self._process_schedule(topic, codec.decode(msg.payload))
+                    return
+                payload = self._parse_payload(msg.payload, codec)
             except Exception as e:
                 logger.error(f"Error parsing payload: {e}")
                 return
@@ -66,16 +216,32 @@ class Executor:
                 logger.error(f"Invalid topic format: {topic}")
                 return
 
+            self.trace_recorder.record(extract_trace(payload))
             self._execute_action(client, zone_id, field_id, payload)
             
         except Exception as e:
             logger.error(f"Error processing message: {e}")
 
-    def _parse_payload(self, payload: bytes) -> Dict:
+    def _process_schedule(self, topic: str, schedule: Dict) -> None:
+        parts = topic.split('/')
+        if len(parts) < 4 or not isinstance(schedule, dict):
+            logger.error(f"Invalid schedule on {topic}")
+            return
+        zone_id = parts[3]
+        count = self.schedules.update(zone_id, schedule)
+        logger.info(f"Received the day-ahead schedule of zone {zone_id} with {count} irrigation starts")
+
+    def _follow_schedules(self) -> None:
+        for zone_id, field_id, water_need in self.schedules.due():
+            self._execute_action(self.mqtt_client, zone_id, field_id, {
+                'action': 'start_irrigation', 'reason': SCHEDULED_REASON, 'water_need': water_need
+            })
+
+    def _parse_payload(self, payload: bytes, codec) -> Dict:
         try:
-            data = json.loads(payload.decode())
+            data = codec.decode(payload)
             if not isinstance(data, dict):
-                raise ValueError("Payload must be a JSON object")
+                raise ValueError("Payload must be an object")
             
             action = data.get('action')
             reason = data.get('reason')
@@ -85,9 +251,6 @@ class Executor:
                 
             return data
             
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON payload: {e}")
-            raise
         except ValueError as e:
             logger.error(str(e))
             raise
@@ -104,22 +267,72 @@ class Executor:
             action = payload['action']
             water_need = payload['water_need']
             reason = payload['reason']
-            
-            topic = f"{self.config.EXECUTOR_TOPIC_PREFIX}/zone/{zone_id}/field/{field_id}"
-            client.publish(topic, json.dumps({"command": action, "water_need": water_need}))
-            
-            logger.info(
-                f"Executed action for {zone_id}/{field_id}: {action}, Reason: {reason}"
-            )
+            if self._is_repeat(zone_id, field_id, action, water_need):
+                self.actions_repeated.labels(action).inc()
+                logger.debug("Skipped repeated %s for %s/%s", action, zone_id, field_id)
+                return
+
+            field_topic = f"{self.config.EXECUTOR_TOPIC_PREFIX}/zone/{zone_id}/field/{field_id}"
+            trace = extract_trace(payload)
+            shares = self.actuator_shares.get((zone_id, field_id)) if self.config.ACTUATOR_COMMANDS_ENABLED else None
+            if shares:
+                for actuator, share in shares:
+                    topic = f"{field_topic}/actuator/{actuator.actuator_id}/{actuator.type}{self.codec.suffix}"
+                    command = forward_trace(trace, {"command": action, "water_need": (water_need or 0) * share})
+                    client.publish(topic, self.codec.encode(command))
+                    self.messages_published.labels(self.config.EXECUTOR_TOPIC_PREFIX).inc()
+            else:
+                # Unknown inventory, every actuator of the field gets the whole command
+                command = forward_trace(trace, {"command": action, "water_need": water_need})
+                client.publish(f"{field_topic}{self.codec.suffix}", self.codec.encode(command))
+                self.messages_published.labels(self.config.EXECUTOR_TOPIC_PREFIX).inc()
+            self.actions_made.labels(action).inc()
+            self.commands[(zone_id, field_id)] = (action, water_need, time())
+            self._restored_commands.pop((zone_id, field_id), None)
+
+            logger.info("Executed action for %s/%s: %s, Reason: %s", zone_id, field_id, action, reason)
         except Exception as e:
             logger.error(f"Error executing action: {e}")
 
+    def _is_repeat(self, zone_id: str, field_id: str, action: str, water_need: float) -> bool:
+        """
+        Whether a plan received shortly after a restart repeats the command
+        restored for its field, which the actuators already carried out.
+        Outside that window every plan is executed, repeats included, as the
+        planner sends them as keep-alives.
+        """
+        if not self._restored_commands:
+            return False
+        now = time()
+        if now >= self._restored_until:
+            self._restored_commands = {}
+            return False
+        last = self._restored_commands.get((zone_id, field_id))
+        if last is None:
+            return False
+        command, last_water_need, issued_at = last
+        return (
+            command == action and last_water_need == water_need
+            and now - issued_at < self.config.COMMAND_REPEAT_INTERVAL
+        )
+
     def run(self) -> None:
         try:
             logger.info("Starting Executor service...")
+            if self.metrics_server:
+                self.metrics_server.start()
+            if self.metrics_pusher:
+                self.metrics_pusher.start(self.mqtt_client)
+            if self.snapshotter:
+                self.snapshotter.start()
+            self.schedule_ticker.start()
+            if self.topology_reloader:
+                self.topology_reloader.start()
             self.mqtt_client.loop_forever()
         except KeyboardInterrupt:
             logger.info("Shutting down Executor service...")
+            if self.snapshotter:
+                self.snapshotter.stop()
             self.mqtt_client.disconnect()
         except Exception as e:
             logger.error(f"Error in Executor service: {e}")
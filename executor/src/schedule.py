@@ -0,0 +1,97 @@
+import heapq
+import logging
+import threading
+from time import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class ScheduleBook:
+    """
+    The day-ahead irrigation schedules published by the planner, one per zone.
+
+    Starts of every zone share a heap ordered by start time. A new schedule
+    for a zone replaces the previous one: its entries are left in the heap
+    and skipped when popped, as they carry an older generation. Starts more
+    than `max_delay` seconds overdue when their schedule arrives, such as
+    those of a retained schedule read after a restart, are dropped.
+    """
+
+    def __init__(self, max_delay: float = 300):
+        self.max_delay = max_delay
+        self._heap: List[Tuple[float, int, str, str, float]] = []
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def pending_count(self) -> int:
+        return sum(1 for entry in list(self._heap) if self._generations.get(entry[2]) == entry[1])
+
+    def update(self, zone_id: str, schedule: dict, now: Optional[float] = None) -> int:
+        """
+        Replace the schedule of `zone_id` with `schedule`, a planner schedule
+        message mapping each field to its `[start, water_need]` pairs.
+
+        :return: The number of starts scheduled.
+        """
+        now = time() if now is None else now
+        earliest = max(float(schedule.get('generated_at', 0)), now - self.max_delay)
+        count = 0
+        with self._lock:
+            generation = self._generations.get(zone_id, 0) + 1
+            self._generations[zone_id] = generation
+            for field_id, starts in schedule.get('fields', {}).items():
+                for start, water_need in starts:
+                    if start < earliest:
+                        continue
+                    heapq.heappush(self._heap, (float(start), generation, zone_id, field_id, float(water_need)))
+                    count += 1
+        return count
+
+    def due(self, now: Optional[float] = None) -> List[Tuple[str, str, float]]:
+        """
+        Pop the starts whose time has come, as `(zone_id, field_id, water_need)`.
+        """
+        now = time() if now is None else now
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, generation, zone_id, field_id, water_need = heapq.heappop(self._heap)
+                if self._generations.get(zone_id) == generation:
+                    due.append((zone_id, field_id, water_need))
+        return due
+
+class ScheduleTicker:
+    """
+    Calls `on_tick` every `interval` seconds from a daemon thread, to carry
+    out the scheduled starts that became due.
+    """
+
+    def __init__(self, on_tick: Callable[[], None], interval: float = 1.0):
+        self.on_tick = on_tick
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="schedule-ticker", daemon=True)
+        self._thread.start()
+        logger.info(f"Started schedule ticker every {self.interval}s")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.on_tick()
+            except Exception as e:
+                logger.error(f"Error carrying out scheduled irrigations: {e}")
@@ -143,6 +143,31 @@ class TemperatureSensor(Sensor):
         self.value = max(self.min_value, min(self.max_value, value))
         return self.value
 
+class SensorRecord:
+    """
+    Plain description of a sensor, used when only the topology is needed.
+
+    Unlike `Sensor` it opens no MQTT connection and starts no threads.
+    """
+
+    __slots__ = ('sensor_id', 'type', 'value', 'min_value', 'max_value')
+
+    def __init__(self, sensor_id: str, type: str, value=None, min_value=None, max_value=None, **kwargs):
+        self.sensor_id = sensor_id
+        self.type = type
+        self.value = value
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def to_dict(self):
+        return {
+            'sensor_id': self.sensor_id,
+            'type': self.type,
+            'value': self.value,
+            'min_value': self.min_value,
+            'max_value': self.max_value
+        }
+
 class SensorFactory:
     SENSOR_MAP = {
         SensorType.SOIL_MOISTURE.value: SoilMoistureSensor,
@@ -1,12 +1,12 @@
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 
 import requests
 from requests.exceptions import ConnectionError, HTTPError, RequestException
 
-from .actuator import ActuatorFactory
+from .actuator import Actuator, ActuatorFactory, ActuatorRecord
 from .field import Field
-from .sensor import SensorFactory
+from .sensor import Sensor, SensorFactory, SensorRecord
 
 logging.basicConfig(
     level=logging.INFO,
@@ -37,8 +37,17 @@ class Zone:
         }
 
 class ZoneService:     
-    def __init__(self, backend_url: str):
+    """
+    Client for the backend zones API.
+
+    With `model_only` the parsed topology is a plain data model: sensors and
+    actuators are built as `SensorRecord`s and `ActuatorRecord`s instead of
+    live devices, so parsing opens no broker connections and starts no threads.
+    """
+
+    def __init__(self, backend_url: str, model_only: bool = False):
         self.backend_url = backend_url.rstrip('/')
+        self.model_only = model_only
         logger.info(f"Initialized ZoneService with backend URL: {backend_url}")
 
     def _make_request(self, method: str, endpoint: str, data: Optional[dict] = None) -> Optional[dict]:
@@ -68,13 +77,37 @@ class ZoneService:
 
             zones = []
             for zone_data in data:
-                zone = self._parse_zone(zone_data)
+                zone = self.parse_zone(zone_data)
                 zones.append(zone)
             return zones
         except Exception as e:
             logger.error(f"Error processing zones data: {e}")
             return []
 
+    def fetch_zones(self, etag: Optional[str] = None) -> Tuple[Optional[List[dict]], Optional[str]]:
+        """
+        Fetch the raw zones payload, revalidating against `etag`.
+
+        :return: The payload and its ETag, or (None, etag) when the topology
+                 has not changed since `etag` or the request failed.
+        """
+        try:
+            headers = {'If-None-Match': etag} if etag else {}
+            response = requests.get(f"{self.backend_url}/zones", headers=headers, timeout=10)
+            if response.status_code == 304:
+                return None, etag
+            response.raise_for_status()
+            return response.json(), response.headers.get('ETag')
+        except HTTPError as e:
+            logger.error(f"HTTP error occurred: {e}, Status code: {e.response.status_code}")
+        except ConnectionError as e:
+            logger.error(f"Error connecting to backend: {e}")
+        except RequestException as e:
+            logger.error(f"Error making request: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
+        return None, etag
+
     def add_zone(self, zone: Zone) -> Optional[dict]:
         try:
             zone_data = zone.to_dict()
@@ -97,36 +130,56 @@ class ZoneService:
             if not data:
                 return None
 
-            zone = self._parse_zone(data)
+            zone = self.parse_zone(data)
             return zone
         except Exception as e:
             logger.error(f"Error fetching zone {zone_id}: {e}")
             return None
         
-    def _parse_zone(self, zone_data: dict) -> Zone:
+    def parse_zone(self, zone_data: dict) -> Zone:
         zone = Zone(zone_id=zone_data['zone_id'],latitude=zone_data['latitude'],longitude=zone_data['longitude'])
         for field_data in zone_data.get('fields', []):
-            try:
-                field = Field(
-                    field_data['field_id'],
-                    field_data['soil_moisture_threshold'],
-                    field_data['area'],
-                    field_data['soil_depth']
-                )
-            except Exception as e:
-                logger.error(f"Error creating field {field.field_id}: {e}")
-                return
-            for sensor_data in field_data.get('sensors', []):
-                try:
-                    sensor = SensorFactory.create_sensor(zone=zone, field=field, **sensor_data)
-                    field.add_sensor(sensor)
-                except Exception as e:
-                    logger.error(f"Error creating sensor {sensor_data['sensor_id']}: {e}")
-            # for actuator_data in field_data.get('actuators', []):
-            #     try:
-            #         actuator = ActuatorFactory.create_actuator(zone_id=zone.zone_id, field_id=field.field_id,**actuator_data)
-            #         field.add_actuator(actuator)
-            #     except Exception as e:
-            #         logger.error(f"Error creating actuator {actuator_data['actuator_id']}: {e}")
-            zone.add_field(field)
-        return zone
\ No newline at end of file
+            field = self.parse_field(zone, field_data)
+            if field:
+                zone.add_field(field)
+        return zone
+
+    def parse_field(self, zone: Zone, field_data: dict) -> Optional[Field]:
+        try:
+            field = Field(
+                field_data['field_id'],
+                field_data['soil_moisture_threshold'],
+                field_data['area'],
+                field_data['soil_depth']
+            )
+        except Exception as e:
+            logger.error(f"Error creating field {field_data.get('field_id')}: {e}")
+            return None
+        for sensor_data in field_data.get('sensors', []):
+            sensor = self.parse_sensor(zone, field, sensor_data)
+            if sensor:
+                field.add_sensor(sensor)
+        if self.model_only:
+            for actuator_data in field_data.get('actuators', []):
+                actuator = self.parse_actuator(zone, field, actuator_data)
+                if actuator:
+                    field.add_actuator(actuator)
+        return field
+
+    def parse_sensor(self, zone: Zone, field: Field, sensor_data: dict) -> Optional[Union[Sensor, SensorRecord]]:
+        try:
+            if self.model_only:
+                return SensorRecord(**sensor_data)
+            return SensorFactory.create_sensor(zone=zone, field=field, **sensor_data)
+        except Exception as e:
+            logger.error(f"Error creating sensor {sensor_data.get('sensor_id')}: {e}")
+            return None
+
+    def parse_actuator(self, zone: Zone, field: Field, actuator_data: dict) -> Optional[Union[Actuator, ActuatorRecord]]:
+        try:
+            if self.model_only:
+                return ActuatorRecord(zone_id=zone.zone_id, field_id=field.field_id, **actuator_data)
+            return ActuatorFactory.create_actuator(zone_id=zone.zone_id, field_id=field.field_id, **actuator_data)
+        except Exception as e:
+            logger.error(f"Error creating actuator {actuator_data.get('actuator_id')}: {e}")
+            return None
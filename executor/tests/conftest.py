@@ -0,0 +1,35 @@
+import copy
+import sys
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+SERVICE = Path(__file__).resolve().parent.parent
+# The service is imported as `src`, the shared modules as `irrigation_common`
+sys.path[:0] = [str(SERVICE), str(SERVICE.parent / 'common')]
+
+from src import executor as executor_module  # noqa: E402
+from src.config import Config  # noqa: E402
+from src.zone import ZoneService  # noqa: E402
+from support import zone  # noqa: E402
+
+
+@pytest.fixture
+def make_executor():
+    """
+    Build an Executor on the given zones payload, without a broker or a
+    backend. Publications are recorded on `mqtt_client`; snapshots are off
+    unless a SNAPSHOT_PATH is given. With `backend_down` the zones cannot be
+    fetched at startup.
+    """
+    def make(zones=None, backend_down=False, **options):
+        options.setdefault('SNAPSHOT_PATH', '')
+        options.setdefault('METRICS_PORT', 0)
+        options.setdefault('TOPOLOGY_RELOAD_INTERVAL', 0)
+        payload = copy.deepcopy(zones if zones is not None else [zone('z1')])
+        response = (None, None) if backend_down else (payload, '"v1"')
+        with mock.patch.object(ZoneService, 'fetch_zones', return_value=response), \
+                mock.patch.object(executor_module.mqtt, 'Client'):
+            return executor_module.Executor(Config(MQTT_BROKER_URL='broker:1883', BACKEND_URL='http://backend', **options))
+    return make
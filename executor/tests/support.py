@@ -0,0 +1,47 @@
+"""
+Topology payloads and MQTT helpers shared by the executor tests.
+"""
+import json
+
+
+def actuator(actuator_id: str, consumption: float, actuator_type: str = 'sprinkler') -> dict:
+    return {
+        'actuator_id': actuator_id, 'type': actuator_type, 'consumption': consumption,
+        'measurement': 'l', 'min_value': 0, 'max_value': 100
+    }
+
+
+def field(field_id: str, actuators=None) -> dict:
+    return {
+        'field_id': field_id, 'soil_moisture_threshold': 30, 'area': 100, 'soil_depth': 0.3, 'sensors': [],
+        'actuators': actuators if actuators is not None else [actuator(f'{field_id}_a1', 10)]
+    }
+
+
+def zone(zone_id: str, fields=None) -> dict:
+    return {
+        'zone_id': zone_id, 'latitude': 42.35, 'longitude': 13.4,
+        'fields': fields if fields is not None else [field('f1')]
+    }
+
+
+class Message:
+    def __init__(self, topic: str, payload):
+        self.topic = topic
+        self.payload = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+
+
+def published(executor, prefix: str = 'executor/') -> list:
+    """
+    Decoded commands the executor published, as `(topic, payload)` pairs.
+    """
+    return [
+        (call.args[0], json.loads(call.args[1]))
+        for call in executor.mqtt_client.publish.call_args_list
+        if call.args[0].startswith(prefix)
+    ]
+
+
+def send(executor, field_id: str, action: str, water_need: float = 0, zone_id: str = 'z1') -> None:
+    payload = {'action': action, 'reason': 'test', 'water_need': water_need}
+    executor._on_message(executor.mqtt_client, None, Message(f'planner/zone/{zone_id}/field/{field_id}', payload))
@@ -0,0 +1,50 @@
+from unittest import mock
+
+import pytest
+
+from src.zone import ZoneService
+from support import actuator, field, published, send, zone
+
+FIELD_TOPIC = 'executor/zone/z1/field/f1'
+
+
+def test_water_need_is_split_by_consumption(make_executor):
+    executor = make_executor([zone('z1', [field('f1', [actuator('a1', 30), actuator('a2', 10, 'drip_irrigation')])])])
+    send(executor, 'f1', 'start_irrigation', 200)
+    commands = dict(published(executor))
+    assert commands == {
+        f'{FIELD_TOPIC}/actuator/a1/sprinkler': {'command': 'start_irrigation', 'water_need': pytest.approx(150)},
+        f'{FIELD_TOPIC}/actuator/a2/drip_irrigation': {'command': 'start_irrigation', 'water_need': pytest.approx(50)}
+    }
+
+
+def test_unknown_field_gets_one_field_command(make_executor):
+    executor = make_executor([zone('z1', [field('f1', [])])])
+    send(executor, 'f1', 'start_irrigation', 200)
+    send(executor, 'f2', 'stop_irrigation')
+    assert [topic for topic, _ in published(executor)] == [FIELD_TOPIC, 'executor/zone/z1/field/f2']
+
+
+def test_field_commands_when_actuator_commands_are_disabled(make_executor):
+    executor = make_executor(ACTUATOR_COMMANDS_ENABLED=False)
+    send(executor, 'f1', 'start_irrigation', 200)
+    assert published(executor) == [(FIELD_TOPIC, {'command': 'start_irrigation', 'water_need': 200})]
+
+
+def test_reloader_retries_and_refreshes_the_shares(make_executor):
+    executor = make_executor(backend_down=True, TOPOLOGY_RELOAD_INTERVAL=30)
+    assert executor.actuator_shares == {}
+    assert executor.topology_reloader.etag is None
+
+    payload = [zone('z1', [field('f1', [actuator('a1', 10), actuator('a2', 30)])])]
+    with mock.patch.object(ZoneService, 'fetch_zones', return_value=(payload, '"v2"')):
+        assert executor.topology_reloader.poll()
+    shares = {record.actuator_id: share for record, share in executor.actuator_shares[('z1', 'f1')]}
+    assert shares == {'a1': pytest.approx(0.25), 'a2': pytest.approx(0.75)}
+    assert executor.topology_reloader.etag == '"v2"'
+
+
+def test_unknown_actuator_keys_are_ignored(make_executor):
+    document = dict(actuator('a1', 10), installed_at='2024-05-01')
+    executor = make_executor([zone('z1', [field('f1', [document])])])
+    assert [record.actuator_id for record, _ in executor.actuator_shares[('z1', 'f1')]] == ['a1']
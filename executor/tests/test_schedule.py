@@ -0,0 +1,32 @@
+from time import time
+
+from src.schedule import ScheduleBook
+from support import Message, published
+
+
+def test_newer_schedule_replaces_the_zone_starts():
+    book = ScheduleBook(max_delay=300)
+    book.update('z1', {'generated_at': 0, 'fields': {'f1': [[100, 50], [200, 60]]}}, now=0)
+    book.update('z2', {'generated_at': 0, 'fields': {'f1': [[150, 70]]}}, now=0)
+    book.update('z1', {'generated_at': 50, 'fields': {'f2': [[120, 80]]}}, now=50)
+    assert book.pending_count() == 2
+    assert book.due(now=199) == [('z1', 'f2', 80), ('z2', 'f1', 70)]
+    assert book.due(now=1000) == []
+
+
+def test_long_overdue_starts_are_dropped():
+    book = ScheduleBook(max_delay=300)
+    assert book.update('z1', {'generated_at': 0, 'fields': {'f1': [[100, 50], [900, 60]]}}, now=1000) == 1
+    assert book.due(now=1000) == [('z1', 'f1', 60)]
+
+
+def test_executor_starts_scheduled_fields(make_executor):
+    executor = make_executor()
+    now = time()
+    schedule = {'generated_at': now - 1, 'fields': {'f1': [[now - 1, 40], [now + 3600, 50]]}}
+    executor._on_message(executor.mqtt_client, None, Message('planner/schedule/zone/z1', schedule))
+    executor._follow_schedules()
+    [(topic, command)] = published(executor)
+    assert topic == 'executor/zone/z1/field/f1/actuator/f1_a1/sprinkler'
+    assert command == {'command': 'start_irrigation', 'water_need': 40}
+    assert executor.schedules.pending_count() == 1
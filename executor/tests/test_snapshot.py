@@ -0,0 +1,31 @@
+from support import published, send
+
+
+def restarted(make_executor, tmp_path, **options):
+    path = str(tmp_path / 'state.sqlite')
+    executor = make_executor(SNAPSHOT_PATH=path, **options)
+    send(executor, 'f1', 'start_irrigation', 100)
+    executor.snapshotter.stop()
+    return make_executor(SNAPSHOT_PATH=path, **options)
+
+
+def test_replayed_plan_is_dropped_right_after_a_restart(make_executor, tmp_path):
+    executor = restarted(make_executor, tmp_path)
+    send(executor, 'f1', 'start_irrigation', 100)
+    assert published(executor) == []
+    send(executor, 'f1', 'start_irrigation', 120)
+    send(executor, 'f1', 'start_irrigation', 120)
+    assert [command['water_need'] for _, command in published(executor)] == [120, 120]
+
+
+def test_repeats_are_executed_once_the_window_closed(make_executor, tmp_path):
+    executor = restarted(make_executor, tmp_path, COMMAND_REPEAT_INTERVAL=0)
+    send(executor, 'f1', 'start_irrigation', 100)
+    assert len(published(executor)) == 1
+
+
+def test_keep_alives_are_executed_without_a_restore(make_executor):
+    executor = make_executor()
+    send(executor, 'f1', 'start_irrigation', 100)
+    send(executor, 'f1', 'start_irrigation', 100)
+    assert len(published(executor)) == 2
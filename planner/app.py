@@ -1,13 +1,55 @@
 import os
 
+from irrigation_common.logging_config import setup_logging
+
 from src.config import Config
 from src.planner import Planner
 
 MQTT_BROKER_URL = os.getenv('MQTT_BROKER_URL', 'mqtt://mosquitto')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9100))
+METRICS_PUSH_INTERVAL = float(os.getenv('METRICS_PUSH_INTERVAL', 0))
+PAYLOAD_CODEC = os.getenv('PAYLOAD_CODEC', 'json')
+MIN_RUN_SECONDS = float(os.getenv('MIN_RUN_SECONDS', 120))
+MIN_REST_SECONDS = float(os.getenv('MIN_REST_SECONDS', 300))
+PLAN_REFRESH_INTERVAL = float(os.getenv('PLAN_REFRESH_INTERVAL', 300))
+PLAN_TICK_INTERVAL = float(os.getenv('PLAN_TICK_INTERVAL', 1.0))
+ZONE_WATER_BUDGET = float(os.getenv('ZONE_WATER_BUDGET', 0))
+ALLOCATION_WINDOW = float(os.getenv('ALLOCATION_WINDOW', 2.0))
+MAX_RUNNING_PER_ZONE = int(os.getenv('MAX_RUNNING_PER_ZONE', 0))
+START_STAGGER_INTERVAL = float(os.getenv('START_STAGGER_INTERVAL', 0))
+POLICY_PATH = os.getenv('POLICY_PATH', '')
+POLICY_RELOAD_INTERVAL = float(os.getenv('POLICY_RELOAD_INTERVAL', 5))
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', 'data/planner_state.sqlite')
+SNAPSHOT_INTERVAL = float(os.getenv('SNAPSHOT_INTERVAL', 5))
+SCHEDULE_INTERVAL = float(os.getenv('SCHEDULE_INTERVAL', 0))
+SCHEDULE_HORIZON_HOURS = float(os.getenv('SCHEDULE_HORIZON_HOURS', 24))
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_RATE_LIMIT = float(os.getenv('LOG_RATE_LIMIT', 10))
+LOG_BURST = int(os.getenv('LOG_BURST', 20))
+LOG_SAMPLE_EVERY = int(os.getenv('LOG_SAMPLE_EVERY', 1))
 
 def main():
+    setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_RATE_LIMIT, LOG_BURST, LOG_SAMPLE_EVERY)
     config = Config(
-        MQTT_BROKER_URL=MQTT_BROKER_URL
+        MQTT_BROKER_URL=MQTT_BROKER_URL,
+        METRICS_PORT=METRICS_PORT,
+        METRICS_PUSH_INTERVAL=METRICS_PUSH_INTERVAL,
+        PAYLOAD_CODEC=PAYLOAD_CODEC,
+        MIN_RUN_SECONDS=MIN_RUN_SECONDS,
+        MIN_REST_SECONDS=MIN_REST_SECONDS,
+        PLAN_REFRESH_INTERVAL=PLAN_REFRESH_INTERVAL,
+        PLAN_TICK_INTERVAL=PLAN_TICK_INTERVAL,
+        ZONE_WATER_BUDGET=ZONE_WATER_BUDGET,
+        ALLOCATION_WINDOW=ALLOCATION_WINDOW,
+        MAX_RUNNING_PER_ZONE=MAX_RUNNING_PER_ZONE,
+        START_STAGGER_INTERVAL=START_STAGGER_INTERVAL,
+        POLICY_PATH=POLICY_PATH,
+        POLICY_RELOAD_INTERVAL=POLICY_RELOAD_INTERVAL,
+        SNAPSHOT_PATH=SNAPSHOT_PATH,
+        SNAPSHOT_INTERVAL=SNAPSHOT_INTERVAL,
+        SCHEDULE_INTERVAL=SCHEDULE_INTERVAL,
+        SCHEDULE_HORIZON_HOURS=SCHEDULE_HORIZON_HOURS
     )
     
     planner = Planner(config)
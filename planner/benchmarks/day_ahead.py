@@ -0,0 +1,68 @@
+"""
+Time a full rebuild of the day-ahead schedule as the number of fields
+grows, and the per-message lookup that replaces live planning for the
+fields the schedule covers.
+
+Run from the planner directory:
+
+    python -m benchmarks.day_ahead --fields 1000 10000 100000
+"""
+import argparse
+import random
+from time import perf_counter
+
+from src.day_ahead import DayAheadScheduler
+
+
+def run(field_count: int, zone_count: int, horizon_hours: float) -> dict:
+    now = 1_700_000_000.0
+    scheduler = DayAheadScheduler(horizon_hours * 3600, interval=3600)
+    keys = [(f'zone_{index % zone_count}', f'field_{index}') for index in range(field_count)]
+    for key in keys:
+        threshold = random.uniform(20, 40)
+        scheduler.observe(key, {
+            'soil_moisture': threshold + random.uniform(-5, 15),
+            'moisture_trend': random.uniform(-1.5, 0.2),
+            'soil_moisture_threshold': threshold,
+            'target_moisture': threshold + 5,
+            'liters_per_point': random.uniform(50, 500),
+            'rain_windows': [[now + 6 * 3600, now + 9 * 3600]] if random.random() < 0.3 else [],
+            'observed_at': now
+        })
+
+    start = perf_counter()
+    zones = scheduler.build(now)
+    build_seconds = perf_counter() - start
+
+    start = perf_counter()
+    covered = sum(1 for key in keys if scheduler.covers(key, now))
+    lookup_seconds = perf_counter() - start
+
+    return {
+        'fields': field_count,
+        'zones': len(zones),
+        'starts': scheduler.scheduled_count(),
+        'build_ms': build_seconds * 1000,
+        'lookup_us': lookup_seconds / field_count * 1e6,
+        'covered': covered / field_count
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fields', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--zones', type=int, default=100)
+    parser.add_argument('--horizon', type=float, default=24, help="Schedule horizon in hours")
+    args = parser.parse_args()
+
+    print(f"{'fields':>8} {'starts':>8} {'build (ms)':>11} {'lookup (us)':>12} {'covered':>8}")
+    for field_count in args.fields:
+        result = run(field_count, args.zones, args.horizon)
+        print(
+            f"{result['fields']:>8} {result['starts']:>8} {result['build_ms']:>11.3f} "
+            f"{result['lookup_us']:>12.3f} {result['covered']:>8.1%}"
+        )
+
+
+if __name__ == '__main__':
+    main()
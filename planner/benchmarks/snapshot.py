@@ -0,0 +1,70 @@
+"""
+Measure how long the Planner takes to write a state snapshot and to restore
+it on startup as the number of fields grows, and check that the restored
+plan states match the ones that were saved.
+
+Run from the planner directory:
+
+    python -m benchmarks.snapshot --fields 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+from time import perf_counter
+
+from irrigation_common.snapshot import SnapshotStore
+
+from src.plan_state import COOLDOWN, IDLE, IRRIGATING, PlanStateMachine
+
+
+def run(field_count: int, zone_count: int, workdir: str) -> dict:
+    states = PlanStateMachine(min_run=120, min_rest=300)
+    for index in range(field_count):
+        key = (f'zone_{index % zone_count}', f'field_{index}')
+        states.restore([[key[0], key[1], random.choice((IDLE, IRRIGATING, COOLDOWN)), 0.0, None, 0.0]], now=0, wall_now=0)
+    store = SnapshotStore(os.path.join(workdir, f'state_{field_count}.sqlite'))
+
+    start = perf_counter()
+    data = json.dumps({'fields': states.export()}, separators=(',', ':'))
+    store.append(data)
+    write_seconds = perf_counter() - start
+
+    start = perf_counter()
+    _, state = store.latest()
+    restored = PlanStateMachine(min_run=120, min_rest=300)
+    restored.restore(state['fields'])
+    load_seconds = perf_counter() - start
+    store.close()
+
+    for plan_state in (IDLE, IRRIGATING, COOLDOWN):
+        if restored.count(plan_state) != states.count(plan_state):
+            raise AssertionError(f"Restored {plan_state} fields do not match the snapshot")
+
+    return {
+        'fields': field_count,
+        'size_kb': len(data) / 1024,
+        'write_ms': write_seconds * 1000,
+        'load_ms': load_seconds * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fields', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--zones', type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'fields':>8} {'size (KB)':>10} {'write (ms)':>11} {'load (ms)':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for field_count in args.fields:
+            result = run(field_count, args.zones, workdir)
+            print(
+                f"{result['fields']:>8} {result['size_kb']:>10.1f} "
+                f"{result['write_ms']:>11.3f} {result['load_ms']:>10.3f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
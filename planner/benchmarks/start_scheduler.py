@@ -0,0 +1,72 @@
+"""
+Measure the cost per operation of the StartScheduler as the number of
+pending starts grows: scheduling a burst of starts, releasing slots (which
+schedules parked starts) and popping the starts that became due.
+
+Run from the planner directory:
+
+    python -m benchmarks.start_scheduler --plans 1000 10000 100000
+"""
+import argparse
+import random
+from time import perf_counter
+
+from src.start_scheduler import StartScheduler
+
+
+def run(plan_count: int, zone_count: int, max_running: int, stagger: float) -> dict:
+    scheduler = StartScheduler(max_running, stagger)
+    keys = [(f'zone_{index % zone_count}', f'field_{index}') for index in range(plan_count)]
+    random.shuffle(keys)
+
+    start = perf_counter()
+    for key in keys:
+        scheduler.schedule(key, {'action': 'start_irrigation'}, now=0)
+    schedule_seconds = perf_counter() - start
+    pending = scheduler.pending_count
+
+    now = 0.0
+    started = 0
+    finished = 0
+    due_seconds = 0.0
+    finish_seconds = 0.0
+    while scheduler.pending_count:
+        now += stagger or 1
+        start = perf_counter()
+        batch = scheduler.due(now)
+        due_seconds += perf_counter() - start
+        started += len(batch)
+        start = perf_counter()
+        for key, _ in batch:
+            scheduler.finish(key, now)
+        finish_seconds += perf_counter() - start
+        finished += len(batch)
+
+    return {
+        'plans': plan_count,
+        'pending': pending,
+        'schedule_us': schedule_seconds / plan_count * 1e6,
+        'due_us': due_seconds / max(started, 1) * 1e6,
+        'finish_us': finish_seconds / max(finished, 1) * 1e6
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--plans', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--zones', type=int, default=100)
+    parser.add_argument('--max-running', type=int, default=5)
+    parser.add_argument('--stagger', type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'plans':>8} {'pending':>8} {'schedule (us)':>14} {'due (us)':>9} {'finish (us)':>12}")
+    for plan_count in args.plans:
+        result = run(plan_count, args.zones, args.max_running, args.stagger)
+        print(
+            f"{result['plans']:>8} {result['pending']:>8} {result['schedule_us']:>14.3f} "
+            f"{result['due_us']:>9.3f} {result['finish_us']:>12.3f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
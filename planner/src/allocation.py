@@ -0,0 +1,152 @@
+import threading
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+FieldKey = Tuple[str, str]
+
+def water_fill(needs: np.ndarray, weights: np.ndarray, budget: float) -> np.ndarray:
+    """
+    Split `budget` across fields by weighted water-filling.
+
+    Every field gets `min(need, level * weight)` for the single `level` at
+    which the grants add up to the budget, so no field gets more than it
+    needs and the fields still short all get the same grant per unit of
+    weight. Solved in one sort and a few cumulative sums.
+
+    :param needs: Requested amount per field, non-negative.
+    :param weights: Share of each field, positive.
+    :param budget: Total amount available.
+    :return: The amount granted to each field.
+    """
+    needs = np.asarray(needs, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    if budget <= 0 or len(needs) == 0:
+        return np.zeros(len(needs))
+    if needs.sum() <= budget:
+        return needs.copy()
+    # Fields sorted by the level at which they are fully served
+    saturation = needs / weights
+    order = np.argsort(saturation, kind='stable')
+    saturation = saturation[order]
+    served = np.concatenate(([0.0], np.cumsum(needs[order])[:-1]))
+    remaining_weight = np.cumsum(weights[order][::-1])[::-1]
+    # Level if the first k fields are fully served and the rest share what is left
+    levels = (budget - served) / remaining_weight
+    k = int(np.argmax(levels <= saturation))
+    return np.minimum(needs, levels[k] * weights)
+
+class ZoneAllocator:
+    """
+    Shares a per zone water budget between the fields that ask for water.
+
+    Requests are collected per zone for `window` seconds, then the budget not
+    yet granted to irrigating fields of the zone is water-filled across them,
+    weighted by deficit times priority: with equal priorities every field is
+    served the same fraction of its need. Fields granted nothing stay
+    pending for the next round. Grants are held until `release`, so the
+    water committed to a zone never exceeds its budget.
+    """
+
+    def __init__(self, budget: float, window: float = 2.0):
+        self.budget = budget
+        self.window = window
+        self._pending: Dict[str, Dict[str, Tuple[float, float]]] = {}
+        self._opened: Dict[str, float] = {}
+        self._granted: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def granted(self, zone_id: str) -> float:
+        return sum(self._granted.get(zone_id, {}).values())
+
+    def pending_count(self) -> int:
+        return sum(len(requests) for requests in list(self._pending.values()))
+
+    def request(self, key: FieldKey, need: float, priority: float = 1.0, now: Optional[float] = None) -> None:
+        """
+        Queue the latest water need of a field for the next allocation round.
+        """
+        now = monotonic() if now is None else now
+        zone_id, field_id = key
+        with self._lock:
+            self._pending.setdefault(zone_id, {})[field_id] = (max(need, 0.0), max(priority, 1e-9))
+            self._opened.setdefault(zone_id, now)
+
+    def release(self, key: FieldKey) -> None:
+        """
+        Drop the pending request and the grant of a field that stopped.
+        """
+        zone_id, field_id = key
+        with self._lock:
+            pending = self._pending.get(zone_id)
+            if pending and pending.pop(field_id, None) is not None and not pending:
+                del self._pending[zone_id]
+                self._opened.pop(zone_id, None)
+            grants = self._granted.get(zone_id)
+            if grants:
+                grants.pop(field_id, None)
+
+    def reserve(self, key: FieldKey, amount: float) -> None:
+        """
+        Grant `amount` to a field started outside the allocation rounds, such
+        as a start of the day-ahead schedule, dropping its pending request.
+        """
+        zone_id, field_id = key
+        with self._lock:
+            pending = self._pending.get(zone_id)
+            if pending and pending.pop(field_id, None) is not None and not pending:
+                del self._pending[zone_id]
+                self._opened.pop(zone_id, None)
+            self._granted.setdefault(zone_id, {})[field_id] = max(amount, 0.0)
+
+    def export(self) -> Dict[str, Dict[str, float]]:
+        """
+        :return: The water granted to each field, by zone.
+        """
+        with self._lock:
+            return {zone_id: dict(grants) for zone_id, grants in self._granted.items() if grants}
+
+    def restore(self, granted: Dict[str, Dict[str, float]]) -> None:
+        """
+        Take back the grants dumped by `export`. Pending requests are not
+        restored, the fields send them again with their next plan.
+        """
+        with self._lock:
+            for zone_id, grants in granted.items():
+                self._granted.setdefault(zone_id, {}).update(grants)
+
+    def allocate(self, now: Optional[float] = None) -> List[Tuple[FieldKey, float]]:
+        """
+        Run an allocation round for every zone whose window has elapsed.
+
+        :return: The fields granted water, with the amount granted.
+        """
+        now = monotonic() if now is None else now
+        grants = []
+        with self._lock:
+            for zone_id in [zone_id for zone_id, opened in self._opened.items() if now - opened >= self.window]:
+                grants.extend(self._allocate_zone(zone_id, now))
+        return grants
+
+    def _allocate_zone(self, zone_id: str, now: float) -> List[Tuple[FieldKey, float]]:
+        pending = self._pending[zone_id]
+        zone_grants = self._granted.setdefault(zone_id, {})
+        field_ids = list(pending)
+        needs = np.array([pending[field_id][0] for field_id in field_ids])
+        priorities = np.array([pending[field_id][1] for field_id in field_ids])
+        available = self.budget - sum(zone_grants.values())
+        amounts = water_fill(needs, np.maximum(needs, 1e-9) * priorities, available)
+        grants = []
+        for field_id, need, amount in zip(field_ids, needs.tolist(), amounts.tolist()):
+            if amount <= 0 and need > 0:
+                continue
+            del pending[field_id]
+            zone_grants[field_id] = amount
+            grants.append(((zone_id, field_id), amount))
+        if pending:
+            self._opened[zone_id] = now
+        else:
+            del self._pending[zone_id]
+            del self._opened[zone_id]
+        return grants
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+import socket
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -6,4 +7,23 @@ class Config:
     MQTT_BROKER_URL: str
     MQTT_KEEPALIVE: int = 60
     ANALYZER_TOPIC_PREFIX: str = 'analyzer'
-    PLANNER_TOPIC_PREFIX: str = 'planner'
\ No newline at end of file
+    PLANNER_TOPIC_PREFIX: str = 'planner'
+    INSTANCE_ID: str = field(default_factory=socket.gethostname)
+    METRICS_PORT: int = 9100
+    METRICS_PUSH_INTERVAL: float = 0
+    METRICS_TOPIC_PREFIX: str = 'metrics'
+    PAYLOAD_CODEC: str = 'json'
+    MIN_RUN_SECONDS: float = 120
+    MIN_REST_SECONDS: float = 300
+    PLAN_REFRESH_INTERVAL: float = 300
+    PLAN_TICK_INTERVAL: float = 1.0
+    ZONE_WATER_BUDGET: float = 0
+    ALLOCATION_WINDOW: float = 2.0
+    MAX_RUNNING_PER_ZONE: int = 0
+    START_STAGGER_INTERVAL: float = 0
+    POLICY_PATH: str = ''
+    POLICY_RELOAD_INTERVAL: float = 5
+    SNAPSHOT_PATH: str = 'data/planner_state.sqlite'
+    SNAPSHOT_INTERVAL: float = 5
+    SCHEDULE_INTERVAL: float = 0
+    SCHEDULE_HORIZON_HOURS: float = 24
@@ -0,0 +1,217 @@
+import heapq
+import threading
+from time import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+FieldKey = Tuple[str, str]
+Start = Tuple[float, float]
+
+def project_starts(outlook: dict, now: float, horizon: float, last_start: Optional[float] = None) -> List[Start]:
+    """
+    Irrigation starts of one field over the next `horizon` seconds.
+
+    The moisture is extrapolated along its trend from the last observation.
+    Each time it reaches the threshold outside a rain window, the field is
+    scheduled to refill up to the target moisture; rain is taken to refill
+    it as well. A field that is not drying is only scheduled if it is
+    already below its threshold. All times are wall-clock seconds.
+
+    :param outlook: The `outlook` the analyzer attaches to its results.
+    :param last_start: When the field last started irrigating, taken as a
+        refill if it is more recent than the observation.
+    :return: `(start, water_need)` pairs in time order.
+    """
+    moisture = outlook.get('soil_moisture')
+    threshold = outlook.get('soil_moisture_threshold')
+    liters_per_point = outlook.get('liters_per_point')
+    if moisture is None or threshold is None or liters_per_point is None:
+        return []
+    target = outlook.get('target_moisture') or threshold
+    trend = outlook.get('moisture_trend')
+    drying = trend is not None and trend < 0
+    at = outlook.get('observed_at') or now
+    if last_start is not None and last_start > at:
+        moisture, at = target, last_start
+    rain_windows = sorted(outlook.get('rain_windows') or [])
+    end = now + horizon
+    starts = []
+    while True:
+        if moisture > threshold:
+            if not drying:
+                break
+            at += (moisture - threshold) / -trend * 3600
+            moisture = threshold
+        start = max(at, now)
+        if start >= end:
+            break
+        window = next((window for window in rain_windows if window[0] <= start < window[1]), None)
+        if window is not None:
+            at, moisture = window[1], target
+            continue
+        if drying:
+            moisture = max(moisture + trend * (start - at) / 3600, 0.0)
+        starts.append((start, max(target - moisture, 0.0) * liters_per_point))
+        if not drying or target <= threshold:
+            break
+        at, moisture = start, target
+    return starts
+
+class DayAheadScheduler:
+    """
+    Irrigation schedule of every field over the next `horizon` seconds,
+    rebuilt every `interval` seconds from the latest outlook received for
+    each field, so that live messages mostly come down to a lookup.
+
+    The schedule is published per zone for the executor to follow; `started`
+    pops the starts whose time has come so the planner can account for them.
+    Starts are placed under the same limits as live ones: at most
+    `max_running_per_zone` runs at once (0 for no cap), `stagger` seconds
+    apart, and no more than `budget` liters committed per zone (0 for no
+    budget). A run is taken to hold its slot and water for `run_seconds`.
+    """
+
+    def __init__(
+        self,
+        horizon: float = 24 * 3600,
+        interval: float = 3600,
+        max_running_per_zone: int = 0,
+        stagger: float = 0,
+        budget: float = 0,
+        run_seconds: float = 0
+    ):
+        self.horizon = horizon
+        self.interval = interval
+        self.max_running_per_zone = max_running_per_zone
+        self.stagger = stagger
+        self.budget = budget
+        self.run_seconds = run_seconds
+        self.built_at = float('-inf')
+        self._outlooks: Dict[FieldKey, dict] = {}
+        self._schedule: Dict[FieldKey, List[Start]] = {}
+        self._heap: List[Tuple[float, FieldKey, float]] = []
+        self._last_start: Dict[FieldKey, float] = {}
+        self._lock = threading.Lock()
+
+    def scheduled_count(self) -> int:
+        return len(self._heap)
+
+    def observe(self, key: FieldKey, outlook: dict) -> None:
+        with self._lock:
+            self._outlooks[key] = outlook
+
+    def is_due(self, now: Optional[float] = None) -> bool:
+        now = time() if now is None else now
+        return now - self.built_at >= self.interval
+
+    def build(
+        self,
+        now: Optional[float] = None,
+        irrigating: Iterable[FieldKey] = (),
+        granted: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> Dict[str, dict]:
+        """
+        Rebuild the schedule of every field with an outlook.
+
+        :param irrigating: Fields irrigating right now, whatever started
+            them, taken as refilled rather than due for a start and as
+            holding a slot of their zone.
+        :param granted: Water granted to each field by zone, as exported by
+            the zone allocator, taken as held out of the zone budget.
+        :return: The schedule message of every zone, with the starts of each
+            field as `[start, water_need]` pairs.
+        """
+        now = time() if now is None else now
+        zones: Dict[str, dict] = {}
+        schedule: Dict[FieldKey, List[Start]] = {}
+        with self._lock:
+            outlooks = list(self._outlooks.items())
+            last_starts = dict(self._last_start)
+        # Water held per field of each zone, by the fields irrigating or granted water
+        held: Dict[str, Dict[str, float]] = {zone_id: dict(grants) for zone_id, grants in (granted or {}).items()}
+        for key in irrigating:
+            last_starts[key] = now
+            held.setdefault(key[0], {}).setdefault(key[1], 0.0)
+        running = {
+            zone_id: [(now + self.run_seconds, water) for water in fields.values()]
+            for zone_id, fields in held.items()
+        }
+        # Projected outside the lock so live messages are not held up
+        projected: Dict[str, List[Tuple[float, str, float]]] = {}
+        for key, outlook in outlooks:
+            zone_id, field_id = key
+            zones.setdefault(zone_id, {'generated_at': round(now, 1), 'horizon': self.horizon, 'fields': {}})
+            starts = project_starts(outlook, now, self.horizon, last_starts.get(key))
+            projected.setdefault(zone_id, []).extend((start, field_id, water_need) for start, water_need in starts)
+        for zone_id, starts in projected.items():
+            fields = zones[zone_id]['fields']
+            for start, field_id, water_need in self._place(starts, running.get(zone_id, []), now):
+                schedule.setdefault((zone_id, field_id), []).append((start, water_need))
+                fields.setdefault(field_id, []).append([round(start, 1), round(water_need, 1)])
+        with self._lock:
+            self._schedule = schedule
+            self._heap = [(start, key, water_need) for key, starts in schedule.items() for start, water_need in starts]
+            heapq.heapify(self._heap)
+            self.built_at = now
+        return zones
+
+    def _place(
+        self,
+        starts: List[Tuple[float, str, float]],
+        running: List[Tuple[float, float]],
+        now: float
+    ) -> List[Tuple[float, str, float]]:
+        """
+        Place the projected starts of one zone in time order, each at the
+        first time the zone has a free slot, the stagger has elapsed and the
+        budget has room for its water need. A need larger than the whole
+        budget is cut down to it, as the zone allocator would.
+
+        :param starts: `(start, field_id, water_need)` projected per field.
+        :param running: `(end, water)` of the runs already holding the zone.
+        :return: The starts that still fall within the horizon, moved.
+        """
+        runs = list(running)
+        next_start = float('-inf')
+        placed = []
+        for start, field_id, water_need in sorted(starts):
+            if self.budget:
+                water_need = min(water_need, self.budget)
+            at = max(start, next_start)
+            while True:
+                runs = [run for run in runs if run[0] > at]
+                full = self.max_running_per_zone and len(runs) >= self.max_running_per_zone
+                over = self.budget and sum(water for _, water in runs) + water_need > self.budget + 1e-9
+                if not (full or over):
+                    break
+                at = min(end for end, _ in runs)
+            if at >= now + self.horizon:
+                continue
+            runs.append((at + self.run_seconds, water_need))
+            next_start = at + self.stagger
+            placed.append((at, field_id, water_need))
+        return placed
+
+    def started(self, now: Optional[float] = None) -> List[Tuple[FieldKey, float]]:
+        """
+        Pop the scheduled starts whose time has come, with their water need.
+        The next build counts these fields as refilled from their start.
+        """
+        now = time() if now is None else now
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                start, key, water_need = heapq.heappop(self._heap)
+                self._last_start[key] = start
+                due.append((key, water_need))
+        return due
+
+    def covers(self, key: FieldKey, now: Optional[float] = None) -> bool:
+        """
+        Whether the schedule has a start of the field coming up within the
+        next `interval` seconds. Starts already carried out do not count, so
+        a field that dries out again before its next slot is started live.
+        """
+        now = time() if now is None else now
+        with self._lock:
+            starts = self._schedule.get(key, ())
+        return any(now <= start <= now + self.interval for start, _ in starts)
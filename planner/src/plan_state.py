@@ -0,0 +1,241 @@
+import logging
+import threading
+from time import monotonic, time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+FieldKey = Tuple[str, str]
+
+START_IRRIGATION = 'start_irrigation'
+STOP_IRRIGATION = 'stop_irrigation'
+
+IDLE = 'idle'
+STARTING = 'starting'
+IRRIGATING = 'irrigating'
+COOLDOWN = 'cooldown'
+
+# Why a plan was not published when it arrived
+REDUNDANT = 'redundant'
+MIN_RUN = 'min_run'
+MIN_REST = 'min_rest'
+ALLOCATION = 'allocation'
+SCHEDULED = 'scheduled'
+
+class FieldPlanState:
+    __slots__ = ('state', 'since', 'desired', 'last_sent')
+
+    def __init__(self):
+        self.state = IDLE
+        self.since = 0.0
+        # Latest plan received for the field, not yet published
+        self.desired: Optional[dict] = None
+        self.last_sent = float('-inf')
+
+class PlanStateMachine:
+    """
+    Per field actuation state: idle, starting, irrigating or cooldown.
+
+    A field starts irrigating from idle, keeps irrigating for at least
+    `min_run` seconds, then rests in cooldown for at least `min_rest`
+    seconds before it may start again. Plans that arrive too early are held
+    and published by `tick` once the minimum time has elapsed, unless a
+    newer plan has cancelled them meanwhile. Plans that repeat the current
+    state are suppressed, except once every `refresh_interval` seconds as a
+    keep-alive for commands lost on the way to the actuators.
+
+    A start that waits for its turn after leaving here is marked with
+    `wait`: the field is starting, not irrigating, until `record` confirms
+    the start went out. A stop cancels it right away, back to idle.
+    """
+
+    def __init__(self, min_run: float = 0, min_rest: float = 0, refresh_interval: float = 300):
+        self.min_run = min_run
+        self.min_rest = min_rest
+        self.refresh_interval = refresh_interval
+        self._fields: Dict[FieldKey, FieldPlanState] = {}
+        self._lock = threading.Lock()
+
+    def state(self, key: FieldKey) -> str:
+        entry = self._fields.get(key)
+        return entry.state if entry else IDLE
+
+    def count(self, state: str) -> int:
+        return sum(1 for entry in list(self._fields.values()) if entry.state == state)
+
+    def fields(self, state: str) -> List[FieldKey]:
+        return [key for key, entry in list(self._fields.items()) if entry.state == state]
+
+    def submit(self, key: FieldKey, plan: dict, now: Optional[float] = None) -> Tuple[Optional[dict], Optional[str]]:
+        """
+        Apply a new plan for `key`.
+
+        :return: The plan to publish now, if any, and otherwise why it was
+            held back (REDUNDANT, MIN_RUN or MIN_REST).
+        """
+        now = monotonic() if now is None else now
+        with self._lock:
+            entry = self._fields.get(key)
+            if entry is None:
+                entry = self._fields[key] = FieldPlanState()
+            action = plan['action']
+            if self._is_current(entry, action):
+                entry.desired = None
+                if self.refresh_interval > 0 and now - entry.last_sent >= self.refresh_interval:
+                    entry.last_sent = now
+                    return plan, None
+                return None, REDUNDANT
+            entry.desired = plan
+            published = self._advance(entry, now)
+            if published:
+                return published, None
+            return None, MIN_RUN if entry.state == IRRIGATING else MIN_REST
+
+    def record(self, key: FieldKey, plan: dict, now: Optional[float] = None) -> None:
+        """
+        Take note of a plan carried out without going through `submit`, or
+        of a waiting start that went out, as if it had just been published.
+        """
+        now = monotonic() if now is None else now
+        with self._lock:
+            entry = self._fields.get(key)
+            if entry is None:
+                entry = self._fields[key] = FieldPlanState()
+            if entry.state == STARTING or not self._is_current(entry, plan['action']):
+                entry.state = IRRIGATING if plan['action'] == START_IRRIGATION else COOLDOWN
+                entry.since = now
+            entry.desired = None
+            entry.last_sent = now
+
+    def wait(self, key: FieldKey, now: Optional[float] = None) -> None:
+        """
+        Take note that the start just returned by `submit` was not published
+        yet, but queued until the field gets its turn.
+        """
+        now = monotonic() if now is None else now
+        with self._lock:
+            entry = self._fields.get(key)
+            if entry is not None and entry.state == IRRIGATING:
+                entry.state = STARTING
+                entry.since = now
+
+    def tick(self, now: Optional[float] = None) -> List[Tuple[FieldKey, dict]]:
+        """
+        Publish the held plans whose minimum run or rest time has elapsed.
+        """
+        now = monotonic() if now is None else now
+        due = []
+        with self._lock:
+            for key, entry in self._fields.items():
+                if entry.state == COOLDOWN or entry.desired is not None:
+                    plan = self._advance(entry, now)
+                    if plan:
+                        due.append((key, plan))
+        return due
+
+    def export(self, now: Optional[float] = None, wall_now: Optional[float] = None) -> List[list]:
+        """
+        Dump the state of every field, with its timestamps converted to
+        wall-clock time.
+
+        :return: One `[zone_id, field_id, state, since, desired, last_sent]` per field.
+        """
+        now = monotonic() if now is None else now
+        wall_now = time() if wall_now is None else wall_now
+        offset = wall_now - now
+        with self._lock:
+            return [
+                [
+                    zone_id, field_id, entry.state, entry.since + offset, entry.desired,
+                    entry.last_sent + offset if entry.last_sent != float('-inf') else None
+                ]
+                for (zone_id, field_id), entry in self._fields.items()
+            ]
+
+    def restore(self, fields: List[list], now: Optional[float] = None, wall_now: Optional[float] = None) -> int:
+        """
+        Load the fields dumped by `export`. Time spent down counts towards
+        the minimum run and rest times, as the actuators kept their state.
+
+        :return: The number of fields restored.
+        """
+        now = monotonic() if now is None else now
+        wall_now = time() if wall_now is None else wall_now
+        offset = wall_now - now
+        with self._lock:
+            for zone_id, field_id, state, since, desired, last_sent in fields:
+                entry = self._fields[(zone_id, field_id)] = FieldPlanState()
+                entry.state = state
+                entry.since = since - offset
+                entry.desired = desired
+                entry.last_sent = last_sent - offset if last_sent is not None else float('-inf')
+        return len(fields)
+
+    def _is_current(self, entry: FieldPlanState, action: str) -> bool:
+        if action == START_IRRIGATION:
+            return entry.state in (STARTING, IRRIGATING)
+        return entry.state in (IDLE, COOLDOWN)
+
+    def _advance(self, entry: FieldPlanState, now: float) -> Optional[dict]:
+        desired = entry.desired
+        if entry.state == IRRIGATING:
+            if desired is None or desired['action'] != STOP_IRRIGATION or now - entry.since < self.min_run:
+                return None
+            return self._transition(entry, COOLDOWN, now)
+        if entry.state == STARTING:
+            # Never started, so neither the minimum run nor the rest applies
+            if desired is None or desired['action'] != STOP_IRRIGATION:
+                return None
+            return self._transition(entry, IDLE, now)
+        if entry.state == COOLDOWN:
+            if now - entry.since < self.min_rest:
+                return None
+            entry.state = IDLE
+            entry.since = now
+        if desired is None or desired['action'] != START_IRRIGATION:
+            return None
+        return self._transition(entry, IRRIGATING, now)
+
+    def _transition(self, entry: FieldPlanState, state: str, now: float) -> dict:
+        plan = entry.desired
+        entry.state = state
+        entry.since = now
+        entry.desired = None
+        entry.last_sent = now
+        return plan
+
+class PlanTicker:
+    """
+    Calls `on_tick` every `interval` seconds from a daemon thread, to
+    publish the plans that became due.
+    """
+
+    def __init__(self, on_tick: Callable[[], None], interval: float = 1.0):
+        self.on_tick = on_tick
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="plan-ticker", daemon=True)
+        self._thread.start()
+        logger.info(f"Started plan ticker every {self.interval}s")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.on_tick()
+            except Exception as e:
+                logger.error(f"Error publishing held plans: {e}")
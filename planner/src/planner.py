@@ -1,10 +1,22 @@
-import json
 import logging
+import threading
+from time import perf_counter
 from typing import Dict, Optional, Tuple
 
 from paho.mqtt import client as mqtt
 
+from irrigation_common.codec import codec_for_topic, get_codec
+from irrigation_common.metrics import MetricsPusher, MetricsRegistry, MetricsServer, topic_family
+from irrigation_common.snapshot import SnapshotStore, Snapshotter
+from irrigation_common.tracing import TraceRecorder, extract_trace, forward_trace
+
+from .allocation import ZoneAllocator
 from .config import Config
+from .day_ahead import DayAheadScheduler
+from .plan_state import (ALLOCATION, IDLE, IRRIGATING, SCHEDULED, STARTING, START_IRRIGATION,
+                         STOP_IRRIGATION, PlanStateMachine, PlanTicker)
+from .policy import DEFAULT_RULES, Policy, PolicyReloader
+from .start_scheduler import StartScheduler
 
 logging.basicConfig(
     level=logging.INFO,
@@ -15,8 +27,136 @@ logger = logging.getLogger(__name__)
 class Planner:
     def __init__(self, config: Config):
         self.config = config
+        self.codec = get_codec(config.PAYLOAD_CODEC)
+        self.policy = Policy(DEFAULT_RULES)
+        self.policy_reloader: Optional[PolicyReloader] = None
+        if config.POLICY_PATH:
+            self.policy_reloader = PolicyReloader(config.POLICY_PATH, self._apply_policy, config.POLICY_RELOAD_INTERVAL)
+        self.plan_states = PlanStateMachine(config.MIN_RUN_SECONDS, config.MIN_REST_SECONDS, config.PLAN_REFRESH_INTERVAL)
+        self.allocator: Optional[ZoneAllocator] = None
+        if config.ZONE_WATER_BUDGET > 0:
+            self.allocator = ZoneAllocator(config.ZONE_WATER_BUDGET, config.ALLOCATION_WINDOW)
+        self._allocation_requests: Dict[Tuple[str, str], Dict] = {}
+        self.start_scheduler: Optional[StartScheduler] = None
+        if config.MAX_RUNNING_PER_ZONE > 0 or config.START_STAGGER_INTERVAL > 0:
+            self.start_scheduler = StartScheduler(config.MAX_RUNNING_PER_ZONE, config.START_STAGGER_INTERVAL)
+        self.day_ahead: Optional[DayAheadScheduler] = None
+        if config.SCHEDULE_INTERVAL > 0:
+            self.day_ahead = DayAheadScheduler(
+                config.SCHEDULE_HORIZON_HOURS * 3600,
+                config.SCHEDULE_INTERVAL,
+                config.MAX_RUNNING_PER_ZONE,
+                config.START_STAGGER_INTERVAL,
+                config.ZONE_WATER_BUDGET,
+                config.MIN_RUN_SECONDS
+            )
+        self._outlook_warned = False
+        self.plan_ticker = PlanTicker(self._tick, config.PLAN_TICK_INTERVAL)
+        # Held while plan states, allocator and scheduler change together, so
+        # a snapshot never catches a plan halfway between them
+        self._state_lock = threading.RLock()
+        self.snapshotter: Optional[Snapshotter] = None
+        if config.SNAPSHOT_PATH:
+            self.snapshotter = Snapshotter(SnapshotStore(config.SNAPSHOT_PATH), self._capture_state, config.SNAPSHOT_INTERVAL)
+        self._setup_metrics()
+        self._load_policy()
+        self._restore_state()
         self._setup_mqtt_client()
 
+    def _load_policy(self) -> None:
+        if not self.policy_reloader:
+            return
+        try:
+            if not self.policy_reloader.poll():
+                logger.warning(f"Policy file {self.config.POLICY_PATH} not found, using the default rules")
+        except Exception as e:
+            logger.error(f"Failed to load policy from {self.config.POLICY_PATH}, using the default rules: {e}")
+
+    def _apply_policy(self, policy: Policy) -> None:
+        self.policy = policy
+        self.policy_reloads.inc()
+        logger.info(f"Loaded policy with {len(policy.rules)} rules: {[rule.name for rule in policy.rules]}")
+
+    def _capture_state(self) -> Dict:
+        with self._state_lock:
+            state = {'fields': self.plan_states.export()}
+            if self.allocator:
+                state['granted'] = self.allocator.export()
+            if self.start_scheduler:
+                state['scheduled'] = self.start_scheduler.export()
+        return state
+
+    def _restore_state(self) -> None:
+        if not self.snapshotter:
+            return
+        try:
+            start = perf_counter()
+            snapshot = self.snapshotter.store.latest()
+            if snapshot is None:
+                logger.info("No state snapshot found, starting from scratch")
+                return
+            taken_at, state = snapshot
+            fields = state.get('fields', [])
+            if not self.start_scheduler:
+                # Starts that were waiting for a slot have no scheduler to release them
+                fields = [[*entry[:2], IDLE, *entry[3:]] if entry[2] == STARTING else entry for entry in fields]
+            self.plan_states.restore(fields)
+            if self.allocator:
+                self.allocator.restore(state.get('granted', {}))
+            if self.start_scheduler:
+                running = [(zone_id, field_id) for zone_id, field_id, plan_state, *_ in fields if plan_state == IRRIGATING]
+                self.start_scheduler.restore(running, state.get('scheduled', []))
+            logger.info(
+                f"Restored {len(fields)} fields from the snapshot taken at {taken_at:.0f} "
+                f"in {(perf_counter() - start) * 1000:.1f}ms"
+            )
+        except Exception as e:
+            logger.error(f"Failed to restore the state snapshot, starting from scratch: {e}")
+
+    def _setup_metrics(self) -> None:
+        self.metrics = MetricsRegistry('planner', self.config.INSTANCE_ID)
+        self.messages_received = self.metrics.counter('mqtt_messages_received', 'MQTT messages received', ['family'])
+        self.messages_published = self.metrics.counter('mqtt_messages_published', 'MQTT messages published', ['family'])
+        self.message_latency = self.metrics.histogram('message_processing_seconds', 'Time spent handling one MQTT message')
+        self.mqtt_reconnects = self.metrics.counter('mqtt_reconnects', 'Reconnections to the MQTT broker')
+        self.plans_made = self.metrics.counter('plans', 'Irrigation plans generated', ['action'])
+        self.plans_held = self.metrics.counter(
+            'plans_held', 'Plans not published when received, by reason', ['reason']
+        )
+        self.metrics.gauge(
+            'fields_irrigating', 'Fields whose plan state is irrigating',
+            function=lambda: self.plan_states.count(IRRIGATING)
+        )
+        self.metrics.gauge(
+            'allocation_pending_fields', 'Fields waiting for a share of their zone water budget',
+            function=lambda: self.allocator.pending_count() if self.allocator else 0
+        )
+        self.metrics.gauge(
+            'scheduled_starts', 'Start plans waiting for their slot or their turn',
+            function=lambda: self.start_scheduler.pending_count if self.start_scheduler else 0
+        )
+        self.policy_latency = self.metrics.histogram('policy_evaluation_seconds', 'Time spent evaluating the policy rules for one message')
+        self.policy_matches = self.metrics.counter('policy_matches', 'Messages matched by each policy rule', ['rule'])
+        self.policy_reloads = self.metrics.counter('policy_reloads', 'Policies loaded from the policy file')
+        self.metrics.gauge('policy_rules', 'Rules in the current policy', function=lambda: len(self.policy.rules))
+        self.metrics.gauge(
+            'scheduled_irrigations', 'Irrigation starts left in the day-ahead schedule',
+            function=lambda: self.day_ahead.scheduled_count() if self.day_ahead else 0
+        )
+        self.water_granted = self.metrics.counter('water_granted_liters', 'Water granted to fields by the zone allocator')
+        self.trace_recorder = TraceRecorder(self.metrics, 'planner')
+        self.metrics_server: Optional[MetricsServer] = None
+        if self.config.METRICS_PORT > 0:
+            self.metrics_server = MetricsServer(self.metrics, self.config.METRICS_PORT)
+        self.metrics_pusher: Optional[MetricsPusher] = None
+        if self.config.METRICS_PUSH_INTERVAL > 0:
+            self.metrics_pusher = MetricsPusher(
+                self.metrics,
+                f"{self.config.METRICS_TOPIC_PREFIX}/planner",
+                self.config.METRICS_PUSH_INTERVAL
+            )
+        self._connected_once = False
+
     def _setup_mqtt_client(self) -> None:
         try:
             self.mqtt_client = mqtt.Client()
@@ -40,6 +180,9 @@ class Planner:
     def _on_connect(self, client, userdata, flags, rc: int) -> None:
         if rc == 0:
             logger.info("Connected to MQTT broker successfully")
+            if self._connected_once:
+                self.mqtt_reconnects.inc()
+            self._connected_once = True
             topic = f"{self.config.ANALYZER_TOPIC_PREFIX}/#"
             client.subscribe(topic)
             logger.info(f"Subscribed to topic: {topic}")
@@ -47,24 +190,56 @@ class Planner:
             logger.error(f"Failed to connect to MQTT broker with result code: {rc}")
 
     def _on_message(self, client, userdata, msg) -> None:
+        self.messages_received.labels(topic_family(msg.topic)).inc()
+        with self.message_latency.time(), self._state_lock:
+            self._process_message(msg)
+
+    def _process_message(self, msg) -> None:
         try:
-            topic = msg.topic
-            payload = json.loads(msg.payload.decode())
+            topic, codec = codec_for_topic(msg.topic)
+            payload = codec.decode(msg.payload)
             
             zone_id, field_id = self._parse_topic(topic)
             if not zone_id or not field_id:
                 logger.error(f"Invalid topic format: {topic}")
                 return
 
-            plan = self._generate_plan(payload)
-            if plan:
-                self._publish_plan(zone_id, field_id, plan)
+            trace = extract_trace(payload)
+            self.trace_recorder.record(trace)
+            key = (zone_id, field_id)
+            if self.day_ahead:
+                self._observe_outlook(key, payload)
+
+            plan = self._generate_plan(payload, zone_id, field_id)
+            if not plan:
+                return
+            if self.day_ahead and plan['action'] == START_IRRIGATION and self.day_ahead.covers(key):
+                # The executor starts the field from the published schedule
+                self.plans_held.labels(SCHEDULED).inc()
+                return
+            if self.allocator and plan['action'] == START_IRRIGATION and self.plan_states.state(key) not in (STARTING, IRRIGATING):
+                self._allocation_requests[key] = plan
+                self.allocator.request(key, plan.get('water_need') or 0, payload.get('priority', 1.0))
+                self.plans_held.labels(ALLOCATION).inc()
+                return
+            self._submit_plan(key, plan, trace)
             
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON payload received: {e}")
+        except ValueError as e:
+            logger.error(f"Invalid payload received on {msg.topic}: {e}")
         except Exception as e:
             logger.error(f"Error processing message: {e}")
 
+    def _observe_outlook(self, key: Tuple[str, str], payload: Dict) -> None:
+        outlook = payload.get('outlook')
+        if outlook:
+            self.day_ahead.observe(key, outlook)
+        elif not self._outlook_warned:
+            self._outlook_warned = True
+            logger.warning(
+                "Analyzer results carry no outlook, the day-ahead schedule stays empty "
+                "until OUTLOOK_HOURS is set on the analyzers"
+            )
+
     def _parse_topic(self, topic: str) -> Tuple[Optional[str], Optional[str]]:
         try:
             parts = topic.split('/')
@@ -72,42 +247,139 @@ class Planner:
         except IndexError:
             return None, None
 
-    def _generate_plan(self, payload: Dict) -> Optional[Dict]:
+    def _generate_plan(self, payload: Dict, zone_id: str, field_id: str) -> Optional[Dict]:
         try:
             action = payload.get('action')
             reason = payload.get('reason')
-            water_need = payload.get('water_need')
 
             if not action or not reason:
                 logger.error("Missing action or reason in payload")
                 return None
 
-            if action == "trigger_irrigation":
-                return {"action": "start_irrigation", "reason": reason, "water_need": water_need}
-            elif action == "stop_irrigation":
-                return {"action": "stop_irrigation", "reason": reason, "water_need": 0}
-            else:
+            policy = self.policy
+            with self.policy_latency.time():
+                rule, plan = policy.evaluate(policy.context(payload, zone_id, field_id))
+            if rule is None:
                 logger.warning(f"Unknown action received: {action}")
                 return None
-                
+            self.policy_matches.labels(rule.name).inc()
+            return plan
+
         except Exception as e:
             logger.error(f"Error generating plan: {e}")
             return None
 
+    def _submit_plan(self, key: Tuple[str, str], plan: Dict, trace: Optional[dict] = None) -> None:
+        published, held = self.plan_states.submit(key, plan)
+        if self.allocator and plan['action'] == STOP_IRRIGATION and self.plan_states.state(key) not in (STARTING, IRRIGATING):
+            self._release_allocation(key)
+        if published:
+            self.plans_made.labels(published['action']).inc()
+            self._dispatch_plan(key, forward_trace(trace, published))
+        else:
+            self.plans_held.labels(held).inc()
+            logger.debug("Held plan for %s/%s: %s", key[0], key[1], held)
+
+    def _release_allocation(self, key: Tuple[str, str]) -> None:
+        self.allocator.release(key)
+        self._allocation_requests.pop(key, None)
+
+    def _tick(self) -> None:
+        with self._state_lock:
+            if self.day_ahead:
+                for key, water_need in self.day_ahead.started():
+                    self._record_scheduled_start(key, water_need)
+            if self.allocator:
+                for key, amount in self.allocator.allocate():
+                    plan = self._allocation_requests.pop(key, None)
+                    if plan is None:
+                        continue
+                    self.water_granted.inc(amount)
+                    self._submit_plan(key, dict(plan, water_need=amount, requested_water_need=plan.get('water_need')))
+            for key, plan in self.plan_states.tick():
+                if self.allocator and plan['action'] == STOP_IRRIGATION:
+                    self._release_allocation(key)
+                self._publish_due_plan(key, plan)
+            if self.start_scheduler:
+                for key, plan in self.start_scheduler.due():
+                    self.plan_states.record(key, plan)
+                    # Restamp the trace so the next hop does not count the wait for a slot
+                    self._publish_plan(key[0], key[1], forward_trace(extract_trace(plan), plan))
+        # Built outside the lock, the day-ahead scheduler has its own
+        if self.day_ahead and self.day_ahead.is_due():
+            self._publish_schedule()
+
+    def _record_scheduled_start(self, key: Tuple[str, str], water_need: float) -> None:
+        # The executor starts the field on its own, it only holds a slot and
+        # its water here so live starts of the zone make room for it
+        self.plan_states.record(key, {'action': START_IRRIGATION, 'water_need': water_need})
+        if self.start_scheduler:
+            self.start_scheduler.occupy(key)
+        if self.allocator:
+            self.allocator.reserve(key, water_need)
+            self._allocation_requests.pop(key, None)
+
+    def _publish_schedule(self) -> None:
+        schedules = self.day_ahead.build(
+            irrigating=self.plan_states.fields(IRRIGATING),
+            granted=self.allocator.export() if self.allocator else None
+        )
+        for zone_id, schedule in schedules.items():
+            try:
+                topic = f"{self.config.PLANNER_TOPIC_PREFIX}/schedule/zone/{zone_id}{self.codec.suffix}"
+                # Retained so a restarted executor picks up the current schedule
+                self.mqtt_client.publish(topic, self.codec.encode(schedule), retain=True)
+                self.messages_published.labels(self.config.PLANNER_TOPIC_PREFIX).inc()
+            except Exception as e:
+                logger.error(f"Error publishing schedule for zone {zone_id}: {e}")
+        logger.info(
+            f"Published the day-ahead schedule of {len(schedules)} zones "
+            f"with {self.day_ahead.scheduled_count()} irrigation starts"
+        )
+
+    def _publish_due_plan(self, key: Tuple[str, str], plan: Dict) -> None:
+        # Held plans leave their trace behind, the wait is not pipeline latency
+        self.plans_made.labels(plan['action']).inc()
+        self._dispatch_plan(key, plan)
+
+    def _dispatch_plan(self, key: Tuple[str, str], plan: Dict) -> None:
+        if self.start_scheduler:
+            if plan['action'] == START_IRRIGATION:
+                plan = self.start_scheduler.schedule(key, plan)
+                if plan is None:
+                    # Not irrigating until the scheduler releases the start
+                    self.plan_states.wait(key)
+                    return
+            else:
+                self.start_scheduler.finish(key)
+        self._publish_plan(key[0], key[1], plan)
+
     def _publish_plan(self, zone_id: str, field_id: str, plan: Dict) -> None:
         try:
-            topic = f"{self.config.PLANNER_TOPIC_PREFIX}/zone/{zone_id}/field/{field_id}"
-            self.mqtt_client.publish(topic, json.dumps(plan))
-            logger.info(f"Published plan for {zone_id}/{field_id}: {plan}")
+            topic = f"{self.config.PLANNER_TOPIC_PREFIX}/zone/{zone_id}/field/{field_id}{self.codec.suffix}"
+            self.mqtt_client.publish(topic, self.codec.encode(plan))
+            self.messages_published.labels(self.config.PLANNER_TOPIC_PREFIX).inc()
+            logger.info("Published plan for %s/%s: %s", zone_id, field_id, plan)
         except Exception as e:
             logger.error(f"Error publishing plan: {e}")
 
     def run(self) -> None:
         try:
             logger.info("Starting Planner service...")
+            if self.metrics_server:
+                self.metrics_server.start()
+            if self.metrics_pusher:
+                self.metrics_pusher.start(self.mqtt_client)
+            self.plan_ticker.start()
+            if self.policy_reloader:
+                self.policy_reloader.start()
+            if self.snapshotter:
+                self.snapshotter.start()
             self.mqtt_client.loop_forever()
         except KeyboardInterrupt:
             logger.info("Shutting down Planner service...")
+            if self.snapshotter:
+                self.snapshotter.stop()
             self.mqtt_client.disconnect()
         except Exception as e:
             logger.error(f"Error in Planner service: {e}")
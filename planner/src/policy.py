@@ -0,0 +1,209 @@
+import json
+import logging
+import os
+import re
+import threading
+from time import localtime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+WILDCARD = '*'
+
+# Equivalent to the Planner's original hard-coded mapping
+DEFAULT_RULES = [
+    {
+        'name': 'start',
+        'action': 'trigger_irrigation',
+        'plan': {'action': 'start_irrigation', 'reason': '$reason', 'water_need': '$water_need'}
+    },
+    {
+        'name': 'stop',
+        'action': 'stop_irrigation',
+        'plan': {'action': 'stop_irrigation', 'reason': '$reason', 'water_need': 0}
+    }
+]
+
+OPERATORS: Dict[str, Callable[[Any], Callable[[Any], bool]]] = {
+    '==': lambda expected: lambda value: value == expected,
+    '!=': lambda expected: lambda value: value != expected,
+    '<': lambda expected: lambda value: value is not None and value < expected,
+    '<=': lambda expected: lambda value: value is not None and value <= expected,
+    '>': lambda expected: lambda value: value is not None and value > expected,
+    '>=': lambda expected: lambda value: value is not None and value >= expected,
+    'in': lambda expected: (lambda options: lambda value: value in options)(frozenset(expected)),
+    'not_in': lambda expected: (lambda options: lambda value: value not in options)(frozenset(expected)),
+    'between': lambda expected: lambda value: value is not None and expected[0] <= value <= expected[1],
+    'matches': lambda expected: (lambda pattern: lambda value: isinstance(value, str) and bool(pattern.search(value)))(
+        re.compile(expected)
+    )
+}
+
+class Rule:
+    """
+    A compiled policy rule: a tuple of predicates on the message context and
+    a function rendering the plan, or None when matching messages are dropped.
+    """
+
+    __slots__ = ('name', 'action', 'predicates', 'render')
+
+    def __init__(self, name: str, action: str, predicates: Tuple[Callable[[dict], bool], ...], render: Optional[Callable[[dict], dict]]):
+        self.name = name
+        self.action = action
+        self.predicates = predicates
+        self.render = render
+
+    def matches(self, context: dict) -> bool:
+        for predicate in self.predicates:
+            if not predicate(context):
+                return False
+        return True
+
+def _compile_condition(key: str, condition: Any) -> List[Callable[[dict], bool]]:
+    if not isinstance(condition, dict):
+        condition = {'==': condition}
+    predicates = []
+    for operator, expected in condition.items():
+        if operator not in OPERATORS:
+            raise ValueError(f"Unknown operator {operator} on {key}")
+        test = OPERATORS[operator](expected)
+        predicates.append(lambda context, key=key, test=test: test(context.get(key)))
+    return predicates
+
+def _compile_plan(template: Optional[dict]) -> Optional[Callable[[dict], dict]]:
+    if template is None:
+        return None
+    if 'action' not in template:
+        raise ValueError("A plan needs an action")
+    references = {key: value[1:] for key, value in template.items() if isinstance(value, str) and value.startswith('$')}
+    literals = {key: value for key, value in template.items() if key not in references}
+    factor = literals.pop('water_need_factor', None)
+
+    def render(context: dict) -> dict:
+        plan = dict(literals)
+        for key, name in references.items():
+            plan[key] = context.get(name)
+        if factor is not None and plan.get('water_need') is not None:
+            plan['water_need'] = plan['water_need'] * factor
+        return plan
+    return render
+
+class Policy:
+    """
+    Rules turning analyzer decisions into plans, compiled once and indexed
+    by the decision's action so a message only goes through the rules that
+    can apply to it, in the order they are listed.
+
+    Each rule is a JSON object:
+
+        {
+            "name": "no-midday-sprinkling",
+            "action": "trigger_irrigation",
+            "when": {"hour": {"between": [11, 16]}, "water_need": {"<": 500}},
+            "plan": null
+        }
+
+    `action` is the analyzer action the rule applies to, or "*" for any.
+    `when` maps context keys to a value, for equality, or to operators among
+    ==, !=, <, <=, >, >=, in, not_in, between and matches (a regex). The
+    context holds every key of the analyzer message, `zone_id`, `field_id`
+    and `hour`, the local time of day as a decimal hour. `plan` is the plan
+    to publish, where string values starting with `$` are taken from the
+    context and an optional `water_need_factor` scales the water need; a
+    null plan drops the message. The first matching rule wins.
+    """
+
+    def __init__(self, rules: List[dict]):
+        self.rules: List[Rule] = [self._compile(index, rule) for index, rule in enumerate(rules)]
+        actions = {rule.action for rule in self.rules} - {WILDCARD}
+        self._by_action: Dict[str, List[Rule]] = {
+            action: [rule for rule in self.rules if rule.action in (action, WILDCARD)] for action in actions
+        }
+        self._wildcard = [rule for rule in self.rules if rule.action == WILDCARD]
+        self.uses_hour = any('hour' in (rule.get('when') or {}) for rule in rules)
+
+    @staticmethod
+    def _compile(index: int, rule: dict) -> Rule:
+        predicates = []
+        for key, condition in (rule.get('when') or {}).items():
+            predicates.extend(_compile_condition(key, condition))
+        return Rule(
+            rule.get('name', f'rule_{index}'),
+            rule.get('action', WILDCARD),
+            tuple(predicates),
+            _compile_plan(rule.get('plan'))
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'Policy':
+        with open(path) as file:
+            data = json.load(file)
+        return cls(data['rules'] if isinstance(data, dict) else data)
+
+    def context(self, payload: dict, zone_id: str, field_id: str) -> dict:
+        context = dict(payload)
+        context['zone_id'] = zone_id
+        context['field_id'] = field_id
+        if self.uses_hour:
+            now = localtime()
+            context['hour'] = now.tm_hour + now.tm_min / 60
+        return context
+
+    def evaluate(self, context: dict) -> Tuple[Optional[Rule], Optional[dict]]:
+        """
+        :return: The first rule matching `context`, if any, and the plan it renders.
+        """
+        for rule in self._by_action.get(context.get('action'), self._wildcard):
+            if rule.matches(context):
+                return rule, rule.render(context) if rule.render else None
+        return None, None
+
+class PolicyReloader:
+    """
+    Watches the policy file and swaps in a freshly compiled policy whenever
+    its modification time changes. A policy that fails to load is logged
+    and the current one is kept.
+    """
+
+    def __init__(self, path: str, on_change: Callable[[Policy], None], interval: float = 5):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self.mtime: Optional[float] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self) -> bool:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self.mtime:
+            return False
+        self.mtime = mtime
+        self.on_change(Policy.load(self.path))
+        return True
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="policy-reloader", daemon=True)
+        self._thread.start()
+        logger.info(f"Started policy reloader watching {self.path} every {self.interval}s")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Error reloading policy from {self.path}: {e}")
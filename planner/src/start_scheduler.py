@@ -0,0 +1,169 @@
+import heapq
+import itertools
+import threading
+from collections import deque
+from time import monotonic
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+FieldKey = Tuple[str, str]
+
+class StartScheduler:
+    """
+    Spreads irrigation starts over time and caps how many run at once per zone.
+
+    Starts of the same zone are spaced at least `stagger` seconds apart, on
+    a heap ordered by their due time. A zone holds at most
+    `max_running_per_zone` slots (0 for no cap), taken by the fields that
+    are running or scheduled to start; further starts are parked in arrival
+    order until `finish` frees a slot. Cancelled entries are left in the
+    heap and skipped when popped, so every operation stays O(log n).
+    """
+
+    def __init__(self, max_running_per_zone: int = 0, stagger: float = 0):
+        self.max_running_per_zone = max_running_per_zone
+        self.stagger = stagger
+        self._heap: List[Tuple[float, int, FieldKey]] = []
+        # Plan waiting to start per field, with the sequence number of its heap entry or None when parked
+        self._pending: Dict[FieldKey, Tuple[Optional[int], dict]] = {}
+        self._parked: Dict[str, Deque[FieldKey]] = {}
+        self._slots: Dict[str, Set[str]] = {}
+        self._next_start: Dict[str, float] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def running_count(self) -> int:
+        return sum(len(slots) for slots in list(self._slots.values())) - self._scheduled_count()
+
+    def _scheduled_count(self) -> int:
+        return sum(1 for sequence, _ in list(self._pending.values()) if sequence is not None)
+
+    def schedule(self, key: FieldKey, plan: dict, now: Optional[float] = None) -> Optional[dict]:
+        """
+        Queue a start plan.
+
+        :return: The plan when it may be published right away, None when it
+            was scheduled or parked for `due`.
+        """
+        now = monotonic() if now is None else now
+        zone_id, field_id = key
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                self._pending[key] = (pending[0], plan)
+                return None
+            slots = self._slots.setdefault(zone_id, set())
+            if field_id in slots:
+                # Already running, a repeated start is only a refresh
+                return plan
+            if self.max_running_per_zone and len(slots) >= self.max_running_per_zone:
+                self._pending[key] = (None, plan)
+                self._parked.setdefault(zone_id, deque()).append(key)
+                return None
+            slots.add(field_id)
+            due = self._take_start_time(zone_id, now)
+            if due <= now:
+                return plan
+            self._push(key, plan, due)
+            return None
+
+    def finish(self, key: FieldKey, now: Optional[float] = None) -> None:
+        """
+        Free the slot of a field that stopped, or cancel its pending start,
+        and schedule the parked starts that now fit.
+        """
+        now = monotonic() if now is None else now
+        zone_id, field_id = key
+        with self._lock:
+            self._pending.pop(key, None)
+            slots = self._slots.get(zone_id)
+            if slots is not None:
+                slots.discard(field_id)
+            parked = self._parked.get(zone_id)
+            while parked and (not self.max_running_per_zone or len(slots) < self.max_running_per_zone):
+                parked_key = parked.popleft()
+                pending = self._pending.get(parked_key)
+                if pending is None or pending[0] is not None:
+                    continue
+                slots.add(parked_key[1])
+                self._push(parked_key, pending[1], self._take_start_time(zone_id, now))
+            if parked is not None and not parked:
+                del self._parked[zone_id]
+
+    def occupy(self, key: FieldKey, now: Optional[float] = None) -> None:
+        """
+        Account for a field started without going through `schedule`, such as
+        a start of the day-ahead schedule: it takes a slot of its zone even
+        past the cap, its pending start is dropped, and the next start of the
+        zone waits `stagger` seconds from now.
+        """
+        now = monotonic() if now is None else now
+        zone_id, field_id = key
+        with self._lock:
+            self._pending.pop(key, None)
+            self._slots.setdefault(zone_id, set()).add(field_id)
+            self._next_start[zone_id] = max(self._next_start.get(zone_id, now), now + self.stagger)
+
+    def due(self, now: Optional[float] = None) -> List[Tuple[FieldKey, dict]]:
+        """
+        Pop the scheduled starts whose time has come.
+        """
+        now = monotonic() if now is None else now
+        started = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, sequence, key = heapq.heappop(self._heap)
+                pending = self._pending.get(key)
+                if pending is None or pending[0] != sequence:
+                    continue
+                del self._pending[key]
+                started.append((key, pending[1]))
+        return started
+
+    def export(self) -> List[list]:
+        """
+        :return: The starts still waiting, as `[zone_id, field_id, plan]` in
+            the order they would start.
+        """
+        with self._lock:
+            scheduled = sorted(
+                (due, sequence, key) for due, sequence, key in self._heap
+                if self._pending.get(key, (None,))[0] == sequence
+            )
+            keys = [key for _, _, key in scheduled]
+            for parked in self._parked.values():
+                keys.extend(key for key in parked if key in self._pending and self._pending[key][0] is None)
+            return [[zone_id, field_id, self._pending[(zone_id, field_id)][1]] for zone_id, field_id in keys]
+
+    def restore(self, running: List[FieldKey], pending: List[list], now: Optional[float] = None) -> None:
+        """
+        Give the slots back to the fields that were running, then schedule
+        the starts dumped by `export` again from `now`. Fields listed in
+        both are taken as waiting to start.
+        """
+        now = monotonic() if now is None else now
+        waiting = {(zone_id, field_id) for zone_id, field_id, _ in pending}
+        with self._lock:
+            for key in running:
+                if key not in waiting:
+                    self._slots.setdefault(key[0], set()).add(key[1])
+        for zone_id, field_id, plan in pending:
+            key = (zone_id, field_id)
+            plan = self.schedule(key, plan, now)
+            if plan is not None:
+                # Due right away, hand it to the next `due` call
+                with self._lock:
+                    self._push(key, plan, now)
+
+    def _take_start_time(self, zone_id: str, now: float) -> float:
+        due = max(now, self._next_start.get(zone_id, now))
+        self._next_start[zone_id] = due + self.stagger
+        return due
+
+    def _push(self, key: FieldKey, plan: dict, due: float) -> None:
+        sequence = next(self._sequence)
+        self._pending[key] = (sequence, plan)
+        heapq.heappush(self._heap, (due, sequence, key))
@@ -0,0 +1,26 @@
+import sys
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+SERVICE = Path(__file__).resolve().parent.parent
+# The service is imported as `src`, the shared modules as `irrigation_common`
+sys.path[:0] = [str(SERVICE), str(SERVICE.parent / 'common')]
+
+from src import planner as planner_module  # noqa: E402
+from src.config import Config  # noqa: E402
+
+
+@pytest.fixture
+def make_planner():
+    """
+    Build a Planner without a broker. Publications are recorded on
+    `mqtt_client`; snapshots are off unless a SNAPSHOT_PATH is given.
+    """
+    def make(**options):
+        options.setdefault('SNAPSHOT_PATH', '')
+        options.setdefault('METRICS_PORT', 0)
+        with mock.patch.object(planner_module.mqtt, 'Client'):
+            return planner_module.Planner(Config(MQTT_BROKER_URL='broker:1883', **options))
+    return make
@@ -0,0 +1,33 @@
+"""
+MQTT helpers shared by the planner tests.
+"""
+import json
+
+
+class Message:
+    def __init__(self, topic: str, payload):
+        self.topic = topic
+        self.payload = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+
+
+def published(planner, prefix: str = 'planner/zone/') -> list:
+    """
+    Decoded plans the planner published, as `(topic, payload)` pairs.
+    """
+    return [
+        (call.args[0], json.loads(call.args[1]))
+        for call in planner.mqtt_client.publish.call_args_list
+        if call.args[0].startswith(prefix)
+    ]
+
+
+def actions(planner) -> list:
+    """
+    `(field_id, action)` of every plan published, in order.
+    """
+    return [(topic.split('/')[4], plan['action']) for topic, plan in published(planner)]
+
+
+def send(planner, field_id: str, action: str, zone_id: str = 'z1', **extra) -> None:
+    payload = {'action': action, 'reason': 'test', **extra}
+    planner._on_message(None, None, Message(f'analyzer/zone/{zone_id}/field/{field_id}', payload))
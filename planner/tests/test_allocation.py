@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from src.allocation import ZoneAllocator, water_fill
+from support import published, send
+
+
+def brute_force_level(needs, weights, budget):
+    low, high = 0.0, float(max(needs / weights))
+    for _ in range(200):
+        level = (low + high) / 2
+        if np.minimum(needs, level * weights).sum() > budget:
+            high = level
+        else:
+            low = level
+    return np.minimum(needs, low * weights)
+
+
+def test_water_fill_matches_a_bisection():
+    rng = np.random.default_rng(7)
+    for _ in range(50):
+        needs = rng.uniform(0, 500, 40)
+        weights = rng.uniform(0.1, 3, 40)
+        budget = rng.uniform(0, needs.sum())
+        grants = water_fill(needs, weights, budget)
+        assert grants.sum() == pytest.approx(budget)
+        assert np.all(grants <= needs + 1e-9)
+        assert grants == pytest.approx(brute_force_level(needs, weights, budget), abs=1e-6)
+
+
+def test_committed_water_never_exceeds_the_budget():
+    allocator = ZoneAllocator(1000, window=2)
+    for index, need in enumerate((600, 600, 300)):
+        allocator.request(('z1', f'f{index}'), need, now=0)
+    assert allocator.allocate(now=1) == []
+    grants = dict(allocator.allocate(now=2))
+    assert sum(grants.values()) == pytest.approx(1000)
+    # Equal priorities serve every field the same fraction of its need
+    assert grants[('z1', 'f0')] / 600 == pytest.approx(grants[('z1', 'f2')] / 300)
+
+    allocator.request(('z1', 'f3'), 200, now=3)
+    assert allocator.allocate(now=5) == []
+    allocator.release(('z1', 'f0'))
+    assert dict(allocator.allocate(now=7)) == {('z1', 'f3'): pytest.approx(200)}
+
+
+def test_planner_publishes_the_granted_share(make_planner):
+    planner = make_planner(ZONE_WATER_BUDGET=300, ALLOCATION_WINDOW=0)
+    send(planner, 'f1', 'trigger_irrigation', water_need=400)
+    send(planner, 'f2', 'trigger_irrigation', water_need=200)
+    assert published(planner) == []
+    planner._tick()
+    plans = {topic.split('/')[4]: plan for topic, plan in published(planner)}
+    assert plans['f1']['water_need'] == pytest.approx(200)
+    assert plans['f1']['requested_water_need'] == 400
+    assert plans['f2']['water_need'] == pytest.approx(100)
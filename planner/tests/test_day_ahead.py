@@ -0,0 +1,129 @@
+from time import time
+from unittest import mock
+
+import pytest
+
+from src import planner as planner_module
+from src.day_ahead import DayAheadScheduler, project_starts
+from src.plan_state import IRRIGATING, SCHEDULED, START_IRRIGATION
+from support import actions, send
+
+HOUR = 3600
+T0 = 1_700_000_000.0
+KEY = ('z1', 'f1')
+
+
+def outlook(moisture, observed_at, **extra):
+    return dict({
+        'soil_moisture': moisture, 'soil_moisture_threshold': 30, 'target_moisture': 35,
+        'moisture_trend': -1.0, 'liters_per_point': 10, 'rain_windows': [], 'observed_at': observed_at
+    }, **extra)
+
+
+def test_drying_field_is_refilled_each_time_it_reaches_the_threshold():
+    starts = project_starts(outlook(40, 0), now=0, horizon=24 * HOUR)
+    assert starts == [(10 * HOUR, pytest.approx(50)), (15 * HOUR, pytest.approx(50)), (20 * HOUR, pytest.approx(50))]
+
+
+def test_rain_counts_as_a_refill():
+    starts = project_starts(outlook(40, 0, rain_windows=[[9 * HOUR, 12 * HOUR]]), now=0, horizon=24 * HOUR)
+    # Due at 10h, in the rain, then dry again 5h after the rain ends
+    assert [start for start, _ in starts] == [17 * HOUR, 22 * HOUR]
+
+
+def test_recent_start_counts_as_a_refill():
+    starts = project_starts(outlook(29, T0), now=T0 + HOUR, horizon=6 * HOUR, last_start=T0 + HOUR)
+    assert [start for start, _ in starts] == [T0 + 6 * HOUR]
+
+
+def test_irrigating_fields_get_no_immediate_slot():
+    scheduler = DayAheadScheduler(horizon=24 * HOUR, interval=HOUR)
+    scheduler.observe(KEY, outlook(29, T0))
+    scheduler.build(now=T0 + 60)
+    assert scheduler.covers(KEY, now=T0 + 60)
+    zones = scheduler.build(now=T0 + 60, irrigating=[KEY])
+    assert zones['z1']['fields']['f1'][0][0] == T0 + 60 + 5 * HOUR
+    assert not scheduler.covers(KEY, now=T0 + 60)
+
+
+def test_started_slots_are_popped_once():
+    scheduler = DayAheadScheduler(horizon=24 * HOUR, interval=HOUR)
+    scheduler.observe(KEY, outlook(30.5, 0))
+    scheduler.build(now=0)
+    assert scheduler.started(now=HOUR / 4) == []
+    assert scheduler.started(now=HOUR) == [(KEY, pytest.approx(50))]
+    assert scheduler.started(now=HOUR) == []
+
+
+def first_starts(zones, zone_id='z1'):
+    return {field_id: starts[0] for field_id, starts in zones[zone_id]['fields'].items()}
+
+
+def test_starts_are_capped_and_staggered_per_zone():
+    scheduler = DayAheadScheduler(horizon=24 * HOUR, interval=HOUR, max_running_per_zone=2, stagger=600, run_seconds=HOUR)
+    for field_id in ('f1', 'f2', 'f3'):
+        scheduler.observe(('z1', field_id), outlook(29, T0))
+    scheduler.observe(('z2', 'f1'), outlook(29, T0))
+    zones = scheduler.build(now=T0)
+    assert {field_id: start for field_id, (start, _) in first_starts(zones).items()} == {
+        'f1': T0, 'f2': T0 + 600, 'f3': T0 + HOUR
+    }
+    # Zones do not hold each other up
+    assert first_starts(zones, 'z2')['f1'][0] == T0
+
+
+def test_starts_fit_the_zone_water_budget():
+    scheduler = DayAheadScheduler(horizon=24 * HOUR, interval=HOUR, budget=100, run_seconds=HOUR)
+    scheduler.observe(('z1', 'f1'), outlook(29, T0))
+    scheduler.observe(('z1', 'f2'), outlook(29, T0))
+    scheduler.observe(('z1', 'f3'), outlook(20, T0))
+    zones = scheduler.build(now=T0, granted={'z1': {'f9': 50}})
+    assert first_starts(zones) == {
+        'f1': [T0 + HOUR, 60], 'f2': [T0 + 2 * HOUR, 60], 'f3': [T0 + 3 * HOUR, 100]
+    }
+
+
+def test_start_covered_by_the_schedule_is_left_to_the_executor(make_planner):
+    planner = make_planner(SCHEDULE_INTERVAL=HOUR)
+    send(planner, 'f1', 'stop_irrigation', outlook=outlook(30.5, time()))
+    planner._tick()
+    assert planner.mqtt_client.publish.call_args.args[0] == 'planner/schedule/zone/z1'
+    send(planner, 'f1', 'trigger_irrigation', water_need=50, outlook=outlook(30.4, time()))
+    assert actions(planner) == [('f1', 'stop_irrigation')]
+    assert planner.metrics.snapshot()[f'plans_held_{SCHEDULED}_total'] == 1
+
+
+def test_live_start_after_a_previous_start_is_published(make_planner):
+    planner = make_planner(SCHEDULE_INTERVAL=HOUR, MIN_RUN_SECONDS=0, MIN_REST_SECONDS=0)
+    send(planner, 'f1', 'stop_irrigation', outlook=outlook(29, time() - 60))
+    planner._tick()
+    # The scheduled start went out from the executor
+    planner._tick()
+    assert planner.plan_states.state(KEY) == IRRIGATING
+    send(planner, 'f1', 'stop_irrigation')
+    send(planner, 'f1', 'trigger_irrigation', water_need=40, outlook=outlook(26, time()))
+    assert actions(planner)[-2:] == [('f1', 'stop_irrigation'), ('f1', START_IRRIGATION)]
+
+
+def test_scheduled_start_holds_a_slot_and_water(make_planner):
+    planner = make_planner(SCHEDULE_INTERVAL=HOUR, MAX_RUNNING_PER_ZONE=1, ZONE_WATER_BUDGET=100, ALLOCATION_WINDOW=0)
+    send(planner, 'f1', 'stop_irrigation', outlook=outlook(29, time() - 60))
+    planner._tick()
+    planner._tick()
+    assert planner.start_scheduler.running_count() == 1
+    assert planner.allocator.granted('z1') == pytest.approx(60, abs=1)
+    send(planner, 'f2', 'trigger_irrigation', water_need=30)
+    planner._tick()
+    # Granted what the budget has left, then parked behind the scheduled run
+    assert planner.allocator.granted('z1') == pytest.approx(90, abs=1)
+    assert ('f2', START_IRRIGATION) not in actions(planner)
+    assert planner.start_scheduler.pending_count == 1
+
+
+def test_results_without_an_outlook_are_reported_once(make_planner):
+    planner = make_planner(SCHEDULE_INTERVAL=HOUR)
+    with mock.patch.object(planner_module.logger, 'warning') as warning:
+        send(planner, 'f1', 'stop_irrigation')
+        send(planner, 'f2', 'stop_irrigation')
+    assert warning.call_count == 1
+    assert 'OUTLOOK_HOURS' in warning.call_args.args[0]
@@ -0,0 +1,60 @@
+from src.plan_state import (COOLDOWN, IDLE, IRRIGATING, MIN_RUN, REDUNDANT, STARTING, START_IRRIGATION,
+                            STOP_IRRIGATION, PlanStateMachine)
+from support import actions, send
+
+START = {'action': START_IRRIGATION}
+STOP = {'action': STOP_IRRIGATION}
+KEY = ('z1', 'f1')
+
+
+def test_held_stop_goes_out_once_the_minimum_run_elapsed():
+    states = PlanStateMachine(min_run=60, min_rest=0, refresh_interval=0)
+    assert states.submit(KEY, START, now=0) == (START, None)
+    assert states.submit(KEY, START, now=1) == (None, REDUNDANT)
+    assert states.submit(KEY, STOP, now=10) == (None, MIN_RUN)
+    assert states.tick(now=59) == []
+    assert states.tick(now=60) == [(KEY, STOP)]
+    assert states.state(KEY) == COOLDOWN
+
+
+def test_waiting_start_is_not_irrigating_until_recorded():
+    states = PlanStateMachine(min_run=60, min_rest=300)
+    states.submit(KEY, START, now=0)
+    states.wait(KEY, now=0)
+    assert states.state(KEY) == STARTING
+    assert states.fields(IRRIGATING) == []
+    states.record(KEY, START, now=5)
+    assert states.state(KEY) == IRRIGATING
+
+
+def test_stop_cancels_a_waiting_start_without_rest():
+    states = PlanStateMachine(min_run=60, min_rest=300)
+    states.submit(KEY, START, now=0)
+    states.wait(KEY, now=0)
+    assert states.submit(KEY, STOP, now=1) == (STOP, None)
+    assert states.state(KEY) == IDLE
+    assert states.submit(KEY, START, now=2) == (START, None)
+
+
+def test_parked_start_irrigates_once_released(make_planner):
+    planner = make_planner(MAX_RUNNING_PER_ZONE=1, MIN_RUN_SECONDS=0)
+    send(planner, 'f1', 'trigger_irrigation', water_need=100)
+    send(planner, 'f2', 'trigger_irrigation', water_need=100)
+    assert planner.plan_states.state(('z1', 'f2')) == STARTING
+    assert planner.plan_states.fields(IRRIGATING) == [('z1', 'f1')]
+
+    send(planner, 'f1', 'stop_irrigation')
+    planner._tick()
+    assert planner.plan_states.state(('z1', 'f2')) == IRRIGATING
+    assert actions(planner) == [('f1', START_IRRIGATION), ('f1', STOP_IRRIGATION), ('f2', START_IRRIGATION)]
+
+
+def test_stop_drops_a_parked_start(make_planner):
+    planner = make_planner(MAX_RUNNING_PER_ZONE=1, MIN_RUN_SECONDS=0)
+    send(planner, 'f1', 'trigger_irrigation', water_need=100)
+    send(planner, 'f2', 'trigger_irrigation', water_need=100)
+    send(planner, 'f2', 'stop_irrigation')
+    send(planner, 'f1', 'stop_irrigation')
+    planner._tick()
+    assert planner.plan_states.state(('z1', 'f2')) == IDLE
+    assert ('f2', START_IRRIGATION) not in actions(planner)
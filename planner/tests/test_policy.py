@@ -0,0 +1,50 @@
+import json
+import os
+
+from src.plan_state import START_IRRIGATION
+from src.policy import Policy
+from support import published, send
+
+RULES = [
+    {'name': 'skip-small', 'action': 'trigger_irrigation', 'when': {'water_need': {'<': 50}}, 'plan': None},
+    {
+        'name': 'greenhouse', 'action': 'trigger_irrigation', 'when': {'zone_id': {'matches': '^gh'}},
+        'plan': {'action': 'start_irrigation', 'reason': '$reason', 'water_need': '$water_need', 'water_need_factor': 0.5}
+    },
+    {'name': 'any', 'action': '*', 'plan': {'action': '$action', 'reason': '$reason'}}
+]
+
+
+def test_first_matching_rule_renders_the_plan():
+    policy = Policy(RULES)
+    context = {'action': 'trigger_irrigation', 'reason': 'dry', 'water_need': 100, 'zone_id': 'gh1', 'field_id': 'f1'}
+    rule, plan = policy.evaluate(context)
+    assert rule.name == 'greenhouse'
+    assert plan == {'action': 'start_irrigation', 'reason': 'dry', 'water_need': 50}
+
+    rule, plan = policy.evaluate(dict(context, water_need=10))
+    assert (rule.name, plan) == ('skip-small', None)
+    rule, plan = policy.evaluate({'action': 'stop_irrigation', 'reason': 'wet', 'zone_id': 'z1'})
+    assert (rule.name, plan) == ('any', {'action': 'stop_irrigation', 'reason': 'wet'})
+
+
+def test_planner_picks_up_a_changed_policy_file(make_planner, tmp_path):
+    path = tmp_path / 'policy.json'
+    path.write_text(json.dumps({'rules': RULES[:1]}))
+    planner = make_planner(POLICY_PATH=str(path))
+    assert [rule.name for rule in planner.policy.rules] == ['skip-small']
+
+    path.write_text(json.dumps(RULES[1:]))
+    os.utime(path, (0, 1))
+    assert planner.policy_reloader.poll()
+    assert not planner.policy_reloader.poll()
+    send(planner, 'f1', 'trigger_irrigation', zone_id='gh1', water_need=300)
+    [(_, plan)] = published(planner)
+    assert (plan['action'], plan['water_need']) == (START_IRRIGATION, 150)
+
+
+def test_broken_policy_keeps_the_default_rules(make_planner, tmp_path):
+    path = tmp_path / 'policy.json'
+    path.write_text('{"rules": [{"when": {"hour": {"around": 3}}, "plan": null}]}')
+    planner = make_planner(POLICY_PATH=str(path))
+    assert [rule.name for rule in planner.policy.rules] == ['start', 'stop']
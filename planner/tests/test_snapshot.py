@@ -0,0 +1,33 @@
+from src.plan_state import IDLE, IRRIGATING, STARTING
+from support import actions, send
+
+
+def test_restart_resumes_plan_states(make_planner, tmp_path):
+    options = {'SNAPSHOT_PATH': str(tmp_path / 'state.sqlite'), 'MAX_RUNNING_PER_ZONE': 1, 'MIN_RUN_SECONDS': 0}
+    planner = make_planner(**options)
+    send(planner, 'f1', 'trigger_irrigation', water_need=100)
+    send(planner, 'f2', 'trigger_irrigation', water_need=100)
+    planner.snapshotter.stop()
+
+    restarted = make_planner(**options)
+    assert restarted.plan_states.state(('z1', 'f1')) == IRRIGATING
+    assert restarted.plan_states.state(('z1', 'f2')) == STARTING
+    # The analyzer repeating its decisions does not command the fields again
+    send(restarted, 'f1', 'trigger_irrigation', water_need=100)
+    send(restarted, 'f2', 'trigger_irrigation', water_need=100)
+    assert actions(restarted) == []
+
+    send(restarted, 'f1', 'stop_irrigation')
+    restarted._tick()
+    assert actions(restarted) == [('f1', 'stop_irrigation'), ('f2', 'start_irrigation')]
+
+
+def test_waiting_starts_are_dropped_without_a_scheduler(make_planner, tmp_path):
+    path = str(tmp_path / 'state.sqlite')
+    planner = make_planner(SNAPSHOT_PATH=path, MAX_RUNNING_PER_ZONE=1)
+    send(planner, 'f1', 'trigger_irrigation', water_need=100)
+    send(planner, 'f2', 'trigger_irrigation', water_need=100)
+    planner.snapshotter.stop()
+
+    restarted = make_planner(SNAPSHOT_PATH=path)
+    assert restarted.plan_states.state(('z1', 'f2')) == IDLE
@@ -0,0 +1,43 @@
+from src.plan_state import START_IRRIGATION
+from src.start_scheduler import StartScheduler
+from support import actions, send
+
+START = {'action': START_IRRIGATION}
+
+
+def test_starts_of_a_zone_are_staggered():
+    scheduler = StartScheduler(stagger=10)
+    assert scheduler.schedule(('z1', 'f1'), START, now=0) == START
+    assert scheduler.schedule(('z1', 'f2'), START, now=0) is None
+    assert scheduler.schedule(('z1', 'f3'), START, now=0) is None
+    assert scheduler.schedule(('z2', 'f1'), START, now=0) == START
+    assert scheduler.due(now=9) == []
+    assert scheduler.due(now=10) == [(('z1', 'f2'), START)]
+    assert scheduler.due(now=25) == [(('z1', 'f3'), START)]
+
+
+def test_parked_starts_wait_for_a_free_slot_in_order():
+    scheduler = StartScheduler(max_running_per_zone=2)
+    for field_id in ('f1', 'f2', 'f3', 'f4'):
+        scheduler.schedule(('z1', field_id), START, now=0)
+    assert scheduler.pending_count == 2
+    scheduler.finish(('z1', 'f2'), now=1)
+    assert scheduler.due(now=1) == [(('z1', 'f3'), START)]
+    assert scheduler.running_count() == 2
+
+
+def test_cancelled_start_is_skipped():
+    scheduler = StartScheduler(stagger=10)
+    scheduler.schedule(('z1', 'f1'), START, now=0)
+    scheduler.schedule(('z1', 'f2'), START, now=0)
+    scheduler.finish(('z1', 'f2'), now=1)
+    assert scheduler.due(now=100) == []
+    assert scheduler.export() == []
+
+
+def test_planner_staggers_a_burst_of_starts(make_planner):
+    planner = make_planner(START_STAGGER_INTERVAL=60)
+    for field_id in ('f1', 'f2', 'f3'):
+        send(planner, field_id, 'trigger_irrigation', water_need=100)
+    assert actions(planner) == [('f1', START_IRRIGATION)]
+    assert planner.start_scheduler.pending_count == 2
@@ -1,15 +1,29 @@
-import json
 import logging
 import os
 import time
 from typing import Tuple
 
 import paho.mqtt.client as mqtt
+
+from irrigation_common.logging_config import setup_logging
+from irrigation_common.metrics import MetricsServer
+from irrigation_common.tracing import new_trace
+
+from src.actuator import codec, metrics
 from src.zone import ZoneService
 
 # Configuration
 MQTT_BROKER_URL = os.getenv('MQTT_BROKER_URL', 'mosquitto:1883')
 BACKEND_URL = os.getenv('BACKEND_URL', 'http://backend:5000')
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'false').lower() == 'true'
+# One message per sensor ('sensor'), or one batch per field ('field') or zone ('zone') every tick
+TELEMETRY_MODE = os.getenv('TELEMETRY_MODE', 'sensor').lower()
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9100))
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_RATE_LIMIT = float(os.getenv('LOG_RATE_LIMIT', 10))
+LOG_BURST = int(os.getenv('LOG_BURST', 20))
+LOG_SAMPLE_EVERY = int(os.getenv('LOG_SAMPLE_EVERY', 1))
 
 # Logging Configuration
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -61,28 +75,50 @@ class SensorSimulator:
             logger.error(f"Error loading zones: {e}")
 
     def simulate_sensor_data(self):
-        logger.info("Starting Sensor Simulator")
+        logger.info(f"Starting Sensor Simulator in {TELEMETRY_MODE} telemetry mode")
         while True:
             for zone in self.zones:
+                if TELEMETRY_MODE == 'zone':
+                    readings = [
+                        {'field_id': field.field_id, **self._simulate_reading(sensor)}
+                        for field in zone.fields.values()
+                        for sensor in field.get_all_sensors()
+                    ]
+                    self._publish(f"zone/{zone.zone_id}/sensors", {'readings': readings})
+                    continue
                 for field in zone.fields.values():
+                    if TELEMETRY_MODE == 'field':
+                        readings = [self._simulate_reading(sensor) for sensor in field.get_all_sensors()]
+                        self._publish(f"zone/{zone.zone_id}/field/{field.field_id}/sensors", {'readings': readings})
+                        continue
                     for sensor in field.get_all_sensors():
                         value = sensor.simulate_value()
                         topic = f"zone/{zone.zone_id}/field/{field.field_id}/sensor/{sensor.sensor_id}/{sensor.type}"
-                        logger.info(f"Publishing sensor data to topic: {topic}")
-                        message = json.dumps({'value': value})
-                        try:
-                            self.mqtt_client.publish(topic, message)
-                            logger.info(f"Published sensor data: Zone={zone.zone_id}, Field={field.field_id}, Sensor={sensor.sensor_id}, Type={sensor.type}, Value={value}")
-                        except Exception as e:
-                            logger.error(f"Failed to publish sensor data: {e}")
+                        self._publish(topic, {'value': value})
             time.sleep(10)  # Simulate data every 10 seconds
 
+    def _simulate_reading(self, sensor) -> dict:
+        return {'sensor_id': sensor.sensor_id, 'type': sensor.type, 'value': sensor.simulate_value()}
+
+    def _publish(self, topic: str, payload: dict) -> None:
+        logger.debug("Publishing sensor data to topic: %s", topic)
+        if TRACING_ENABLED:
+            payload.update(new_trace())
+        try:
+            self.mqtt_client.publish(topic + codec.suffix, codec.encode(payload))
+            logger.info("Published sensor data on %s: %s", topic, payload)
+        except Exception as e:
+            logger.error(f"Failed to publish sensor data: {e}")
+
     def stop(self):
         self.mqtt_client.loop_stop()
         self.mqtt_client.disconnect()
 
 if __name__ == "__main__":
+    setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_RATE_LIMIT, LOG_BURST, LOG_SAMPLE_EVERY)
     host, port = _parse_mqtt_url(MQTT_BROKER_URL)
+    if METRICS_PORT > 0:
+        MetricsServer(metrics, METRICS_PORT).start()
     simulator = SensorSimulator(host, port, BACKEND_URL)
     simulator.simulate_sensor_data()
     # try:
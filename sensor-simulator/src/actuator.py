@@ -1,6 +1,6 @@
-import json
 import logging
 import os
+import socket
 import threading
 from abc import ABC, abstractmethod
 from enum import Enum
@@ -9,9 +9,15 @@ from typing import Tuple
 
 import paho.mqtt.client as mqtt
 
+from irrigation_common.codec import codec_for_topic, get_codec, topic_variants
+from irrigation_common.metrics import MetricsRegistry
+from irrigation_common.tracing import TraceRecorder, extract_trace
+
 EXECUTOR = 'executor/zone/{zone_id}/field/{field_id}'
+ACTUATOR_COMMAND_TOPIC = EXECUTOR + '/actuator/{actuator_id}/{actuator_type}'
 CONSUMPTION_TOPIC = 'zone/{zone_id}/field/{field_id}/actuator/{actuator_id}/{actuator_type}/consumption'
 MQTT_BROKER_URL = os.getenv('MQTT_BROKER_URL', 'mosquitto:1883')
+PAYLOAD_CODEC = os.getenv('PAYLOAD_CODEC', 'json')
 SPEED_UP_SOIL_MOISTURE_BY = 2 * 60 # 2 hours
 
 logging.basicConfig(
@@ -20,6 +26,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Shared by every simulated actuator, served by the simulator's metrics endpoint
+metrics = MetricsRegistry('sensor-simulator', socket.gethostname())
+trace_recorder = TraceRecorder(metrics, 'actuator')
+codec = get_codec(PAYLOAD_CODEC)
+
 class ActuatorType(Enum):
     SPRINKLER = 'sprinkler'
     DRIP_IRRIGATION = 'drip_irrigation'
@@ -67,12 +78,19 @@ class Actuator(ABC):
                 zone_id=self.zone_id,
                 field_id=self.field_id
             )
-            self.consumption_topic = CONSUMPTION_TOPIC.format(
+            # Commands addressed to this actuator alone, with its share of the water need
+            self.command_topic = ACTUATOR_COMMAND_TOPIC.format(
                 zone_id=self.zone_id,
                 field_id=self.field_id,
                 actuator_id=self.actuator_id,
                 actuator_type=self.type
             )
+            self.consumption_topic = CONSUMPTION_TOPIC.format(
+                zone_id=self.zone_id,
+                field_id=self.field_id,
+                actuator_id=self.actuator_id,
+                actuator_type=self.type
+            ) + codec.suffix
 
             self.mqtt_client = mqtt.Client()
             self.mqtt_client.on_connect = self._on_connect
@@ -96,8 +114,9 @@ class Actuator(ABC):
     def _on_connect(self, client, userdata, flags, rc: int) -> None:
         if rc == 0:
             logger.info(f"Connected to MQTT broker for actuator {self.actuator_id}")
-            client.subscribe(self.topic)
-            logger.info(f"Subscribed to topic: {self.topic}")
+            topics = topic_variants(self.topic) + topic_variants(self.command_topic)
+            client.subscribe([(topic, 0) for topic in topics])
+            logger.info(f"Subscribed to topics: {self.topic}, {self.command_topic}")
         else:
             logger.error(f"Failed to connect to MQTT broker with result code: {rc}")
 
@@ -105,6 +124,12 @@ class Actuator(ABC):
     def _on_message(self, client, userdata, msg):
         pass
 
+    def _record_arrival(self, payload: dict) -> None:
+        trace = extract_trace(payload)
+        if trace:
+            trace_recorder.record(trace)
+            logger.info("Actuator %s received command of trace %s", self.actuator_id, trace['trace_id'])
+
     def start(self, value: float) -> None:
         if self.status == 'on':
             return
@@ -129,7 +154,7 @@ class Actuator(ABC):
                 'value': 0,
                 'measurement': self.measurement,
             }
-            self.mqtt_client.publish(self.consumption_topic, json.dumps(payload))
+            self.mqtt_client.publish(self.consumption_topic, codec.encode(payload))
             logger.info(f"Stopped actuator {self.actuator_id}")
         except Exception as e:
             logger.error(f"Error stopping actuator: {e}")
@@ -146,7 +171,7 @@ class Actuator(ABC):
                     'measurement': self.measurement,
                     'status': self.status
                 }
-                self.mqtt_client.publish(self.consumption_topic, json.dumps(payload))
+                self.mqtt_client.publish(self.consumption_topic, codec.encode(payload))
                 sleep(1)
         except Exception as e:
             logger.error(f"Error publishing consumption: {e}")
@@ -154,7 +179,8 @@ class Actuator(ABC):
 class Sprinkler(Actuator):
     def _on_message(self, client, userdata, msg) -> None:
         try:
-            payload = json.loads(msg.payload.decode())
+            payload = codec_for_topic(msg.topic)[1].decode(msg.payload)
+            self._record_arrival(payload)
             action = payload.get('command')
             
             if not action:
@@ -173,15 +199,16 @@ class Sprinkler(Actuator):
             else:
                 logger.warning(f"Unknown action received: {action}")
                 
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON payload: {e}")
+        except ValueError as e:
+            logger.error(f"Invalid payload: {e}")
         except Exception as e:
             logger.error(f"Error processing message: {e}")
 
 class DripIrrigation(Actuator):
     def _on_message(self, client, userdata, msg) -> None:
         try:
-            payload = json.loads(msg.payload.decode())
+            payload = codec_for_topic(msg.topic)[1].decode(msg.payload)
+            self._record_arrival(payload)
             action = payload.get('command')
             
             if not action:
@@ -200,8 +227,8 @@ class DripIrrigation(Actuator):
             else:
                 logger.warning(f"Unknown action received: {action}")
                 
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON payload: {e}")
+        except ValueError as e:
+            logger.error(f"Invalid payload: {e}")
         except Exception as e:
             logger.error(f"Error processing message: {e}")
 
@@ -1,4 +1,3 @@
-import json
 import logging
 import os
 import random
@@ -9,6 +8,8 @@ from typing import Tuple
 
 import paho.mqtt.client as mqtt
 
+from irrigation_common.codec import codec_for_topic, topic_variants
+
 from .actuator import ActuatorType
 
 MQTT_BROKER_URL = os.getenv('MQTT_BROKER_URL', 'mosquitto:1883')
@@ -93,14 +94,15 @@ class SoilMoistureSensor(Sensor):
         self.start_mqtt()
 
     def on_connect(self, client, userdata, flags, rc):
-        self.client.subscribe(self.consumption_topic)
+        self.client.subscribe([(topic, 0) for topic in topic_variants(self.consumption_topic)])
 
     def on_message(self, client, userdata, msg):
         try:
-            topic_parts = msg.topic.split('/')
+            topic, codec = codec_for_topic(msg.topic)
+            topic_parts = topic.split('/')
             actuator_type = topic_parts[6]
             if actuator_type in [ActuatorType.DRIP_IRRIGATION.value, ActuatorType.SPRINKLER.value]:
-                payload = json.loads(msg.payload.decode())
+                payload = codec.decode(msg.payload)
                 if payload['status'] == 'on':
                     self.is_simulating = False
                     consumption = payload['value'] * 60  # convert from liters per second to liters per minute
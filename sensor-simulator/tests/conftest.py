@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+SERVICE = Path(__file__).resolve().parent.parent
+# The service is imported as `src`, the shared modules as `irrigation_common`
+sys.path[:0] = [str(SERVICE), str(SERVICE.parent / 'common')]
@@ -0,0 +1,45 @@
+import json
+from unittest import mock
+
+import pytest
+
+from src import actuator as actuator_module
+from src.actuator import ActuatorFactory
+
+
+class Message:
+    def __init__(self, topic: str, payload: dict):
+        self.topic = topic
+        self.payload = json.dumps(payload).encode()
+
+
+@pytest.fixture
+def sprinkler():
+    with mock.patch.object(actuator_module.mqtt, 'Client'):
+        sprinkler = ActuatorFactory.create_actuator(
+            actuator_id='a1', type='sprinkler', zone_id='z1', field_id='f1',
+            consumption=10, measurement='l', max_value=100, min_value=0
+        )
+    with mock.patch.object(sprinkler, '_start_consumption_thread'):
+        yield sprinkler
+
+
+def test_subscribes_to_its_own_command_topic(sprinkler):
+    client = mock.Mock()
+    sprinkler._on_connect(client, None, None, 0)
+    [topics] = client.subscribe.call_args.args
+    assert [topic for topic, _ in topics] == [
+        'executor/zone/z1/field/f1',
+        'executor/zone/z1/field/f1/msgpack',
+        'executor/zone/z1/field/f1/actuator/a1/sprinkler',
+        'executor/zone/z1/field/f1/actuator/a1/sprinkler/msgpack'
+    ]
+
+
+def test_runs_on_its_share_of_the_water_need(sprinkler):
+    sprinkler._on_message(None, None, Message(
+        'executor/zone/z1/field/f1/actuator/a1/sprinkler', {'command': 'start_irrigation', 'water_need': 300}
+    ))
+    assert (sprinkler.status, sprinkler.value) == ('on', 50)
+    sprinkler._on_message(None, None, Message('executor/zone/z1/field/f1', {'command': 'stop_irrigation', 'water_need': 0}))
+    assert sprinkler.status == 'off'